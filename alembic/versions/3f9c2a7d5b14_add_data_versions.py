@@ -0,0 +1,35 @@
+"""Add data versions
+
+Revision ID: 3f9c2a7d5b14
+Revises: fcd97c8e23e7
+Create Date: 2026-10-19 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d5b14'
+down_revision = 'fcd97c8e23e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('data_versions',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_data_versions_id'), 'data_versions', ['id'], unique=False)
+    op.create_index(op.f('ix_data_versions_scope'), 'data_versions', ['scope'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_data_versions_scope'), table_name='data_versions')
+    op.drop_index(op.f('ix_data_versions_id'), table_name='data_versions')
+    op.drop_table('data_versions')
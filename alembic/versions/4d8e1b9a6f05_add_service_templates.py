@@ -0,0 +1,99 @@
+"""Add service templates
+
+Revision ID: 4d8e1b9a6f05
+Revises: e2a94f6b7c31
+Create Date: 2026-10-19 15:48:02.117364
+
+"""
+import json
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8e1b9a6f05'
+down_revision = 'e2a94f6b7c31'
+branch_labels = None
+depends_on = None
+
+
+# 原 projects.SERVICE_TEMPLATES 中的内置模板
+DEFAULT_SERVICE_TEMPLATES = {
+    "商业综合体": [
+        ("Bird's Eye View", 8000, "鸟瞰视角展示整体规划"),
+        ("Human View", 6000, "人视角展示建筑细节"),
+        ("Interior View", 5000, "室内空间展示"),
+    ],
+    "住宅项目": [
+        ("Aerial View", 7000, "空中视角展示住宅布局"),
+        ("Street View", 5500, "街道视角展示建筑外观"),
+        ("Garden View", 4500, "花园景观展示"),
+    ],
+    "办公建筑": [
+        ("Corporate View", 9000, "企业形象展示视角"),
+        ("Plaza View", 7500, "广场视角展示"),
+        ("Interior Office", 6000, "办公室内部展示"),
+    ],
+    "文化建筑": [
+        ("Landmark View", 10000, "地标建筑展示"),
+        ("Cultural Atmosphere", 8500, "文化氛围营造"),
+        ("Public Space", 7000, "公共空间展示"),
+    ],
+}
+
+
+def upgrade() -> None:
+    service_templates = op.create_table('service_templates',
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('camera', sa.String(length=100), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('sort_order', sa.Integer(), nullable=False),
+    sa.Column('usage_count', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category', 'camera', name='uq_service_templates_category_camera')
+    )
+    op.create_index(op.f('ix_service_templates_camera'), 'service_templates', ['camera'], unique=False)
+    op.create_index(op.f('ix_service_templates_category'), 'service_templates', ['category'], unique=False)
+    op.create_index(op.f('ix_service_templates_id'), 'service_templates', ['id'], unique=False)
+
+    # 统计已有项目对各服务的使用次数（每个项目每个服务计一次）
+    connection = op.get_bind()
+    usage = Counter()
+    for (services,) in connection.execute(sa.text("SELECT services FROM projects WHERE services IS NOT NULL")):
+        if isinstance(services, str):
+            try:
+                services = json.loads(services)
+            except ValueError:
+                continue
+        if not isinstance(services, list):
+            continue
+        cameras = {
+            service.get("camera") if isinstance(service, dict) else service
+            for service in services
+        }
+        usage.update(camera for camera in cameras if isinstance(camera, str) and camera)
+
+    op.bulk_insert(service_templates, [
+        {
+            "category": category,
+            "camera": camera,
+            "unit_price": unit_price,
+            "description": description,
+            "sort_order": index,
+            "usage_count": usage[camera],
+        }
+        for category, templates in DEFAULT_SERVICE_TEMPLATES.items()
+        for index, (camera, unit_price, description) in enumerate(templates)
+    ])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_service_templates_id'), table_name='service_templates')
+    op.drop_index(op.f('ix_service_templates_category'), table_name='service_templates')
+    op.drop_index(op.f('ix_service_templates_camera'), table_name='service_templates')
+    op.drop_table('service_templates')
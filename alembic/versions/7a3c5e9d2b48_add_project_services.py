@@ -0,0 +1,81 @@
+"""Add project services
+
+Revision ID: 7a3c5e9d2b48
+Revises: 4d8e1b9a6f05
+Create Date: 2026-10-19 16:32:47.905126
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e9d2b48'
+down_revision = '4d8e1b9a6f05'
+branch_labels = None
+depends_on = None
+
+
+def _number(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def upgrade() -> None:
+    project_services = op.create_table('project_services',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('camera', sa.String(length=100), nullable=False),
+    sa.Column('qty', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_project_services_camera_project_id', 'project_services', ['camera', 'project_id'], unique=False)
+    op.create_index(op.f('ix_project_services_id'), 'project_services', ['id'], unique=False)
+    op.create_index(op.f('ix_project_services_project_id'), 'project_services', ['project_id'], unique=False)
+
+    # 从 projects.services 回填服务明细（兼容直接保存字符串的旧数据）
+    connection = op.get_bind()
+    rows = []
+    for project_id, services in connection.execute(sa.text("SELECT id, services FROM projects WHERE services IS NOT NULL")):
+        if isinstance(services, str):
+            try:
+                services = json.loads(services)
+            except ValueError:
+                continue
+        if not isinstance(services, list):
+            continue
+        for position, service in enumerate(services):
+            if isinstance(service, dict):
+                camera = service.get("camera")
+                qty = int(_number(service.get("qty"), 1))
+                unit_price = _number(service.get("unit_price"))
+                price = _number(service.get("price"), unit_price * qty)
+            else:
+                camera, qty, unit_price, price = service, 1, 0.0, 0.0
+            if isinstance(camera, str) and camera:
+                rows.append({
+                    "project_id": project_id,
+                    "position": position,
+                    "camera": camera[:100],
+                    "qty": qty,
+                    "unit_price": unit_price,
+                    "price": price,
+                })
+    if rows:
+        op.bulk_insert(project_services, rows)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_project_services_project_id'), table_name='project_services')
+    op.drop_index(op.f('ix_project_services_id'), table_name='project_services')
+    op.drop_index('ix_project_services_camera_project_id', table_name='project_services')
+    op.drop_table('project_services')
@@ -0,0 +1,28 @@
+"""Add project list indexes
+
+Revision ID: 8b41e6c09d2a
+Revises: e3b7c1f9a684
+Create Date: 2026-10-19 10:02:17.584931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41e6c09d2a'
+down_revision = 'e3b7c1f9a684'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_projects_client_id_created_at', 'projects', ['client_id', 'created_at'], unique=False)
+    op.create_index('ix_projects_status_created_at', 'projects', ['status', 'created_at'], unique=False)
+    op.create_index('ix_projects_created_at', 'projects', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_created_at', table_name='projects')
+    op.drop_index('ix_projects_status_created_at', table_name='projects')
+    op.drop_index('ix_projects_client_id_created_at', table_name='projects')
@@ -0,0 +1,125 @@
+"""Add search documents
+
+Revision ID: 9c2f4b7e1d63
+Revises: 7a3c5e9d2b48
+Create Date: 2026-10-19 18:05:12.417386
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2f4b7e1d63'
+down_revision = '7a3c5e9d2b48'
+branch_labels = None
+depends_on = None
+
+# 建立该修订时的全文索引 DDL（与模型中的定义解耦，之后修改模型不影响本迁移）
+SQLITE_SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "title, content, content='search_documents', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_index(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_index(search_index, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_index(search_index, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO search_index(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+
+POSTGRESQL_SEARCH_INDEX_DDL = [
+    "ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, ''))) STORED",
+    "CREATE INDEX ix_search_documents_search_vector ON search_documents USING gin (search_vector)",
+]
+
+
+def _join_text(*parts):
+    return " ".join(str(part) for part in parts if part not in (None, ""))
+
+
+def _json_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def upgrade() -> None:
+    search_documents = op.create_table('search_documents',
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_key', sa.String(length=64), nullable=False),
+    sa.Column('title', sa.String(length=300), nullable=False),
+    sa.Column('subtitle', sa.String(length=300), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity_type', 'entity_key', name='uq_search_documents_entity')
+    )
+    op.create_index(op.f('ix_search_documents_entity_type'), 'search_documents', ['entity_type'], unique=False)
+    op.create_index(op.f('ix_search_documents_id'), 'search_documents', ['id'], unique=False)
+
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_INDEX_DDL:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRESQL_SEARCH_INDEX_DDL:
+            op.execute(statement)
+
+    # 回填现有项目、客户和团队成员（内存中的文件记录在上传时写入）
+    rows = []
+    projects = connection.execute(sa.text(
+        "SELECT p.id, p.name, p.protocol_number, p.project_type, p.description, "
+        "c.company_name, c.company_name_cn "
+        "FROM projects p LEFT JOIN clients c ON c.id = p.client_id"
+    ))
+    for project_id, name, protocol_number, project_type, description, company_name, company_name_cn in projects:
+        rows.append({
+            "entity_type": "project",
+            "entity_key": str(project_id),
+            "title": name[:300],
+            "subtitle": _join_text(protocol_number, company_name)[:300],
+            "content": _join_text(name, protocol_number, project_type, description, company_name, company_name_cn),
+        })
+    clients = connection.execute(sa.text(
+        "SELECT id, company_name, company_name_cn, contact_person, contact_person_cn, email FROM clients"
+    ))
+    for client_id, company_name, company_name_cn, contact_person, contact_person_cn, email in clients:
+        rows.append({
+            "entity_type": "client",
+            "entity_key": str(client_id),
+            "title": company_name[:300],
+            "subtitle": _join_text(company_name_cn, contact_person)[:300],
+            "content": _join_text(company_name, company_name_cn, contact_person, contact_person_cn, email),
+        })
+    members = connection.execute(sa.text("SELECT id, name, department, skills FROM team_members"))
+    for member_id, name, department, skills in members:
+        department = department.lower() if department else None
+        skills = _json_list(skills)
+        rows.append({
+            "entity_type": "member",
+            "entity_key": str(member_id),
+            "title": name[:300],
+            "subtitle": _join_text(department, *skills)[:300],
+            "content": _join_text(name, department, *skills),
+        })
+    if rows:
+        op.bulk_insert(search_documents, rows)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_index")
+    op.drop_index(op.f('ix_search_documents_id'), table_name='search_documents')
+    op.drop_index(op.f('ix_search_documents_entity_type'), table_name='search_documents')
+    op.drop_table('search_documents')
@@ -0,0 +1,61 @@
+"""Add resumable upload sessions
+
+Revision ID: a9d3e7b1c402
+Revises: f4c8a2e6b193
+Create Date: 2026-10-19 22:35:52.107463
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e7b1c402'
+down_revision = 'f4c8a2e6b193'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_sessions',
+    sa.Column('upload_id', sa.String(length=36), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('file_size', sa.BigInteger(), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=True),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('uploaded_by', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('UPLOADING', 'COMPLETED', name='uploadstatus'), nullable=False),
+    sa.Column('file_id', sa.String(length=36), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_sessions_id'), 'upload_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_upload_sessions_upload_id'), 'upload_sessions', ['upload_id'], unique=True)
+    op.create_table('upload_parts',
+    sa.Column('session_id', sa.Integer(), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['upload_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id', 'part_number', name='uq_upload_parts_session_part')
+    )
+    op.create_index(op.f('ix_upload_parts_id'), 'upload_parts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_parts_id'), table_name='upload_parts')
+    op.drop_table('upload_parts')
+    op.drop_index(op.f('ix_upload_sessions_upload_id'), table_name='upload_sessions')
+    op.drop_index(op.f('ix_upload_sessions_id'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
+    sa.Enum(name='uploadstatus').drop(op.get_bind(), checkfirst=True)
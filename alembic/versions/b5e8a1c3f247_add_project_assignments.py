@@ -0,0 +1,91 @@
+"""Add project assignments
+
+Revision ID: b5e8a1c3f247
+Revises: 9c2f4b7e1d63
+Create Date: 2026-10-19 19:12:38.552914
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8a1c3f247'
+down_revision = '9c2f4b7e1d63'
+branch_labels = None
+depends_on = None
+
+
+def _json_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def upgrade() -> None:
+    project_assignments = op.create_table('project_assignments',
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=True),
+    sa.Column('allocation', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['member_id'], ['team_members.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('member_id', 'project_id', name='uq_project_assignments_member_project')
+    )
+    op.create_index('ix_project_assignments_project_id_member_id', 'project_assignments', ['project_id', 'member_id'], unique=False)
+    op.create_index(op.f('ix_project_assignments_id'), 'project_assignments', ['id'], unique=False)
+
+    # 从 team_members.current_projects 回填分配
+    # 旧数据中的项目可能是 {"id", "name"}、项目ID或协议编号，跳过已删除的项目
+    connection = op.get_bind()
+    protocol_ids = dict(connection.execute(sa.text("SELECT protocol_number, id FROM projects")).all())
+    project_ids = set(protocol_ids.values())
+    rows = []
+    for member_id, current_projects in connection.execute(
+        sa.text("SELECT id, current_projects FROM team_members WHERE current_projects IS NOT NULL")
+    ):
+        assigned = set()
+        for item in _json_list(current_projects):
+            project_id = item.get("id") if isinstance(item, dict) else item
+            if isinstance(project_id, str):
+                project_id = protocol_ids.get(project_id)
+            if isinstance(project_id, int) and project_id in project_ids and project_id not in assigned:
+                assigned.add(project_id)
+                rows.append({"member_id": member_id, "project_id": project_id, "allocation": 100})
+    if rows:
+        op.bulk_insert(project_assignments, rows)
+
+    with op.batch_alter_table('team_members') as batch_op:
+        batch_op.drop_column('current_projects')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('team_members') as batch_op:
+        batch_op.add_column(sa.Column('current_projects', sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    current_projects = {}
+    for member_id, project_id, name in connection.execute(sa.text(
+        "SELECT a.member_id, p.id, p.name FROM project_assignments a "
+        "JOIN projects p ON p.id = a.project_id ORDER BY a.member_id, p.id"
+    )):
+        current_projects.setdefault(member_id, []).append({"id": project_id, "name": name})
+    for member_id, projects in current_projects.items():
+        connection.execute(
+            sa.text("UPDATE team_members SET current_projects = :projects WHERE id = :id"),
+            {"projects": json.dumps(projects, ensure_ascii=False), "id": member_id}
+        )
+
+    op.drop_index(op.f('ix_project_assignments_id'), table_name='project_assignments')
+    op.drop_index('ix_project_assignments_project_id_member_id', table_name='project_assignments')
+    op.drop_table('project_assignments')
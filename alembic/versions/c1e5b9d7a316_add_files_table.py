@@ -0,0 +1,54 @@
+"""Add files table
+
+Revision ID: c1e5b9d7a316
+Revises: a9d3e7b1c402
+Create Date: 2026-10-19 23:06:29.841157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1e5b9d7a316'
+down_revision = 'a9d3e7b1c402'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('files',
+    sa.Column('file_id', sa.String(length=36), nullable=False),
+    sa.Column('original_filename', sa.String(length=255), nullable=False),
+    sa.Column('stored_filename', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('file_type', sa.String(length=20), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=False),
+    sa.Column('file_size', sa.BigInteger(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=True),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('uploaded_by', sa.Integer(), nullable=False),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_files_uploaded_at_id', 'files', ['uploaded_at', 'id'], unique=False)
+    op.create_index(op.f('ix_files_file_id'), 'files', ['file_id'], unique=True)
+    op.create_index(op.f('ix_files_file_type'), 'files', ['file_type'], unique=False)
+    op.create_index(op.f('ix_files_id'), 'files', ['id'], unique=False)
+    op.create_index(op.f('ix_files_project_id'), 'files', ['project_id'], unique=False)
+    op.create_index(op.f('ix_files_uploaded_by'), 'files', ['uploaded_by'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_files_uploaded_by'), table_name='files')
+    op.drop_index(op.f('ix_files_project_id'), table_name='files')
+    op.drop_index(op.f('ix_files_id'), table_name='files')
+    op.drop_index(op.f('ix_files_file_type'), table_name='files')
+    op.drop_index(op.f('ix_files_file_id'), table_name='files')
+    op.drop_index('ix_files_uploaded_at_id', table_name='files')
+    op.drop_table('files')
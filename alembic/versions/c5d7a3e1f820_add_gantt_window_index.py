@@ -0,0 +1,24 @@
+"""Add gantt window index
+
+Revision ID: c5d7a3e1f820
+Revises: 8b41e6c09d2a
+Create Date: 2026-10-19 10:48:05.201377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7a3e1f820'
+down_revision = '8b41e6c09d2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_projects_deadline_created_at', 'projects', ['deadline', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_deadline_created_at', table_name='projects')
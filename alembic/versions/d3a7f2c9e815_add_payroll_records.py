@@ -0,0 +1,53 @@
+"""Add payroll records
+
+Revision ID: d3a7f2c9e815
+Revises: b5e8a1c3f247
+Create Date: 2026-10-19 20:04:51.230718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7f2c9e815'
+down_revision = 'b5e8a1c3f247'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('payroll_records',
+    sa.Column('member_id', sa.Integer(), nullable=True),
+    sa.Column('member_name', sa.String(length=100), nullable=False),
+    # department / pricetype 类型已由 team_members 创建
+    sa.Column('department', postgresql.ENUM('MODELING', 'RENDERING', 'DESIGN', 'SALES', 'MANAGEMENT', name='department', create_type=False), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('price_type', postgresql.ENUM('FIXED', 'HOURLY', 'PROJECT', name='pricetype', create_type=False), nullable=False),
+    sa.Column('project_count', sa.Integer(), nullable=False),
+    sa.Column('work_hours', sa.Float(), nullable=False),
+    sa.Column('input_hash', sa.String(length=64), nullable=False),
+    sa.Column('base_salary', sa.Float(), nullable=False),
+    sa.Column('project_bonus', sa.Float(), nullable=False),
+    sa.Column('piece_amount', sa.Float(), nullable=False),
+    sa.Column('total_salary', sa.Float(), nullable=False),
+    sa.Column('payment_status', sa.Enum('PENDING', 'PAID', 'CANCELLED', name='payrollstatus'), nullable=False),
+    sa.Column('calculated_at', sa.DateTime(), nullable=False),
+    sa.Column('paid_at', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.String(length=500), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['member_id'], ['team_members.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('member_id', 'year', 'month', name='uq_payroll_records_member_period')
+    )
+    op.create_index(op.f('ix_payroll_records_id'), 'payroll_records', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payroll_records_id'), table_name='payroll_records')
+    op.drop_table('payroll_records')
+    sa.Enum(name='payrollstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,48 @@
+"""Add content-addressed file blobs
+
+Revision ID: d8f2a6c4e957
+Revises: c1e5b9d7a316
+Create Date: 2026-10-19 23:41:15.592830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2a6c4e957'
+down_revision = 'c1e5b9d7a316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('file_blobs',
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('file_size', sa.BigInteger(), nullable=False),
+    sa.Column('storage_path', sa.String(length=500), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_file_blobs_checksum'), 'file_blobs', ['checksum'], unique=True)
+    op.create_index(op.f('ix_file_blobs_id'), 'file_blobs', ['id'], unique=False)
+
+    # 已有文件保持单独保存（blob_id 为空），新上传的文件按内容去重
+    with op.batch_alter_table('files') as batch_op:
+        batch_op.add_column(sa.Column('blob_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_files_blob_id_file_blobs', 'file_blobs', ['blob_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_files_blob_id'), ['blob_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('files') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_files_blob_id'))
+        batch_op.drop_constraint('fk_files_blob_id_file_blobs', type_='foreignkey')
+        batch_op.drop_column('blob_id')
+
+    op.drop_index(op.f('ix_file_blobs_id'), table_name='file_blobs')
+    op.drop_index(op.f('ix_file_blobs_checksum'), table_name='file_blobs')
+    op.drop_table('file_blobs')
@@ -0,0 +1,35 @@
+"""Add protocol sequences
+
+Revision ID: e2a94f6b7c31
+Revises: c5d7a3e1f820
+Create Date: 2026-10-19 15:06:21.540917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a94f6b7c31'
+down_revision = 'c5d7a3e1f820'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('protocol_sequences',
+    sa.Column('prefix', sa.String(length=20), nullable=False),
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('prefix', 'period', name='uq_protocol_sequences_prefix_period')
+    )
+    op.create_index(op.f('ix_protocol_sequences_id'), 'protocol_sequences', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_protocol_sequences_id'), table_name='protocol_sequences')
+    op.drop_table('protocol_sequences')
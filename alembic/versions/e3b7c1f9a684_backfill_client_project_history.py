@@ -0,0 +1,55 @@
+"""Backfill client project history
+
+Revision ID: e3b7c1f9a684
+Revises: 3f9c2a7d5b14
+Create Date: 2026-10-19 09:37:12.418736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7c1f9a684'
+down_revision = '3f9c2a7d5b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 项目历史改为增量维护后，已有客户需要先按项目表计算一次初始值
+    # （与 app.services.client_history.recompute_project_history 相同的聚合）
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT c.id, COUNT(p.id), "
+        "COALESCE(SUM(CASE WHEN p.status = 'COMPLETED' THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN p.status IN ('REPORTING', 'MODELING', 'RENDERING', 'DELIVERING') "
+        "THEN 1 ELSE 0 END), 0), "
+        "COALESCE(SUM(p.budget_cny), 0) "
+        "FROM clients c LEFT JOIN projects p ON p.client_id = c.id "
+        "GROUP BY c.id"
+    )).all()
+
+    clients = sa.table('clients', sa.column('id', sa.Integer), sa.column('project_history', sa.JSON))
+    stmt = clients.update().where(clients.c.id == sa.bindparam('client_id')).values(
+        project_history=sa.bindparam('history', type_=sa.JSON)
+    )
+    params = [
+        {
+            "client_id": client_id,
+            "history": {
+                "total": total,
+                "completed": int(completed),
+                "ongoing": int(ongoing),
+                "value": float(value),
+            },
+        }
+        for client_id, total, completed, ongoing, value in rows
+    ]
+    if params:
+        connection.execute(stmt, params)
+
+
+def downgrade() -> None:
+    # 计数由项目表推导，降级时保留
+    pass
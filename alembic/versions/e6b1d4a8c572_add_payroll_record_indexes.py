@@ -0,0 +1,28 @@
+"""Add payroll record indexes
+
+Revision ID: e6b1d4a8c572
+Revises: d3a7f2c9e815
+Create Date: 2026-10-19 20:41:17.804263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b1d4a8c572'
+down_revision = 'd3a7f2c9e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_payroll_records_member_period_status', 'payroll_records', ['member_id', 'year', 'month', 'payment_status'], unique=False)
+    op.create_index('ix_payroll_records_period_status', 'payroll_records', ['year', 'month', 'payment_status'], unique=False)
+    op.create_index('ix_payroll_records_calculated_at_id', 'payroll_records', ['calculated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payroll_records_calculated_at_id', table_name='payroll_records')
+    op.drop_index('ix_payroll_records_period_status', table_name='payroll_records')
+    op.drop_index('ix_payroll_records_member_period_status', table_name='payroll_records')
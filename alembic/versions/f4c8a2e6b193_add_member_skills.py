@@ -0,0 +1,66 @@
+"""Add member skills index
+
+Revision ID: f4c8a2e6b193
+Revises: e6b1d4a8c572
+Create Date: 2026-10-19 21:48:07.316284
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a2e6b193'
+down_revision = 'e6b1d4a8c572'
+branch_labels = None
+depends_on = None
+
+
+def _json_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def _normalize_skill(skill):
+    if not isinstance(skill, str):
+        return None
+    return " ".join(skill.split()).lower()[:100] or None
+
+
+def upgrade() -> None:
+    member_skills = op.create_table('member_skills',
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('skill', sa.String(length=100), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['member_id'], ['team_members.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('member_id', 'skill', name='uq_member_skills_member_skill')
+    )
+    op.create_index('ix_member_skills_skill_member_id', 'member_skills', ['skill', 'member_id'], unique=False)
+    op.create_index(op.f('ix_member_skills_id'), 'member_skills', ['id'], unique=False)
+
+    # 从 team_members.skills 回填技能索引
+    connection = op.get_bind()
+    rows = []
+    for member_id, skills in connection.execute(
+        sa.text("SELECT id, skills FROM team_members WHERE skills IS NOT NULL")
+    ):
+        normalized = dict.fromkeys(
+            skill for skill in map(_normalize_skill, _json_list(skills)) if skill
+        )
+        rows.extend({"member_id": member_id, "skill": skill} for skill in normalized)
+    if rows:
+        op.bulk_insert(member_skills, rows)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_member_skills_id'), table_name='member_skills')
+    op.drop_index('ix_member_skills_skill_member_id', table_name='member_skills')
+    op.drop_table('member_skills')
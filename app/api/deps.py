@@ -8,6 +8,8 @@ from app.models.user import User
 from typing import Optional
 
 security = HTTPBearer()
+# 可选认证：请求头缺少令牌时不直接拒绝，由接口自行从其他位置取令牌
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
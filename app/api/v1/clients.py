@@ -1,22 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, or_, func
+from sqlalchemy import select, update, delete, and_, or_, func, case, true
 from typing import List, Optional
 from datetime import datetime
 import pandas as pd
+import asyncio
 import io
 from pathlib import Path
 
 from app.core.database import get_db
+from app.core.cache import VersionedCache, get_data_version, bump_data_version
+from app.core.sql import month_bucket, json_array_elements
 from app.models.user import User
-from app.models.client import Client
+from app.models.client import Client, ClientStatus
 from app.models.project import Project
 from app.schemas.client import (
-    ClientCreate, ClientUpdate, ClientResponse, ClientListQuery
+    ClientCreate, ClientUpdate, ClientResponse, ClientListQuery,
+    ClientBulkSelection, ClientBulkUpdate, ClientBulkTagUpdate,
+    ClientBulkItemResult, ClientBulkResponse, BULK_MAX_CLIENTS,
+    ClientDetailResponse, ClientProjectItem, ProjectHistory
 )
 from app.schemas.common import ResponseModel, PaginatedResponse
 from app.api.deps import get_current_active_user
+from app.services.search import (
+    CLIENT, CLIENT_SEARCH_FIELDS, client_document, reindex_clients, reindex_projects,
+    remove_search_documents, upsert_search_documents
+)
+from app.services.dedup import DuplicateIndex, find_duplicate_clusters, DEFAULT_THRESHOLD
+from app.services.client_history import (
+    empty_project_history, recompute_project_history, history_aggregates
+)
 
 router = APIRouter()
 
@@ -24,6 +38,126 @@ router = APIRouter()
 EXPORTS_DIR = Path("exports/clients")
 EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# 客户详情可包含的附加内容
+CLIENT_DETAIL_INCLUDES = {"projects", "aggregates"}
+
+# 客户统计缓存（按 clients 数据版本失效）
+_statistics_cache = VersionedCache(maxsize=8)
+
+# 疑似重复客户扫描结果缓存（按 clients 数据版本失效）
+_duplicates_cache = VersionedCache(maxsize=8)
+
+
+async def load_dedup_records(db: AsyncSession) -> List[dict]:
+    """加载全部客户的查重字段（仅投影所需列）"""
+    query = select(
+        Client.id, Client.company_name, Client.company_name_cn, Client.email, Client.phone
+    ).order_by(Client.id)
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+async def build_duplicate_index(db: AsyncSession):
+    """构建现有客户的邮箱集合与查重索引"""
+    records = await load_dedup_records(db)
+    index = DuplicateIndex()
+    for record in records:
+        index.add(record)
+    emails = {str(record["email"]).strip().lower() for record in records if record["email"]}
+    return emails, index
+
+
+def build_client_conditions(
+    region: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None
+) -> list:
+    """构建客户列表筛选条件（列表查询与批量操作共用）"""
+    conditions = []
+    
+    if region:
+        conditions.append(Client.region == region)
+    
+    if status:
+        conditions.append(Client.status == status)
+    
+    if search:
+        search_term = f"%{search}%"
+        conditions.append(
+            or_(
+                Client.company_name.ilike(search_term),
+                Client.company_name_cn.ilike(search_term),
+                Client.contact_person.ilike(search_term),
+                Client.contact_person_cn.ilike(search_term),
+                Client.email.ilike(search_term)
+            )
+        )
+    
+    return conditions
+
+
+async def build_bulk_condition(db: AsyncSession, selection: ClientBulkSelection):
+    """将批量操作的目标（ID列表、筛选条件或全部客户）转换为WHERE条件
+    
+    按筛选条件或全部客户选中时先统计命中的客户数，超过单次上限时拒绝执行。
+    """
+    if selection.ids is not None:
+        return Client.id.in_(selection.ids)
+    
+    if selection.all:
+        condition = true()
+    else:
+        condition = and_(*build_client_conditions(
+            selection.filter.region, selection.filter.status, selection.filter.search
+        ))
+    matched = (await db.execute(select(func.count(Client.id)).where(condition))).scalar()
+    if matched > BULK_MAX_CLIENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"选中 {matched} 个客户，超过单次批量操作上限 {BULK_MAX_CLIENTS} 个，请缩小筛选范围"
+        )
+    return condition
+
+
+def build_bulk_response(requested_ids: Optional[List[int]], succeeded: dict, failed: dict) -> ClientBulkResponse:
+    """汇总批量操作的逐条结果
+
+    succeeded / failed 为 {客户ID: 说明}；按ID指定但未找到的客户记为失败。
+    """
+    results = [ClientBulkItemResult(id=cid, success=True, message=msg) for cid, msg in succeeded.items()]
+    results.extend(ClientBulkItemResult(id=cid, success=False, message=msg) for cid, msg in failed.items())
+    
+    if requested_ids is not None:
+        handled = set(succeeded) | set(failed)
+        results.extend(
+            ClientBulkItemResult(id=cid, success=False, message="客户不存在")
+            for cid in dict.fromkeys(requested_ids) if cid not in handled
+        )
+    
+    results.sort(key=lambda item: item.id)
+    success_count = len(succeeded)
+    return ClientBulkResponse(
+        total=len(results),
+        success_count=success_count,
+        error_count=len(results) - success_count,
+        results=results
+    )
+
+
+async def get_json_facet(db: AsyncSession, column, key: str) -> List[dict]:
+    """统计JSON列表列中每个取值出现的客户数"""
+    elements, is_array = json_array_elements(db, column)
+    query = (
+        select(elements.c.value, func.count(func.distinct(Client.id)).label("count"))
+        .select_from(Client)
+        .join(elements, true())
+        .where(is_array)
+        .group_by(elements.c.value)
+        .order_by(func.count(func.distinct(Client.id)).desc(), elements.c.value)
+    )
+    result = await db.execute(query)
+    return [{key: row[0], "count": row[1]} for row in result.fetchall() if row[0]]
+
 
 # 具体路径的路由必须放在动态路径之前
 @router.get("/statistics", response_model=ResponseModel[dict])
@@ -34,29 +168,36 @@ async def get_client_statistics(
     """获取客户统计数据"""
     
     try:
-        # 总客户数
-        total_clients_query = select(func.count(Client.id))
-        total_result = await db.execute(total_clients_query)
-        total_clients = total_result.scalar() or 0
+        # 数据版本未变化时直接返回缓存结果
+        version = await get_data_version(db, "clients")
+        cached = _statistics_cache.get("statistics", version)
+        if cached is not None:
+            return ResponseModel[dict](data=cached)
         
-        # 活跃客户数
-        active_clients_query = select(func.count(Client.id)).where(Client.status == "active")
-        active_result = await db.execute(active_clients_query)
-        active_clients = active_result.scalar() or 0
+        # 总客户数与活跃客户数
+        totals_query = select(
+            func.count(Client.id),
+            func.coalesce(func.sum(case((Client.status == ClientStatus.ACTIVE, 1), else_=0)), 0)
+        )
+        totals_result = await db.execute(totals_query)
+        total_clients, active_clients = totals_result.one()
         
         # 按地区统计
         region_query = select(Client.region, func.count(Client.id)).group_by(Client.region)
         region_result = await db.execute(region_query)
         region_stats = [{"region": row[0] or "未知", "count": row[1]} for row in region_result.fetchall()]
         
-        # 按业务类型统计 (简化处理)
-        business_type_stats = []
+        # 按JSON列表列统计（业务类型、标签、语言）
+        business_type_stats = await get_json_facet(db, Client.business_type, "business_type")
+        tag_stats = await get_json_facet(db, Client.tags, "tag")
+        language_stats = await get_json_facet(db, Client.language, "language")
         
-        # 月度新增客户趋势 - 使用SQLite兼容的方式
+        # 月度新增客户趋势
+        month = month_bucket(Client.created_at).label('month')
         monthly_query = select(
-            func.strftime('%Y-%m', Client.created_at).label('month'),
+            month,
             func.count(Client.id).label('count')
-        ).group_by(func.strftime('%Y-%m', Client.created_at)).order_by('month')
+        ).group_by(month).order_by(month)
         
         monthly_result = await db.execute(monthly_query)
         monthly_stats = []
@@ -67,16 +208,18 @@ async def get_client_statistics(
                     "count": row[1]
                 })
         
-        return ResponseModel[dict](
-            data={
-                "total_clients": total_clients,
-                "active_clients": active_clients,
-                "inactive_clients": total_clients - active_clients,
-                "region_distribution": region_stats,
-                "business_type_distribution": business_type_stats,
-                "monthly_growth": monthly_stats
-            }
-        )
+        statistics = _statistics_cache.set("statistics", version, {
+            "total_clients": total_clients,
+            "active_clients": active_clients,
+            "inactive_clients": total_clients - active_clients,
+            "region_distribution": region_stats,
+            "business_type_distribution": business_type_stats,
+            "tag_distribution": tag_stats,
+            "language_distribution": language_stats,
+            "monthly_growth": monthly_stats
+        })
+        
+        return ResponseModel[dict](data=statistics)
         
     except Exception as e:
         raise HTTPException(
@@ -200,6 +343,8 @@ async def download_client_template(
 @router.post("/import", response_model=ResponseModel[dict])
 async def import_clients(
     file: UploadFile = File(...),
+    on_duplicate: str = Query("warn", regex="^(warn|skip)$", description="疑似重复客户的处理方式: warn 仅提示, skip 跳过"),
+    threshold: float = Query(DEFAULT_THRESHOLD, ge=0.5, le=1.0, description="疑似重复的相似度阈值"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -234,6 +379,11 @@ async def import_clients(
         success_count = 0
         error_count = 0
         errors = []
+        duplicates = []
+        imported_clients = []
+        
+        # 一次查询加载现有客户的查重字段，建立邮箱集合与分块查重索引
+        existing_emails, duplicate_index = await build_duplicate_index(db)
         
         # 逐行处理数据
         for index, row in df.iterrows():
@@ -245,16 +395,44 @@ async def import_clients(
                     error_count += 1
                     continue
                 
-                # 检查邮箱是否已存在
-                existing_query = select(Client).where(Client.email == row['email'])
-                existing_result = await db.execute(existing_query)
-                existing_client = existing_result.scalar_one_or_none()
-                
-                if existing_client:
+                # 检查邮箱是否已存在（含本次导入中已处理的行）
+                email_key = str(row['email']).strip().lower()
+                if email_key in existing_emails:
                     errors.append(f"第{index+2}行: 邮箱 {row['email']} 已存在")
                     error_count += 1
                     continue
                 
+                # 检查疑似重复客户（名称/邮箱域名/电话相近）
+                record = {
+                    "id": None,
+                    "row": index + 2,
+                    "company_name": row['company_name'],
+                    "company_name_cn": row.get('company_name_cn'),
+                    "email": row['email'],
+                    "phone": row['phone'],
+                }
+                matches = duplicate_index.match(record, threshold)
+                if matches:
+                    duplicates.append({
+                        "row": index + 2,
+                        "company_name": row['company_name'],
+                        "skipped": on_duplicate == "skip",
+                        "matches": [
+                            {
+                                "client_id": match["record"]["id"],
+                                "row": match["record"].get("row"),
+                                "company_name": match["record"]["company_name"],
+                                "score": match["score"],
+                                "reasons": match["reasons"]
+                            }
+                            for match in matches[:5]
+                        ]
+                    })
+                    if on_duplicate == "skip":
+                        errors.append(f"第{index+2}行: 疑似与已有客户 {matches[0]['record']['company_name']} 重复")
+                        error_count += 1
+                        continue
+                
                 # 创建客户
                 client_data = {
                     'company_name': row['company_name'],
@@ -273,19 +451,27 @@ async def import_clients(
                     'business_type': row.get('business_type', 'Real Estate').split(',') if row.get('business_type') else ['Real Estate'],
                     'tags': row.get('tags', '').split(',') if row.get('tags') else [],
                     'notes': row.get('notes', ''),
-                    'status': row.get('status', 'active')
+                    'status': row.get('status', 'active'),
+                    'project_history': empty_project_history()
                 }
                 
                 client = Client(**client_data)
                 db.add(client)
+                imported_clients.append(client)
                 success_count += 1
                 
+                existing_emails.add(email_key)
+                duplicate_index.add(record)
+                
             except Exception as e:
                 errors.append(f"第{index+2}行: {str(e)}")
                 error_count += 1
         
         # 提交所有成功的导入
         if success_count > 0:
+            await db.flush()
+            await upsert_search_documents(db, [client_document(client) for client in imported_clients])
+            await bump_data_version(db, "clients")
             await db.commit()
         
         return ResponseModel[dict](
@@ -293,7 +479,9 @@ async def import_clients(
                 "success_count": success_count,
                 "error_count": error_count,
                 "total_count": len(df),
-                "errors": errors[:10]  # 只返回前10个错误
+                "errors": errors[:10],  # 只返回前10个错误
+                "duplicate_count": len(duplicates),
+                "duplicates": duplicates[:50]
             },
             message=f"导入完成: 成功 {success_count} 条，失败 {error_count} 条"
         )
@@ -310,6 +498,33 @@ async def import_clients(
         )
 
 
+@router.get("/duplicates", response_model=ResponseModel[dict])
+async def find_duplicate_clients(
+    threshold: float = Query(DEFAULT_THRESHOLD, ge=0.5, le=1.0, description="相似度阈值"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """扫描全部客户，返回疑似重复的客户簇"""
+    
+    version = await get_data_version(db, "clients")
+    cached = _duplicates_cache.get(threshold, version)
+    if cached is None:
+        records = await load_dedup_records(db)
+        # 相似度计算为CPU密集型，放到线程中执行，避免阻塞事件循环
+        clusters = await asyncio.to_thread(find_duplicate_clusters, records, threshold)
+        cached = _duplicates_cache.set(threshold, version, {
+            "scanned_clients": len(records),
+            "threshold": threshold,
+            "total_clusters": len(clusters),
+            "clusters": clusters
+        })
+    
+    return ResponseModel[dict](
+        data=cached,
+        message=f"发现 {cached['total_clusters']} 组疑似重复客户"
+    )
+
+
 @router.get("/export")
 async def export_clients(
     format: str = Query("excel", regex="^(excel|csv)$"),
@@ -393,6 +608,146 @@ async def export_clients(
     )
 
 
+@router.post("/project-history/recompute", response_model=ResponseModel[dict])
+async def recompute_all_project_history(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量修正全部客户的项目历史"""
+    
+    updated = await recompute_project_history(db)
+    await db.commit()
+    
+    return ResponseModel[dict](
+        data={"updated_clients": updated},
+        message=f"已重新计算 {updated} 个客户的项目历史"
+    )
+
+
+@router.post("/bulk/update", response_model=ResponseModel[ClientBulkResponse])
+async def bulk_update_clients(
+    bulk_data: ClientBulkUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量更新客户（状态、地区、标签等）"""
+    
+    update_data = bulk_data.model_dump(exclude_unset=True, exclude={"ids", "filter", "all"})
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="没有需要更新的字段"
+        )
+    
+    # 单条UPDATE完成全部更新，RETURNING 得到实际更新的客户
+    stmt = (
+        update(Client)
+        .where(await build_bulk_condition(db, bulk_data))
+        .values(**update_data)
+        .returning(Client.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    updated_ids = [row[0] for row in result.fetchall()]
+    
+    if updated_ids:
+        await bump_data_version(db, "clients")
+    await db.commit()
+    
+    return ResponseModel[ClientBulkResponse](
+        data=build_bulk_response(bulk_data.ids, {cid: "更新成功" for cid in updated_ids}, {}),
+        message=f"批量更新完成: 成功 {len(updated_ids)} 个客户"
+    )
+
+
+@router.post("/bulk/tags", response_model=ResponseModel[ClientBulkResponse])
+async def bulk_update_client_tags(
+    bulk_data: ClientBulkTagUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量添加/移除客户标签"""
+    
+    if not bulk_data.add and not bulk_data.remove:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请指定需要添加或移除的标签"
+        )
+    
+    # 一次查询取出目标客户的标签
+    query = select(Client.id, Client.tags).where(await build_bulk_condition(db, bulk_data))
+    result = await db.execute(query)
+    
+    remove = set(bulk_data.remove)
+    succeeded = {}
+    changes = []
+    for client_id, tags in result.fetchall():
+        current = list(tags or [])
+        new_tags = [tag for tag in current if tag not in remove]
+        new_tags.extend(tag for tag in dict.fromkeys(bulk_data.add) if tag not in new_tags)
+        
+        if new_tags != current:
+            changes.append({"id": client_id, "tags": new_tags})
+            succeeded[client_id] = "标签已更新"
+        else:
+            succeeded[client_id] = "标签无变化"
+    
+    # 按主键批量写回（executemany）
+    if changes:
+        await db.execute(update(Client), changes)
+        await bump_data_version(db, "clients")
+    await db.commit()
+    
+    return ResponseModel[ClientBulkResponse](
+        data=build_bulk_response(bulk_data.ids, succeeded, {}),
+        message=f"批量标签更新完成: 变更 {len(changes)} 个客户"
+    )
+
+
+@router.post("/bulk/delete", response_model=ResponseModel[ClientBulkResponse])
+async def bulk_delete_clients(
+    bulk_data: ClientBulkSelection,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量删除客户（有关联项目的客户会被跳过）"""
+    
+    condition = await build_bulk_condition(db, bulk_data)
+    
+    # 单条DELETE删除没有关联项目的客户，"无项目"条件与删除在同一语句内判断
+    has_projects = select(Project.id).where(Project.client_id == Client.id).exists()
+    stmt = (
+        delete(Client)
+        .where(condition, ~has_projects)
+        .returning(Client.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    deleted_ids = [row[0] for row in result.fetchall()]
+    
+    # 未删除的目标客户即有关联项目的客户，一次分组统计得到项目数
+    blocked_query = (
+        select(Project.client_id, func.count(Project.id))
+        .where(Project.client_id.in_(select(Client.id).where(condition)))
+        .group_by(Project.client_id)
+    )
+    blocked_result = await db.execute(blocked_query)
+    failed = {
+        client_id: f"无法删除客户，该客户有 {count} 个关联项目"
+        for client_id, count in blocked_result.fetchall()
+    }
+    
+    if deleted_ids:
+        await remove_search_documents(db, CLIENT, deleted_ids)
+        await bump_data_version(db, "clients")
+    await db.commit()
+    
+    return ResponseModel[ClientBulkResponse](
+        data=build_bulk_response(bulk_data.ids, {cid: "删除成功" for cid in deleted_ids}, failed),
+        message=f"批量删除完成: 成功 {len(deleted_ids)} 个，跳过 {len(failed)} 个"
+    )
+
+
 # 现在放置动态路径的路由
 @router.get("/", response_model=ResponseModel[PaginatedResponse[ClientResponse]])
 async def get_clients(
@@ -409,25 +764,7 @@ async def get_clients(
     try:
         # 构建查询条件
         query = select(Client)
-        conditions = []
-        
-        if region:
-            conditions.append(Client.region == region)
-        
-        if status:
-            conditions.append(Client.status == status)
-        
-        if search:
-            search_term = f"%{search}%"
-            conditions.append(
-                or_(
-                    Client.company_name.ilike(search_term),
-                    Client.company_name_cn.ilike(search_term),
-                    Client.contact_person.ilike(search_term),
-                    Client.contact_person_cn.ilike(search_term),
-                    Client.email.ilike(search_term)
-                )
-            )
+        conditions = build_client_conditions(region, status, search)
         
         if conditions:
             query = query.where(and_(*conditions))
@@ -510,17 +847,15 @@ async def create_client(
         client_dict['bank_info'] = client_dict['bank_info']
     
     # 初始化项目历史
-    client_dict['project_history'] = {
-        "total": 0,
-        "completed": 0,
-        "ongoing": 0,
-        "value": 0
-    }
+    client_dict['project_history'] = empty_project_history()
     
     # 创建客户
     client = Client(**client_dict)
     
     db.add(client)
+    await db.flush()
+    await upsert_search_documents(db, [client_document(client)])
+    await bump_data_version(db, "clients")
     await db.commit()
     await db.refresh(client)
     
@@ -552,6 +887,79 @@ async def get_client(
     )
 
 
+@router.get("/{client_id}/detail", response_model=ResponseModel[ClientDetailResponse])
+async def get_client_detail(
+    client_id: int,
+    include: str = Query("projects,aggregates", description="附加内容，逗号分隔: projects, aggregates"),
+    page: int = Query(1, ge=1, description="项目页码"),
+    page_size: int = Query(20, ge=1, le=100, description="每页项目数量"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取客户详情（一次请求返回客户、项目列表和实时统计）"""
+    
+    includes = {item.strip() for item in include.split(",") if item.strip()}
+    unknown = includes - CLIENT_DETAIL_INCLUDES
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的 include 参数: {', '.join(sorted(unknown))}"
+        )
+    
+    # 客户与项目统计在同一条分组查询中获取，同时完成存在性检查
+    query = (
+        select(Client, *history_aggregates())
+        .outerjoin(Project, Project.client_id == Client.id)
+        .where(Client.id == client_id)
+        .group_by(Client.id)
+    )
+    result = await db.execute(query)
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="客户不存在"
+        )
+    
+    aggregates = ProjectHistory(
+        total=row.total,
+        completed=int(row.completed),
+        ongoing=int(row.ongoing),
+        value=float(row.value)
+    )
+    detail = ClientDetailResponse(client=ClientResponse.model_validate(row.Client))
+    
+    if "aggregates" in includes:
+        detail.aggregates = aggregates
+    
+    if "projects" in includes:
+        project_list = []
+        # 项目总数已由统计查询得到，无需再执行 COUNT
+        if aggregates.total > (page - 1) * page_size:
+            project_query = (
+                select(Project)
+                .where(Project.client_id == client_id)
+                .order_by(Project.created_at.desc(), Project.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+            project_result = await db.execute(project_query)
+            project_list = [
+                ClientProjectItem.model_validate(project)
+                for project in project_result.scalars().all()
+            ]
+        
+        detail.projects = PaginatedResponse[ClientProjectItem](
+            list=project_list,
+            total=aggregates.total,
+            page=page,
+            pageSize=page_size
+        )
+    
+    return ResponseModel[ClientDetailResponse](data=detail)
+
+
 @router.put("/{client_id}", response_model=ResponseModel[ClientResponse])
 async def update_client(
     client_id: int,
@@ -592,6 +1000,11 @@ async def update_client(
     if update_data:
         stmt = update(Client).where(Client.id == client_id).values(**update_data)
         await db.execute(stmt)
+        if CLIENT_SEARCH_FIELDS & update_data.keys():
+            await reindex_clients(db, Client.id == client_id)
+            # 项目文档包含客户名称
+            await reindex_projects(db, Project.client_id == client_id)
+        await bump_data_version(db, "clients")
         await db.commit()
         
         # 重新查询更新后的客户
@@ -623,19 +1036,21 @@ async def delete_client(
         )
     
     # 检查是否有关联的项目
-    project_query = select(Project).where(Project.client_id == client_id)
-    project_result = await db.execute(project_query)
-    projects = project_result.scalars().all()
+    project_count_query = select(func.count(Project.id)).where(Project.client_id == client_id)
+    project_count_result = await db.execute(project_count_query)
+    project_count = project_count_result.scalar() or 0
     
-    if projects:
+    if project_count:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"无法删除客户，该客户有 {len(projects)} 个关联项目"
+            detail=f"无法删除客户，该客户有 {project_count} 个关联项目"
         )
     
     # 删除客户
     stmt = delete(Client).where(Client.id == client_id)
     await db.execute(stmt)
+    await remove_search_documents(db, CLIENT, [client_id])
+    await bump_data_version(db, "clients")
     await db.commit()
     
     return ResponseModel[dict](
@@ -690,7 +1105,7 @@ async def update_client_project_history(
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """自动更新客户项目历史"""
+    """按项目表重新计算单个客户的项目历史"""
     
     # 检查客户是否存在
     client_query = select(Client).where(Client.id == client_id)
@@ -703,32 +1118,14 @@ async def update_client_project_history(
             detail="客户不存在"
         )
     
-    # 统计项目信息
-    project_query = select(Project).where(Project.client_id == client_id)
-    project_result = await db.execute(project_query)
-    projects = project_result.scalars().all()
-    
-    total = len(projects)
-    completed = len([p for p in projects if p.status == "completed"])
-    ongoing = len([p for p in projects if p.status in ["reporting", "modeling", "rendering", "delivering"]])
-    value = sum(p.budget_cny for p in projects)
-    
-    # 更新项目历史
-    project_history = {
-        "total": total,
-        "completed": completed,
-        "ongoing": ongoing,
-        "value": value
-    }
-    
-    stmt = update(Client).where(Client.id == client_id).values(project_history=project_history)
-    await db.execute(stmt)
+    # 分组统计并写回项目历史
+    await recompute_project_history(db, client_id)
     await db.commit()
     
     # 重新查询客户
-    result = await db.execute(client_query)
+    result = await db.execute(client_query.execution_options(populate_existing=True))
     client = result.scalar_one()
     
     return ResponseModel[ClientResponse](
         data=ClientResponse.model_validate(client)
-    ) 
\ No newline at end of file
+    )
@@ -1,27 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
-from datetime import datetime
+from sqlalchemy import select, update, delete, func
+from typing import Any, AsyncIterator, Optional, Tuple
+from datetime import datetime, timedelta
+import base64
+import hashlib
+import logging
 import os
+import shutil
 import uuid
 import aiofiles
+from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
 from pathlib import Path
 import mimetypes
 from io import BytesIO
 
 from app.api.deps import get_current_user, get_async_session
+from app.core.sql import dialect_insert
+from app.schemas.common import PaginatedResponse
 from app.schemas.files import (
     FileInfoResponse, FileUploadResponse, 
-    ContractGenerateRequest, ReportGenerateRequest
+    ContractGenerateRequest, ReportGenerateRequest,
+    ResumableUploadCreate, ResumableUploadResponse
 )
+from app.models.file import FileBlob, FileRecord, UploadPart, UploadSession, UploadStatus
 from app.models.user import User
+from app.services.search import FILE, file_document, remove_search_documents, upsert_search_documents
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # 文件存储配置
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+# 上传中的临时文件（与 UPLOAD_DIR 同一文件系统，完成后原子重命名）
+UPLOAD_TMP_DIR = UPLOAD_DIR / ".tmp"
+UPLOAD_TMP_DIR.mkdir(exist_ok=True)
+# 按内容寻址的文件内容：blobs/<SHA-256 前两位>/<SHA-256>
+UPLOAD_BLOB_DIR = UPLOAD_DIR / "blobs"
+UPLOAD_BLOB_DIR.mkdir(exist_ok=True)
+# 断点续传的分块（每个会话一个子目录）
+UPLOAD_PARTS_DIR = UPLOAD_DIR / ".parts"
+UPLOAD_PARTS_DIR.mkdir(exist_ok=True)
 
 # 支持的文件类型
 ALLOWED_EXTENSIONS = {
@@ -35,8 +57,34 @@ ALLOWED_EXTENSIONS = {
 # 最大文件大小 (50MB)
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
-# 模拟文件数据库
-_file_storage = []
+# 流式上传每次读取的块大小 (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# multipart 请求中除文件内容外的边界和字段头部允许的额外字节数
+MULTIPART_OVERHEAD = 64 * 1024
+
+# 上传接口自行解析请求体，在接口文档中声明 multipart 表单
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+# 断点续传：最大文件大小 (2GB)、分块大小范围 (1MB ~ 64MB，默认8MB)、会话有效期
+RESUMABLE_MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024
+RESUMABLE_MIN_CHUNK_SIZE = 1024 * 1024
+RESUMABLE_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+RESUMABLE_DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+RESUMABLE_SESSION_TTL = timedelta(hours=24)
 
 
 def get_file_type(extension: str) -> str:
@@ -61,152 +109,662 @@ def is_allowed_file(filename: str) -> bool:
     return extension in all_extensions
 
 
-@router.post("/upload", response_model=FileUploadResponse)
+def size_exceeded(max_size: int, label: str = "文件") -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"{label}大小超过限制（最大 {max_size // (1024*1024)}MB）"
+    )
+
+
+async def stream_to_file(
+    chunks: AsyncIterator[bytes],
+    destination: Path,
+    max_size: int,
+    label: str = "文件",
+    expected_size: Optional[int] = None,
+    expected_checksum: Optional[str] = None
+) -> Tuple[int, str]:
+    """分块写入临时文件并计算 SHA-256，校验通过后原子重命名到目标路径
+
+    超过 max_size 时立即中止；大小或校验和与期望不符时不会生成目标文件。
+    返回 (文件大小, SHA-256)。
+    """
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise size_exceeded(max_size, label)
+                digest.update(chunk)
+                await f.write(chunk)
+        if expected_size is not None and size != expected_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label}大小不正确：应为 {expected_size} 字节，收到 {size} 字节"
+            )
+        if expected_checksum is not None and digest.hexdigest() != expected_checksum:
+            raise HTTPException(status_code=400, detail=f"{label}校验和不匹配")
+        os.replace(temp_path, destination)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return size, digest.hexdigest()
+
+
+async def parse_multipart(request: Request) -> AsyncIterator[Tuple[str, Any]]:
+    """边接收边解析 multipart 请求体
+
+    直接读取 request.stream()，按顺序产生 ("part", 头部)、("data", 内容块)、("end", None)，
+    文件内容不经过框架的临时文件。
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="请使用 multipart/form-data 上传文件")
+    
+    events = []
+    headers = {}
+    header = {"field": b"", "value": b""}
+    
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+    
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+    
+    def on_header_end():
+        headers[header["field"].lower()] = header["value"]
+        header["field"], header["value"] = b"", b""
+    
+    def on_headers_finished():
+        events.append(("part", dict(headers)))
+        headers.clear()
+    
+    parser = MultipartParser(boundary, callbacks={
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            pending, events[:] = events[:], []
+            for event in pending:
+                yield event
+        parser.finalize()
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="上传内容格式不正确")
+
+
+async def part_data(parts: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[bytes]:
+    """当前字段的内容块，直到字段结束"""
+    async for kind, value in parts:
+        if kind == "end":
+            return
+        if kind == "data":
+            yield value
+    raise HTTPException(status_code=400, detail="上传内容不完整")
+
+
+async def open_upload(request: Request, field: str = "file") -> Tuple[str, AsyncIterator[bytes]]:
+    """在请求体中找到文件字段，返回 (文件名, 文件内容块)
+
+    请求头声明的大小已超过 MAX_FILE_SIZE 时直接拒绝，不读取请求体。
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        raise size_exceeded(MAX_FILE_SIZE)
+    
+    parts = parse_multipart(request)
+    async for kind, value in parts:
+        if kind != "part":
+            continue
+        _, options = parse_options_header(value.get(b"content-disposition", b""))
+        if options.get(b"name") == field.encode() and b"filename" in options:
+            return options[b"filename"].decode("utf-8", "replace"), part_data(parts)
+    raise HTTPException(status_code=400, detail="缺少上传文件")
+
+
+def blob_path(checksum: str) -> Path:
+    return UPLOAD_BLOB_DIR / checksum[:2] / checksum
+
+
+def blob_tombstone(path: Path) -> Path:
+    """待删除 blob 文件的临时名称，提交后再删除"""
+    return path.with_name(f"{path.name}.{uuid.uuid4().hex}.deleted")
+
+
+async def store_blob(db: AsyncSession, source: Path, size: int, checksum: str) -> Tuple[int, Path]:
+    """将临时文件存入按内容寻址的存储（在当前事务内，不提交）
+
+    已有相同内容时只增加引用计数并丢弃临时文件，否则把临时文件移动到 blob 路径。
+    文件在提交前移动到位，事务回滚时由 discard_unreferenced_blob 清理。
+    返回 (blob ID, blob 路径)。
+    """
+    path = blob_path(checksum)
+    try:
+        stmt = dialect_insert(db, FileBlob).values(
+            checksum=checksum, file_size=size, storage_path=str(path), ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileBlob.checksum],
+            set_={"ref_count": FileBlob.ref_count + 1, "updated_at": func.now()}
+        ).returning(FileBlob.id, FileBlob.ref_count)
+        blob_id, ref_count = (await db.execute(stmt)).one()
+        if ref_count == 1 or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, path)
+    finally:
+        source.unlink(missing_ok=True)
+    return blob_id, path
+
+
+async def store_blob_bytes(db: AsyncSession, data: bytes, checksum: str) -> Tuple[int, Path]:
+    temp_path = UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+    async with aiofiles.open(temp_path, 'wb') as f:
+        await f.write(data)
+    return await store_blob(db, temp_path, len(data), checksum)
+
+
+async def release_blob(db: AsyncSession, blob_id: int) -> Optional[Path]:
+    """减少 blob 的引用计数（在当前事务内，不提交）
+
+    最后一个引用删除时删除 blob 记录，并返回提交后需要删除的磁盘文件。
+    """
+    result = await db.execute(
+        update(FileBlob)
+        .where(FileBlob.id == blob_id)
+        .values(ref_count=FileBlob.ref_count - 1, updated_at=func.now())
+        .returning(FileBlob.ref_count, FileBlob.storage_path)
+    )
+    row = result.one_or_none()
+    if row is None or row.ref_count > 0:
+        return None
+    await db.execute(delete(FileBlob).where(FileBlob.id == blob_id))
+    return Path(row.storage_path)
+
+
+async def discard_unreferenced_blob(db: AsyncSession, checksum: str, path: Path) -> None:
+    """回滚后删除没有 blob 记录引用的存储文件（已有记录的内容保持不变）"""
+    result = await db.execute(select(FileBlob.id).where(FileBlob.checksum == checksum))
+    if result.scalar_one_or_none() is None:
+        path.unlink(missing_ok=True)
+
+
+async def save_file_info(db: AsyncSession, file_info: dict) -> FileRecord:
+    """登记文件信息并写入全局搜索索引
+
+    提交失败时回滚事务，并清理本次新放入存储的 blob 文件。
+    """
+    try:
+        record = FileRecord(**file_info)
+        db.add(record)
+        await db.flush()
+        await upsert_search_documents(db, [file_document(record)])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        if file_info.get("blob_id"):
+            try:
+                await discard_unreferenced_blob(db, file_info["checksum"], Path(file_info["file_path"]))
+            except Exception:
+                logger.exception("清理未引用的文件失败: %s", file_info["file_path"])
+        raise
+    return record
+
+
+async def get_file_record(db: AsyncSession, file_id: str) -> FileRecord:
+    result = await db.execute(select(FileRecord).where(FileRecord.file_id == file_id))
+    record = result.scalar_one_or_none()
+    if not record:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    return record
+
+
+@router.post("/upload", response_model=FileUploadResponse, openapi_extra=UPLOAD_REQUEST_BODY)
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
     project_id: Optional[int] = None,
     description: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
-    """上传文件"""
+    """上传文件（multipart/form-data 的 file 字段）
+    
+    请求体边接收边写入临时文件，超过 MAX_FILE_SIZE 时立即停止接收。
+    """
+    
+    filename, chunks = await open_upload(request)
     
     # 检查文件类型
-    if not is_allowed_file(file.filename):
+    if not is_allowed_file(filename):
         raise HTTPException(
             status_code=400, 
             detail=f"不支持的文件类型。支持的类型：{', '.join(sum(ALLOWED_EXTENSIONS.values(), []))}"
         )
     
-    # 检查文件大小
-    file_content = await file.read()
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"文件大小超过限制（最大 {MAX_FILE_SIZE // (1024*1024)}MB）"
-        )
-    
-    # 生成唯一文件名
     file_id = str(uuid.uuid4())
-    extension = os.path.splitext(file.filename)[1]
-    stored_filename = f"{file_id}{extension}"
-    file_path = UPLOAD_DIR / stored_filename
+    extension = os.path.splitext(filename)[1]
     
-    # 保存文件
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(file_content)
+    # 流式保存文件（边写边检查大小并计算校验和），相同内容只保存一份
+    temp_path = UPLOAD_TMP_DIR / f"{file_id}{extension}"
+    file_size, checksum = await stream_to_file(chunks, temp_path, MAX_FILE_SIZE)
+    blob_id, file_path = await store_blob(db, temp_path, file_size, checksum)
     
     # 获取文件信息
     file_type = get_file_type(extension)
-    mime_type, _ = mimetypes.guess_type(file.filename)
+    mime_type, _ = mimetypes.guess_type(filename)
     
-    # 保存文件信息到模拟数据库
+    # 保存文件信息
     file_info = {
-        "id": len(_file_storage) + 1,
         "file_id": file_id,
-        "original_filename": file.filename,
-        "stored_filename": stored_filename,
+        "original_filename": filename,
+        "stored_filename": file_path.name,
         "file_path": str(file_path),
         "file_type": file_type,
         "mime_type": mime_type or "application/octet-stream",
-        "file_size": len(file_content),
+        "file_size": file_size,
+        "checksum": checksum,
+        "blob_id": blob_id,
         "project_id": project_id,
         "description": description,
         "uploaded_by": current_user.id,
         "uploaded_at": datetime.now()
     }
     
-    _file_storage.append(file_info)
+    await save_file_info(db, file_info)
     
     return FileUploadResponse(
         file_id=file_id,
-        filename=file.filename,
+        filename=filename,
         file_type=file_type,
-        file_size=len(file_content),
+        file_size=file_size,
+        checksum=checksum,
         upload_url=f"/api/files/{file_id}",
         message="文件上传成功"
     )
 
 
+def upload_part_dir(upload_id: str) -> Path:
+    return UPLOAD_PARTS_DIR / upload_id
+
+
+def upload_part_count(session: UploadSession) -> int:
+    return (session.file_size + session.chunk_size - 1) // session.chunk_size
+
+
+def parse_upload_checksum(value: str) -> str:
+    """解析 tus 风格的 Upload-Checksum 头（"sha256 <base64>"），返回十六进制摘要"""
+    algorithm, _, encoded = value.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=400, detail="仅支持 sha256 分块校验")
+    try:
+        return base64.b64decode(encoded.strip(), validate=True).hex()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="分块校验和格式无效")
+
+
+async def read_parts(directory: Path, part_count: int) -> AsyncIterator[bytes]:
+    for part_number in range(part_count):
+        async with aiofiles.open(directory / str(part_number), 'rb') as f:
+            while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+
+async def get_upload_session(db: AsyncSession, upload_id: str, current_user: User) -> UploadSession:
+    result = await db.execute(select(UploadSession).where(UploadSession.upload_id == upload_id))
+    session = result.scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    if session.uploaded_by != current_user.id:
+        raise HTTPException(status_code=403, detail="无权限访问此上传会话")
+    if session.status == UploadStatus.UPLOADING and session.expires_at < datetime.now():
+        raise HTTPException(status_code=410, detail="上传会话已过期")
+    return session
+
+
+async def upload_session_response(db: AsyncSession, session: UploadSession) -> ResumableUploadResponse:
+    result = await db.execute(
+        select(UploadPart.part_number, UploadPart.size)
+        .where(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+    )
+    parts = result.all()
+    return ResumableUploadResponse(
+        upload_id=session.upload_id,
+        filename=session.filename,
+        file_size=session.file_size,
+        chunk_size=session.chunk_size,
+        total_parts=upload_part_count(session),
+        received_parts=[part_number for part_number, _ in parts],
+        received_bytes=sum(size for _, size in parts),
+        status=session.status,
+        file_id=session.file_id,
+        expires_at=session.expires_at,
+        upload_url=f"/api/files/uploads/{session.upload_id}"
+    )
+
+
+async def purge_upload_session(db: AsyncSession, session_id: int, upload_id: str) -> None:
+    """删除会话的分块记录和磁盘上的分块（不提交）"""
+    await db.execute(delete(UploadPart).where(UploadPart.session_id == session_id))
+    shutil.rmtree(upload_part_dir(upload_id), ignore_errors=True)
+
+
+@router.post("/uploads", response_model=ResumableUploadResponse)
+async def create_resumable_upload(
+    upload_data: ResumableUploadCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """创建断点续传会话（适用于大型 CAD 和压缩包文件）"""
+    
+    if not is_allowed_file(upload_data.filename):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"不支持的文件类型。支持的类型：{', '.join(sum(ALLOWED_EXTENSIONS.values(), []))}"
+        )
+    if upload_data.file_size > RESUMABLE_MAX_FILE_SIZE:
+        raise size_exceeded(RESUMABLE_MAX_FILE_SIZE)
+    chunk_size = upload_data.chunk_size or RESUMABLE_DEFAULT_CHUNK_SIZE
+    if not RESUMABLE_MIN_CHUNK_SIZE <= chunk_size <= RESUMABLE_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"分块大小需在 {RESUMABLE_MIN_CHUNK_SIZE // (1024*1024)}MB 到 "
+                   f"{RESUMABLE_MAX_CHUNK_SIZE // (1024*1024)}MB 之间"
+        )
+    
+    # 顺带清理过期的会话：未完成的会话无法再续传，已完成的会话过期后也不再保留用于重试
+    now = datetime.now()
+    expired = await db.execute(
+        select(UploadSession.id, UploadSession.upload_id).where(UploadSession.expires_at < now)
+    )
+    expired = expired.all()
+    for session_id, upload_id in expired:
+        await purge_upload_session(db, session_id, upload_id)
+    if expired:
+        await db.execute(delete(UploadSession).where(UploadSession.id.in_([row.id for row in expired])))
+    
+    session = UploadSession(
+        upload_id=str(uuid.uuid4()),
+        filename=upload_data.filename,
+        file_size=upload_data.file_size,
+        chunk_size=chunk_size,
+        checksum=upload_data.checksum,
+        project_id=upload_data.project_id,
+        description=upload_data.description,
+        uploaded_by=current_user.id,
+        status=UploadStatus.UPLOADING,
+        expires_at=now + RESUMABLE_SESSION_TTL
+    )
+    db.add(session)
+    await db.commit()
+    upload_part_dir(session.upload_id).mkdir(parents=True, exist_ok=True)
+    
+    return await upload_session_response(db, session)
+
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadResponse)
+async def get_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """获取断点续传进度（已收到的分块），用于恢复上传"""
+    
+    session = await get_upload_session(db, upload_id, current_user)
+    return await upload_session_response(db, session)
+
+
+@router.put("/uploads/{upload_id}", response_model=ResumableUploadResponse)
+async def upload_resumable_part(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0, description="分块偏移量（chunk_size 的整数倍）"),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum", description="分块校验：sha256 <base64>"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """上传一个分块（请求体为分块原始内容，分块可乱序、并行上传，重复上传会覆盖）"""
+    
+    session = await get_upload_session(db, upload_id, current_user)
+    if session.status == UploadStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="上传已完成")
+    if upload_offset % session.chunk_size or upload_offset >= session.file_size:
+        raise HTTPException(status_code=400, detail="分块偏移量无效")
+    
+    part_number = upload_offset // session.chunk_size
+    part_size = min(session.chunk_size, session.file_size - upload_offset)
+    directory = upload_part_dir(upload_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    size, checksum = await stream_to_file(
+        request.stream(), directory / str(part_number), part_size, "分块",
+        expected_size=part_size,
+        expected_checksum=parse_upload_checksum(upload_checksum) if upload_checksum else None
+    )
+    
+    stmt = dialect_insert(db, UploadPart).values(
+        session_id=session.id, part_number=part_number, size=size, checksum=checksum
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UploadPart.session_id, UploadPart.part_number],
+        set_={"size": stmt.excluded.size, "checksum": stmt.excluded.checksum, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
+    session.expires_at = datetime.now() + RESUMABLE_SESSION_TTL
+    await db.commit()
+    
+    return await upload_session_response(db, session)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse)
+async def complete_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """完成断点续传：按顺序合并分块、校验大小和 SHA-256 后登记文件"""
+    
+    session = await get_upload_session(db, upload_id, current_user)
+    if session.status == UploadStatus.UPLOADING:
+        result = await db.execute(
+            select(UploadPart.part_number).where(UploadPart.session_id == session.id)
+        )
+        part_count = upload_part_count(session)
+        missing = sorted(set(range(part_count)) - set(result.scalars().all()))
+        if missing:
+            raise HTTPException(status_code=400, detail=f"分块不完整，缺少 {len(missing)} 个分块: {missing[:20]}")
+        
+        file_id = str(uuid.uuid4())
+        extension = os.path.splitext(session.filename)[1]
+        temp_path = UPLOAD_TMP_DIR / f"{file_id}{extension}"
+        file_size, checksum = await stream_to_file(
+            read_parts(upload_part_dir(upload_id), part_count), temp_path, RESUMABLE_MAX_FILE_SIZE,
+            expected_size=session.file_size,
+            expected_checksum=session.checksum
+        )
+        
+        # 并发完成时只有一个请求能把会话标记为已完成
+        result = await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session.id, UploadSession.status == UploadStatus.UPLOADING)
+            .values(
+                status=UploadStatus.COMPLETED,
+                file_id=file_id,
+                checksum=checksum,
+                expires_at=datetime.now() + RESUMABLE_SESSION_TTL
+            )
+            .returning(UploadSession.id)
+        )
+        if result.scalar_one_or_none() is None:
+            await db.rollback()
+            temp_path.unlink(missing_ok=True)
+            await db.refresh(session)
+        else:
+            blob_id, file_path = await store_blob(db, temp_path, file_size, checksum)
+            mime_type, _ = mimetypes.guess_type(session.filename)
+            await save_file_info(db, {
+                "file_id": file_id,
+                "original_filename": session.filename,
+                "stored_filename": file_path.name,
+                "file_path": str(file_path),
+                "file_type": get_file_type(extension),
+                "mime_type": mime_type or "application/octet-stream",
+                "file_size": file_size,
+                "checksum": checksum,
+                "blob_id": blob_id,
+                "project_id": session.project_id,
+                "description": session.description,
+                "uploaded_by": current_user.id,
+                "uploaded_at": datetime.now()
+            })
+            await purge_upload_session(db, session.id, upload_id)
+            await db.commit()
+            await db.refresh(session)
+    
+    return FileUploadResponse(
+        file_id=session.file_id,
+        filename=session.filename,
+        file_type=get_file_type(os.path.splitext(session.filename)[1]),
+        file_size=session.file_size,
+        checksum=session.checksum,
+        upload_url=f"/api/files/{session.file_id}",
+        message="文件上传成功"
+    )
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """取消断点续传，删除已上传的分块"""
+    
+    session = await get_upload_session(db, upload_id, current_user)
+    if session.status == UploadStatus.COMPLETED:
+        # 保留已完成的会话，重试完成请求仍能拿到文件
+        raise HTTPException(status_code=409, detail="上传已完成，无法取消")
+    await purge_upload_session(db, session.id, upload_id)
+    await db.delete(session)
+    await db.commit()
+    
+    return {"message": "上传已取消", "upload_id": upload_id}
+
+
 @router.get("/{file_id}", response_model=FileInfoResponse)
 async def get_file_info(
     file_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """获取文件信息"""
     
-    file_info = next((f for f in _file_storage if f["file_id"] == file_id), None)
-    if not file_info:
-        raise HTTPException(status_code=404, detail="文件不存在")
-    
-    return FileInfoResponse(**file_info)
+    record = await get_file_record(db, file_id)
+    return FileInfoResponse.from_orm(record)
 
 
 @router.get("/{file_id}/download")
 async def download_file(
     file_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """下载文件"""
     
-    file_info = next((f for f in _file_storage if f["file_id"] == file_id), None)
-    if not file_info:
-        raise HTTPException(status_code=404, detail="文件不存在")
+    record = await get_file_record(db, file_id)
     
-    file_path = Path(file_info["file_path"])
+    file_path = Path(record.file_path)
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="文件已被删除")
     
     return FileResponse(
         path=file_path,
-        filename=file_info["original_filename"],
-        media_type=file_info["mime_type"]
+        filename=record.original_filename,
+        media_type=record.mime_type
     )
 
 
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """删除文件"""
     
-    file_info = next((f for f in _file_storage if f["file_id"] == file_id), None)
-    if not file_info:
-        raise HTTPException(status_code=404, detail="文件不存在")
+    record = await get_file_record(db, file_id)
     
     # 检查权限（只有上传者或管理员可以删除）
-    if file_info["uploaded_by"] != current_user.id and not current_user.is_admin:
+    if record.uploaded_by != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="无权限删除此文件")
     
-    # 删除物理文件
-    file_path = Path(file_info["file_path"])
-    if file_path.exists():
-        os.remove(file_path)
-    
-    # 从模拟数据库中删除
-    _file_storage.remove(file_info)
+    # 内容被其他文件引用时只减少引用计数
+    unused_path = await release_blob(db, record.blob_id) if record.blob_id else Path(record.file_path)
+    await db.delete(record)
+    await remove_search_documents(db, FILE, [file_id])
+    
+    # 提交前先把文件改名：提交后相同内容的新上传会在原路径重新放入文件，不会被这里删除
+    tombstone = None
+    if unused_path and unused_path.exists():
+        tombstone = blob_tombstone(unused_path)
+        os.replace(unused_path, tombstone)
+    try:
+        await db.commit()
+    except Exception:
+        if tombstone:
+            os.replace(tombstone, unused_path)
+        raise
+    
+    # 提交后再删除物理文件
+    if tombstone:
+        tombstone.unlink(missing_ok=True)
     
     return {"message": "文件删除成功", "file_id": file_id}
 
 
-@router.get("/", response_model=List[FileInfoResponse])
+@router.get("/", response_model=PaginatedResponse[FileInfoResponse])
 async def list_files(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
     project_id: Optional[int] = None,
     file_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    uploaded_by: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
-    """获取文件列表"""
+    """获取文件列表（按上传时间倒序分页）"""
     
-    files = _file_storage.copy()
-    
-    # 按条件筛选
+    conditions = []
     if project_id:
-        files = [f for f in files if f.get("project_id") == project_id]
-    
+        conditions.append(FileRecord.project_id == project_id)
     if file_type:
-        files = [f for f in files if f["file_type"] == file_type]
+        conditions.append(FileRecord.file_type == file_type)
+    if uploaded_by:
+        conditions.append(FileRecord.uploaded_by == uploaded_by)
+    
+    total_result = await db.execute(select(func.count(FileRecord.id)).where(*conditions))
+    total = total_result.scalar()
+    
+    result = await db.execute(
+        select(FileRecord)
+        .where(*conditions)
+        .order_by(FileRecord.uploaded_at.desc(), FileRecord.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
     
-    return [FileInfoResponse(**f) for f in files]
+    return PaginatedResponse[FileInfoResponse](
+        list=[FileInfoResponse.from_orm(record) for record in result.scalars()],
+        total=total,
+        page=page,
+        pageSize=page_size
+    )
 
 
 # PDF生成功能（需要安装reportlab库）
@@ -214,7 +772,8 @@ async def list_files(
 async def generate_contract_pdf(
     contract_data: ContractGenerateRequest,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """生成合同PDF"""
     
@@ -243,30 +802,31 @@ async def generate_contract_pdf(
     # 生成PDF文件
     pdf_id = str(uuid.uuid4())
     pdf_filename = f"contract_{pdf_id}.pdf"
-    pdf_path = UPLOAD_DIR / pdf_filename
     
     # 这里应该使用reportlab生成实际的PDF
     # 暂时创建一个文本文件作为演示
-    async with aiofiles.open(pdf_path, 'w', encoding='utf-8') as f:
-        await f.write(contract_content)
+    pdf_content = contract_content.encode('utf-8')
+    checksum = hashlib.sha256(pdf_content).hexdigest()
+    blob_id, pdf_path = await store_blob_bytes(db, pdf_content, checksum)
     
     # 保存到文件存储
     file_info = {
-        "id": len(_file_storage) + 1,
         "file_id": pdf_id,
         "original_filename": pdf_filename,
-        "stored_filename": pdf_filename,
+        "stored_filename": pdf_path.name,
         "file_path": str(pdf_path),
         "file_type": "document",
         "mime_type": "application/pdf",
-        "file_size": len(contract_content.encode('utf-8')),
+        "file_size": len(pdf_content),
+        "checksum": checksum,
+        "blob_id": blob_id,
         "project_id": contract_data.project_id,
         "description": f"项目合同 - {contract_data.project_name}",
         "uploaded_by": current_user.id,
         "uploaded_at": datetime.now()
     }
     
-    _file_storage.append(file_info)
+    await save_file_info(db, file_info)
     
     return {
         "message": "合同PDF生成成功",
@@ -279,7 +839,8 @@ async def generate_contract_pdf(
 async def generate_report_pdf(
     report_data: ReportGenerateRequest,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """生成报表PDF"""
     
@@ -300,29 +861,30 @@ async def generate_report_pdf(
     # 生成PDF文件
     pdf_id = str(uuid.uuid4())
     pdf_filename = f"report_{pdf_id}.pdf"
-    pdf_path = UPLOAD_DIR / pdf_filename
     
     # 暂时创建一个文本文件作为演示
-    async with aiofiles.open(pdf_path, 'w', encoding='utf-8') as f:
-        await f.write(report_content)
+    pdf_content = report_content.encode('utf-8')
+    checksum = hashlib.sha256(pdf_content).hexdigest()
+    blob_id, pdf_path = await store_blob_bytes(db, pdf_content, checksum)
     
     # 保存到文件存储
     file_info = {
-        "id": len(_file_storage) + 1,
         "file_id": pdf_id,
         "original_filename": pdf_filename,
-        "stored_filename": pdf_filename,
+        "stored_filename": pdf_path.name,
         "file_path": str(pdf_path),
         "file_type": "document",
         "mime_type": "application/pdf",
-        "file_size": len(report_content.encode('utf-8')),
+        "file_size": len(pdf_content),
+        "checksum": checksum,
+        "blob_id": blob_id,
         "project_id": None,
         "description": f"财务报表 - {report_data.report_title}",
         "uploaded_by": current_user.id,
         "uploaded_at": datetime.now()
     }
     
-    _file_storage.append(file_info)
+    await save_file_info(db, file_info)
     
     return {
         "message": "报表PDF生成成功",
@@ -333,27 +895,50 @@ async def generate_report_pdf(
 
 @router.get("/storage/stats")
 async def get_storage_stats(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
 ):
     """获取存储统计信息"""
     
-    total_files = len(_file_storage)
-    total_size = sum(f["file_size"] for f in _file_storage)
-    
     # 按类型统计
-    type_stats = {}
-    for file_info in _file_storage:
-        file_type = file_info["file_type"]
-        if file_type not in type_stats:
-            type_stats[file_type] = {"count": 0, "size": 0}
-        type_stats[file_type]["count"] += 1
-        type_stats[file_type]["size"] += file_info["file_size"]
+    result = await db.execute(
+        select(FileRecord.file_type, func.count(FileRecord.id), func.coalesce(func.sum(FileRecord.file_size), 0))
+        .group_by(FileRecord.file_type)
+    )
+    type_stats = {
+        file_type: {"count": count, "size": int(size)}
+        for file_type, count, size in result
+    }
+    total_files = sum(stats["count"] for stats in type_stats.values())
+    total_size = sum(stats["size"] for stats in type_stats.values())
     
-    return {
+    stats = {
         "total_files": total_files,
         "total_size": total_size,
         "total_size_mb": round(total_size / (1024 * 1024), 2),
         "file_types": type_stats,
         "storage_limit": MAX_FILE_SIZE,
         "allowed_extensions": ALLOWED_EXTENSIONS
-    } 
\ No newline at end of file
+    }
+    
+    # 管理员可查看去重节省的磁盘空间
+    if current_user.role == "admin":
+        blob_result = await db.execute(
+            select(func.count(FileBlob.id), func.coalesce(func.sum(FileBlob.file_size), 0))
+        )
+        blob_count, blob_size = blob_result.one()
+        legacy_result = await db.execute(
+            select(func.coalesce(func.sum(FileRecord.file_size), 0)).where(FileRecord.blob_id.is_(None))
+        )
+        stored_size = int(blob_size) + int(legacy_result.scalar())
+        saved_size = total_size - stored_size
+        stats["deduplication"] = {
+            "unique_blobs": blob_count,
+            "stored_size": stored_size,
+            "stored_size_mb": round(stored_size / (1024 * 1024), 2),
+            "saved_size": saved_size,
+            "saved_size_mb": round(saved_size / (1024 * 1024), 2),
+            "saved_ratio": round(saved_size / total_size, 4) if total_size else 0
+        }
+    
+    return stats 
\ No newline at end of file
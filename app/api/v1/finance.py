@@ -6,6 +6,8 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 
 from app.api.deps import get_current_user, get_async_session
+from app.core.cache import bump_data_version
+from app.services.project_events import publish_project_event
 from app.schemas.finance import (
     FinanceOverviewResponse, RevenueDetailResponse, CostStructureResponse,
     FixedCostCreate, FixedCostUpdate, FixedCostResponse,
@@ -202,8 +204,10 @@ async def update_payment_status(
     if payment_date:
         project.updated_at = datetime.combine(payment_date, datetime.min.time())
     
+    await bump_data_version(db, "projects")
     await db.commit()
     await db.refresh(project)
+    await publish_project_event("project.updated", project)
     
     return {
         "message": "付款状态更新成功",
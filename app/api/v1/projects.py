@@ -1,63 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, and_, or_, func
 from sqlalchemy.orm import selectinload
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-import uuid
+from datetime import datetime, date, timedelta
+import asyncio
+import hashlib
 import json
 from pathlib import Path
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal, serialized_write
+from app.core.cache import VersionedCache, get_data_version, bump_data_version
+from app.core.sql import month_bucket
+from app.core.events import project_events
 from app.models.user import User
-from app.models.project import Project
+from app.models.project import Project, ProjectService, ProjectStatus
 from app.models.client import Client
+from app.models.team import ProjectAssignment
 from app.schemas.project import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListQuery,
-    ProjectStatusUpdate, ProjectProgressUpdate, GanttProject
+    ProjectStatusUpdate, ProjectProgressUpdate, GanttProject,
+    ProjectBulkStatusUpdate, ProjectBulkItemResult, ProjectBulkResponse
 )
 from app.schemas.common import ResponseModel, PaginatedResponse
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_current_user, optional_security
+from app.services.contracts import CONTRACT_TERMS, build_contract_payload, get_contract_pdf
+from app.services.client_history import (
+    apply_history_delta, apply_project_change_history, history_delta, project_contribution
+)
+from app.services.project_events import publish_project_event
+from app.services.protocol import allocate_protocol_number
+from app.services.service_templates import apply_usage_delta, get_service_catalog
+from app.services.project_services import replace_project_services
+from app.services.search import (
+    PROJECT, PROJECT_SEARCH_FIELDS, project_document, reindex_projects,
+    remove_search_documents, upsert_search_documents
+)
+from app.api.v1.settings import get_protocol_number_prefix
 
 router = APIRouter()
 
-# 服务模板存储
-SERVICE_TEMPLATES = {
-    "商业综合体": [
-        {"camera": "Bird's Eye View", "unit_price": 8000, "description": "鸟瞰视角展示整体规划"},
-        {"camera": "Human View", "unit_price": 6000, "description": "人视角展示建筑细节"},
-        {"camera": "Interior View", "unit_price": 5000, "description": "室内空间展示"}
-    ],
-    "住宅项目": [
-        {"camera": "Aerial View", "unit_price": 7000, "description": "空中视角展示住宅布局"},
-        {"camera": "Street View", "unit_price": 5500, "description": "街道视角展示建筑外观"},
-        {"camera": "Garden View", "unit_price": 4500, "description": "花园景观展示"}
-    ],
-    "办公建筑": [
-        {"camera": "Corporate View", "unit_price": 9000, "description": "企业形象展示视角"},
-        {"camera": "Plaza View", "unit_price": 7500, "description": "广场视角展示"},
-        {"camera": "Interior Office", "unit_price": 6000, "description": "办公室内部展示"}
-    ],
-    "文化建筑": [
-        {"camera": "Landmark View", "unit_price": 10000, "description": "地标建筑展示"},
-        {"camera": "Cultural Atmosphere", "unit_price": 8500, "description": "文化氛围营造"},
-        {"camera": "Public Space", "unit_price": 7000, "description": "公共空间展示"}
-    ]
-}
+# 甘特图默认可见范围与最大范围（天）
+GANTT_DEFAULT_DAYS_BEFORE = 90
+GANTT_DEFAULT_DAYS_AFTER = 180
+GANTT_MAX_WINDOW_DAYS = 3 * 366
+# 甘特图流式输出时每批从数据库读取的行数
+GANTT_STREAM_BATCH_SIZE = 500
+
+# 事件流心跳间隔（秒），用于保持连接和检测断开
+SSE_HEARTBEAT_SECONDS = 15
+
+# 服务统计结果缓存（按项目数据版本失效）
+_service_analytics_cache = VersionedCache(maxsize=64)
 
 # 合同模板存储目录
 CONTRACTS_DIR = Path("contracts")
 CONTRACTS_DIR.mkdir(exist_ok=True)
 
 
-def generate_protocol_number() -> str:
-    """生成项目协议号"""
-    now = datetime.now()
-    # 格式: NF + 年月 + 4位随机数
-    return f"NF{now.strftime('%y%m')}{str(uuid.uuid4().int)[:4]}"
-
-
 @router.get("/", response_model=ResponseModel[PaginatedResponse[ProjectResponse]])
 async def get_projects(
     page: int = Query(1, ge=1),
@@ -80,24 +82,14 @@ async def get_projects(
         conditions.append(Project.status == status)
     
     if client:
-        # 通过客户名称搜索
-        client_query = select(Client.id).where(
+        # 通过客户名称搜索（子查询半连接，由数据库完成匹配）
+        matching_clients = select(Client.id).where(
             or_(
                 Client.company_name.ilike(f"%{client}%"),
                 Client.company_name_cn.ilike(f"%{client}%")
             )
         )
-        client_result = await db.execute(client_query)
-        client_ids = [row[0] for row in client_result.fetchall()]
-        if client_ids:
-            conditions.append(Project.client_id.in_(client_ids))
-        else:
-            # 如果没有找到匹配的客户，返回空结果
-            return ResponseModel[PaginatedResponse[ProjectResponse]](
-                data=PaginatedResponse[ProjectResponse](
-                    list=[], total=0, page=page, pageSize=page_size
-                )
-            )
+        conditions.append(Project.client_id.in_(matching_clients))
     
     if search:
         conditions.append(
@@ -164,15 +156,11 @@ async def create_project(
             detail="客户不存在"
         )
     
-    # 生成协议号
-    protocol_number = generate_protocol_number()
-    
     # 计算人民币预算
     budget_cny = project_data.budget * project_data.exchange_rate
     
     # 创建项目
     project = Project(
-        protocol_number=protocol_number,
         name=project_data.name,
         client_id=project_data.client_id,
         deadline=project_data.deadline,
@@ -185,15 +173,84 @@ async def create_project(
         services=[item.dict() for item in project_data.services] if project_data.services else None
     )
     
-    db.add(project)
-    await db.commit()
+    # SQLite 下写事务按到达顺序排队进入：协议号计数器是所有创建请求的热点行
+    async with serialized_write():
+        # 分配协议号（按前缀和月份递增的序号）
+        project.protocol_number = await allocate_protocol_number(db, get_protocol_number_prefix())
+        db.add(project)
+        await db.flush()
+        await replace_project_services(db, project.id, project.services)
+        await upsert_search_documents(db, [project_document(project, client)])
+        
+        # 同一事务内更新客户项目历史
+        await apply_history_delta(
+            db, project.client_id,
+            project_contribution(ProjectStatus.REPORTING, budget_cny)
+        )
+        await apply_usage_delta(db, None, project.services)
+        await bump_data_version(db, "projects")
+        await db.commit()
     await db.refresh(project)
+    await publish_project_event("project.created", project)
     
     return ResponseModel[ProjectResponse](
         data=ProjectResponse.model_validate(project)
     )
 
 
+@router.get("/events")
+async def stream_project_events(
+    request: Request,
+    project_id: Optional[List[int]] = Query(None, description="只接收这些项目的事件"),
+    client_id: Optional[List[int]] = Query(None, description="只接收这些客户的项目事件"),
+    token: Optional[str] = Query(None, description="访问令牌（浏览器 EventSource 无法设置请求头时使用）"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """项目变更事件流（Server-Sent Events）
+    
+    推送项目创建、更新、状态、进度和删除事件，替代轮询项目列表。
+    事件类型: project.created / project.updated / project.status / project.progress / project.deleted
+    令牌可放在 Authorization 请求头，也可通过 token 查询参数传入。
+    """
+    
+    if credentials is None:
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="未提供认证凭据",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    
+    # 使用短会话完成认证，避免长连接期间一直占用数据库连接
+    async with AsyncSessionLocal() as session:
+        await get_current_user(credentials, session)
+    
+    subscription = await project_events.subscribe(project_id, client_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                payload = json.dumps(event, ensure_ascii=False, default=str)
+                yield f"event: {event['type']}\ndata: {payload}\n\n"
+        finally:
+            project_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{project_id}", response_model=ResponseModel[ProjectResponse])
 async def get_project(
     project_id: int,
@@ -217,6 +274,29 @@ async def get_project(
     )
 
 
+async def update_project_returning(db: AsyncSession, project_id: int, values: Dict[str, Any]) -> Project:
+    """用一条 UPDATE ... RETURNING 更新项目并返回更新后的项目
+
+    没有命中任何行时回滚当前事务并返回404。
+    """
+    stmt = (
+        update(Project)
+        .where(Project.id == project_id)
+        .values(**values)
+        .returning(Project)
+    )
+    result = await db.execute(stmt)
+    project = result.scalar_one_or_none()
+    
+    if project is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="项目不存在"
+        )
+    return project
+
+
 @router.put("/{project_id}", response_model=ResponseModel[ProjectResponse])
 async def update_project(
     project_id: int,
@@ -226,38 +306,44 @@ async def update_project(
 ):
     """更新项目信息"""
     
-    # 检查项目是否存在
-    query = select(Project).where(Project.id == project_id)
-    result = await db.execute(query)
-    project = result.scalar_one_or_none()
+    update_data = project_data.model_dump(exclude_unset=True)
     
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="项目不存在"
+    if not update_data:
+        result = await db.execute(select(Project).where(Project.id == project_id))
+        project = result.scalar_one_or_none()
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="项目不存在"
+            )
+        return ResponseModel[ProjectResponse](
+            data=ProjectResponse.model_validate(project)
         )
     
-    # 更新数据
-    update_data = project_data.model_dump(exclude_unset=True)
-    
-    # 如果更新了预算或汇率，重新计算人民币预算
+    # 如果更新了预算或汇率，在数据库中用新值与当前值重新计算人民币预算
     if 'budget' in update_data or 'exchange_rate' in update_data:
-        budget = update_data.get('budget', project.budget)
-        exchange_rate = update_data.get('exchange_rate', project.exchange_rate)
+        budget = update_data.get('budget', Project.budget)
+        exchange_rate = update_data.get('exchange_rate', Project.exchange_rate)
         update_data['budget_cny'] = budget * exchange_rate
+        await apply_project_change_history(
+            db, Project.id == project_id, budget_cny=update_data['budget_cny']
+        )
     
-    # 处理services字段
-    if 'services' in update_data and update_data['services']:
-        update_data['services'] = [item.dict() for item in update_data['services']]
+    # 服务使用次数需要旧的服务列表（RETURNING 只能返回更新后的值）
+    if 'services' in update_data:
+        result = await db.execute(select(Project.services).where(Project.id == project_id))
+        services_before = result.scalar()
     
-    if update_data:
-        stmt = update(Project).where(Project.id == project_id).values(**update_data)
-        await db.execute(stmt)
-        await db.commit()
-        
-        # 重新查询更新后的项目
-        result = await db.execute(query)
-        project = result.scalar_one()
+    project = await update_project_returning(db, project_id, update_data)
+    
+    if 'services' in update_data:
+        await replace_project_services(db, project_id, update_data['services'])
+        await apply_usage_delta(db, services_before, update_data['services'])
+    if PROJECT_SEARCH_FIELDS & update_data.keys():
+        await reindex_projects(db, Project.id == project_id)
+    await bump_data_version(db, "projects")
+    await db.commit()
+    await publish_project_event("project.updated", project)
     
     return ResponseModel[ProjectResponse](
         data=ProjectResponse.model_validate(project)
@@ -283,10 +369,20 @@ async def delete_project(
             detail="项目不存在"
         )
     
-    # 删除项目
+    history_before = project_contribution(project.status, project.budget_cny)
+    
+    # 删除项目及服务明细、成员分配
+    await db.execute(delete(ProjectService).where(ProjectService.project_id == project_id))
+    await db.execute(delete(ProjectAssignment).where(ProjectAssignment.project_id == project_id))
     stmt = delete(Project).where(Project.id == project_id)
     await db.execute(stmt)
+    
+    await apply_history_delta(db, project.client_id, history_delta(history_before, None))
+    await apply_usage_delta(db, project.services, None)
+    await remove_search_documents(db, PROJECT, [project_id])
+    await bump_data_version(db, "projects", "assignments")
     await db.commit()
+    await project_events.publish("project.deleted", project_id, project.client_id)
     
     return ResponseModel[dict](
         data={"message": "项目删除成功"}
@@ -302,31 +398,82 @@ async def update_project_status(
 ):
     """更新项目状态"""
     
-    # 检查项目是否存在
-    query = select(Project).where(Project.id == project_id)
-    result = await db.execute(query)
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="项目不存在"
-        )
+    # 先按项目当前状态更新客户项目历史，再更新项目
+    await apply_project_change_history(db, Project.id == project_id, status=status_data.status)
+    project = await update_project_returning(db, project_id, {"status": status_data.status})
     
-    # 更新状态
-    stmt = update(Project).where(Project.id == project_id).values(status=status_data.status)
-    await db.execute(stmt)
+    await bump_data_version(db, "projects")
     await db.commit()
-    
-    # 重新查询项目
-    result = await db.execute(query)
-    project = result.scalar_one()
+    await publish_project_event("project.status", project)
     
     return ResponseModel[ProjectResponse](
         data=ProjectResponse.model_validate(project)
     )
 
 
+@router.post("/bulk/status", response_model=ResponseModel[ProjectBulkResponse])
+async def bulk_update_project_status(
+    transition: ProjectBulkStatusUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量变更项目状态
+    
+    指定 from_status 时只移动处于该状态的项目；已处于目标状态的项目不做修改。
+    客户项目历史和项目状态各用一条语句更新，全部在同一事务内完成。
+    """
+    
+    requested_ids = list(dict.fromkeys(transition.ids))
+    condition = and_(Project.id.in_(requested_ids), Project.status != transition.status)
+    if transition.from_status is not None:
+        condition = and_(condition, Project.status == transition.from_status)
+    
+    await apply_project_change_history(db, condition, status=transition.status)
+    result = await db.execute(
+        update(Project)
+        .where(condition)
+        .values(status=transition.status)
+        .returning(Project)
+    )
+    updated_projects = result.scalars().all()
+    updated_ids = {project.id for project in updated_projects}
+    
+    # 未更新的项目区分为不存在和状态不符
+    skipped = {}
+    missing_ids = [pid for pid in requested_ids if pid not in updated_ids]
+    if missing_ids:
+        result = await db.execute(
+            select(Project.id, Project.status).where(Project.id.in_(missing_ids))
+        )
+        skipped = dict(result.fetchall())
+    
+    if updated_ids:
+        await bump_data_version(db, "projects")
+    await db.commit()
+    for project in updated_projects:
+        await publish_project_event("project.status", project)
+    
+    results = []
+    for pid in requested_ids:
+        if pid in updated_ids:
+            results.append(ProjectBulkItemResult(id=pid, success=True, message=f"状态已更新为 {transition.status.value}"))
+        elif pid in skipped:
+            current = skipped[pid]
+            message = "项目已处于目标状态" if current == transition.status else f"项目当前状态为 {current.value}"
+            results.append(ProjectBulkItemResult(id=pid, success=False, message=message))
+        else:
+            results.append(ProjectBulkItemResult(id=pid, success=False, message="项目不存在"))
+    
+    return ResponseModel[ProjectBulkResponse](
+        data=ProjectBulkResponse(
+            total=len(results),
+            success_count=len(updated_ids),
+            error_count=len(results) - len(updated_ids),
+            results=results
+        )
+    )
+
+
 @router.put("/{project_id}/progress", response_model=ResponseModel[ProjectResponse])
 async def update_project_progress(
     project_id: int,
@@ -336,25 +483,10 @@ async def update_project_progress(
 ):
     """更新项目进度"""
     
-    # 检查项目是否存在
-    query = select(Project).where(Project.id == project_id)
-    result = await db.execute(query)
-    project = result.scalar_one_or_none()
-    
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="项目不存在"
-        )
-    
-    # 更新进度
-    stmt = update(Project).where(Project.id == project_id).values(progress=progress_data.progress)
-    await db.execute(stmt)
+    project = await update_project_returning(db, project_id, {"progress": progress_data.progress})
+    await bump_data_version(db, "projects")
     await db.commit()
-    
-    # 重新查询项目
-    result = await db.execute(query)
-    project = result.scalar_one()
+    await publish_project_event("project.progress", project)
     
     return ResponseModel[ProjectResponse](
         data=ProjectResponse.model_validate(project)
@@ -363,39 +495,77 @@ async def update_project_progress(
 
 @router.get("/gantt/data", response_model=ResponseModel[List[GanttProject]])
 async def get_gantt_data(
+    request: Request,
+    start: Optional[date] = Query(None, description="可见范围开始日期（默认今天前90天）"),
+    end: Optional[date] = Query(None, description="可见范围结束日期（默认今天后180天）"),
+    status: Optional[List[ProjectStatus]] = Query(None, description="项目状态筛选（可多选）"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取甘特图数据"""
-    
-    # 查询所有项目
-    query = select(Project).where(Project.deadline.isnot(None))
-    result = await db.execute(query)
-    projects = result.scalars().all()
+    """获取甘特图数据（只返回与可见范围重叠的项目）"""
     
-    gantt_data = []
-    for project in projects:
-        # 简化的甘特图数据，实际应用中可能需要更复杂的任务分解
-        gantt_project = GanttProject(
-            id=project.protocol_number,
-            name=project.name,
-            start=project.created_at.strftime("%Y-%m-%d"),
-            end=project.deadline.strftime("%Y-%m-%d") if project.deadline else project.created_at.strftime("%Y-%m-%d"),
-            progress=project.progress,
-            dependencies=[],
-            tasks=[
-                {
-                    "id": f"{project.protocol_number}_task1",
-                    "name": "需求分析",
-                    "start": project.created_at.strftime("%Y-%m-%d"),
-                    "end": (project.created_at).strftime("%Y-%m-%d"),
-                    "progress": 100 if project.progress > 10 else project.progress * 10
-                }
-            ]
+    today = date.today()
+    start = start or today - timedelta(days=GANTT_DEFAULT_DAYS_BEFORE)
+    end = end or today + timedelta(days=GANTT_DEFAULT_DAYS_AFTER)
+    if end < start:
+        raise HTTPException(
+            status_code=400,
+            detail="结束日期不能早于开始日期"
+        )
+    if (end - start).days > GANTT_MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"时间范围不能超过 {GANTT_MAX_WINDOW_DAYS} 天"
         )
-        gantt_data.append(gantt_project)
     
-    return ResponseModel[List[GanttProject]](data=gantt_data)
+    # 以数据版本和查询参数生成ETag，数据未变化时返回304
+    version = await get_data_version(db, "projects")
+    status_key = ",".join(sorted(s.value for s in status)) if status else ""
+    fingerprint = f"{version}|{start}|{end}|{status_key}"
+    etag = f'W/"gantt-{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    # 与可见范围重叠：截止日期不早于开始日期，且创建时间不晚于结束日期
+    window_start = datetime.combine(start, datetime.min.time())
+    window_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    query = select(
+        Project.protocol_number, Project.name, Project.status,
+        Project.created_at, Project.deadline, Project.progress
+    ).where(
+        and_(
+            Project.deadline.isnot(None),
+            Project.deadline >= window_start,
+            Project.created_at < window_end
+        )
+    )
+    if status:
+        query = query.where(Project.status.in_(status))
+    query = query.order_by(Project.deadline, Project.created_at)
+    
+    async def iter_gantt_json():
+        # 在生成器内用独立会话按批读取结果并逐个编码输出，不在内存中保留完整结果集
+        yield '{"code":200,"message":"success","data":['
+        index = 0
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions(GANTT_STREAM_BATCH_SIZE):
+                for row in partition:
+                    gantt_project = GanttProject(
+                        id=row.protocol_number,
+                        name=row.name,
+                        status=row.status,
+                        start=row.created_at.strftime("%Y-%m-%d"),
+                        end=row.deadline.strftime("%Y-%m-%d"),
+                        progress=row.progress
+                    )
+                    yield ("," if index else "") + gantt_project.model_dump_json()
+                    index += 1
+        yield f'],"timestamp":{json.dumps(datetime.now().isoformat())}}}'
+    
+    return StreamingResponse(iter_gantt_json(), media_type="application/json", headers=headers)
 
 
 @router.get("/{project_id}/contract", response_model=ResponseModel[dict])
@@ -442,13 +612,7 @@ async def get_project_contract(
             "payment_terms": "预付30%，完成阶段50%，交付完成20%"
         },
         "services": project.services or [],
-        "terms_and_conditions": [
-            "甲方应按时提供项目所需的技术资料和设计要求",
-            "乙方保证按照合同约定的时间和质量完成项目交付",
-            "项目修改超过3次将产生额外费用",
-            "最终交付物包括高清渲染图和源文件",
-            "版权归属甲方，乙方保留作品展示权利"
-        ],
+        "terms_and_conditions": CONTRACT_TERMS,
         "created_at": project.created_at.isoformat(),
         "status": "草稿" if project.status == "reporting" else "正式"
     }
@@ -475,41 +639,10 @@ async def generate_project_contract(
             detail="项目不存在"
         )
     
-    # 生成合同文件名
-    contract_filename = f"NFLAB_Contract_{project.protocol_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
-    contract_path = CONTRACTS_DIR / contract_filename
-    
-    # 模拟PDF生成过程
-    # 实际应用中应该使用专业的PDF生成库如reportlab
-    contract_content = f"""
-NFLAB 建筑渲染服务合同
-
-合同编号: NFLAB-{project.protocol_number}
-项目名称: {project.name}
-客户公司: {project.client.company_name if project.client else '未知客户'}
-联系人: {project.client.contact_person if project.client else 'N/A'}
-
-项目预算: {project.currency} {project.budget:,.2f} (约合人民币 ¥{project.budget_cny:,.2f})
-截止日期: {project.deadline.strftime('%Y年%m月%d日') if project.deadline else '待定'}
-
-服务内容:
-{json.dumps(project.services, ensure_ascii=False, indent=2) if project.services else '待定'}
-
-合同条款:
-1. 甲方应按时提供项目所需的技术资料和设计要求
-2. 乙方保证按照合同约定的时间和质量完成项目交付
-3. 项目修改超过3次将产生额外费用
-4. 最终交付物包括高清渲染图和源文件
-5. 版权归属甲方，乙方保留作品展示权利
-
-签约日期: {datetime.now().strftime('%Y年%m月%d日')}
-
-甲方签字:________________  乙方签字:________________
-    """
-    
-    # 写入文件（实际应用中应生成PDF）
-    with open(contract_path, 'w', encoding='utf-8') as f:
-        f.write(contract_content)
+    # 按合同内容哈希缓存，内容未变化时直接返回已生成的PDF
+    payload = build_contract_payload(project, project.client)
+    contract_path = await get_contract_pdf(payload, CONTRACTS_DIR)
+    contract_filename = f"NFLAB_Contract_{project.protocol_number}.pdf"
     
     # 返回文件下载响应
     return FileResponse(
@@ -523,24 +656,98 @@ NFLAB 建筑渲染服务合同
 @router.get("/services/templates", response_model=ResponseModel[Dict[str, List[Dict[str, Any]]]])
 async def get_service_templates(
     project_type: Optional[str] = Query(None, description="项目类型筛选"),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取服务项目模板"""
-    
-    if project_type and project_type in SERVICE_TEMPLATES:
-        # 返回指定类型的模板
-        templates = {project_type: SERVICE_TEMPLATES[project_type]}
-    else:
-        # 返回所有模板
-        templates = SERVICE_TEMPLATES
+    """获取服务项目模板（含使用次数，未知类型返回全部模板）"""
     
-    # 添加使用统计信息
-    for category, services in templates.items():
-        for service in services:
-            service["usage_count"] = 25 + hash(service["camera"]) % 50  # 模拟使用次数
-            service["category"] = category
+    templates = await get_service_catalog(db, project_type)
     
     return ResponseModel[Dict[str, List[Dict[str, Any]]]](
         data=templates,
         message=f"共获取到 {len(templates)} 个类别的服务模板"
-    ) 
\ No newline at end of file
+    ) 
+
+
+@router.get("/services/analytics", response_model=ResponseModel[Dict[str, Any]])
+async def get_service_analytics(
+    start_date: Optional[datetime] = Query(None, description="项目创建时间起"),
+    end_date: Optional[datetime] = Query(None, description="项目创建时间止"),
+    status: Optional[List[ProjectStatus]] = Query(None, description="项目状态筛选（可多选）"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """按服务类型统计收入、均价和数量，以及按月的数量趋势
+    
+    金额按项目汇率折算为人民币。结果按项目数据版本缓存。
+    """
+    
+    version = await get_data_version(db, "projects")
+    cache_key = (start_date, end_date, tuple(sorted(status or [])))
+    cached = _service_analytics_cache.get(cache_key, version)
+    if cached is not None:
+        return ResponseModel[Dict[str, Any]](data=cached)
+    
+    conditions = []
+    if start_date:
+        conditions.append(Project.created_at >= start_date)
+    if end_date:
+        conditions.append(Project.created_at <= end_date)
+    if status:
+        conditions.append(Project.status.in_(status))
+    
+    revenue_cny = func.sum(ProjectService.price * Project.exchange_rate)
+    summary_query = (
+        select(
+            ProjectService.camera,
+            func.count(func.distinct(ProjectService.project_id)).label("project_count"),
+            func.sum(ProjectService.qty).label("quantity"),
+            revenue_cny.label("revenue_cny"),
+            func.avg(ProjectService.unit_price * Project.exchange_rate).label("avg_unit_price_cny"),
+        )
+        .join(Project, Project.id == ProjectService.project_id)
+        .where(*conditions)
+        .group_by(ProjectService.camera)
+        .order_by(revenue_cny.desc())
+    )
+    summary = await db.execute(summary_query)
+    
+    month = month_bucket(Project.created_at)
+    trend_query = (
+        select(
+            month.label("month"),
+            ProjectService.camera,
+            func.sum(ProjectService.qty).label("quantity"),
+            revenue_cny.label("revenue_cny"),
+        )
+        .join(Project, Project.id == ProjectService.project_id)
+        .where(*conditions)
+        .group_by(month, ProjectService.camera)
+        .order_by(month, ProjectService.camera)
+    )
+    trend = await db.execute(trend_query)
+    
+    data = {
+        "services": [
+            {
+                "camera": row.camera,
+                "project_count": row.project_count,
+                "quantity": int(row.quantity or 0),
+                "revenue_cny": round(float(row.revenue_cny or 0), 2),
+                "avg_unit_price_cny": round(float(row.avg_unit_price_cny or 0), 2),
+            }
+            for row in summary
+        ],
+        "trend": [
+            {
+                "month": row.month,
+                "camera": row.camera,
+                "quantity": int(row.quantity or 0),
+                "revenue_cny": round(float(row.revenue_cny or 0), 2),
+            }
+            for row in trend
+        ],
+    }
+    _service_analytics_cache.set(cache_key, version, data)
+    
+    return ResponseModel[Dict[str, Any]](data=data)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_
 from typing import List, Dict, Any
 from datetime import datetime, date, timedelta
 import uuid
@@ -16,6 +16,7 @@ from app.models.user import User
 from app.models.project import Project, PaymentStatus
 from app.models.client import Client
 from app.models.team import TeamMember
+from app.services.assignments import utilization_rate, workload_query
 from app.schemas.reports import (
     ReportExportRequest, ReportExportResponse, ReportType, ExportFormat,
     ProjectReportData, ClientReportData, FinanceReportData, TeamReportData
@@ -152,8 +153,7 @@ async def generate_team_report(
     end_date: date = None,
     filters: Dict[str, Any] = None
 ) -> List[TeamReportData]:
-    """生成团队报表数据"""
-    query = select(TeamMember)
+    """生成团队报表数据（项目数和利用率按报表期间内有效的项目分配分组统计）"""
     
     # 应用筛选条件
     conditions = []
@@ -163,27 +163,25 @@ async def generate_team_report(
         if filters.get("status"):
             conditions.append(TeamMember.status == filters["status"])
     
-    if conditions:
-        query = query.where(*conditions)
-    
+    workload = workload_query(and_(*conditions) if conditions else None, start_date, end_date).subquery()
+    query = (
+        select(TeamMember, workload.c.project_count, workload.c.allocation_total)
+        .join(workload, workload.c.member_id == TeamMember.id)
+    )
     result = await db.execute(query)
-    members = result.scalars().all()
     
     report_data = []
-    for member in members:
-        current_projects = member.current_projects or []
-        workload = len(current_projects)
-        
+    for member, project_count, allocation_total in result.all():
         # 计算月度薪资
-        monthly_salary = member.unit_price + (workload * 500)  # 基础薪资 + 项目奖金
+        monthly_salary = member.unit_price + (project_count * 500)  # 基础薪资 + 项目奖金
         
         report_data.append(TeamReportData(
             member_id=member.id,
             member_name=member.name,
             department=member.department,
             unit_price=member.unit_price,
-            current_projects=workload,
-            workload=workload * 0.8,  # 假设利用率
+            current_projects=project_count,
+            workload=utilization_rate(allocation_total),
             monthly_salary=monthly_salary,
             status=member.status
         ))
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.core.database import get_db
+from app.models.user import User
+from app.schemas.common import ResponseModel
+from app.schemas.search import SearchResponse, SearchResultItem, SearchRebuildResponse
+from app.api.deps import get_current_active_user
+from app.services.search import ENTITY_TYPES, rebuild_search_index, search_documents
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ResponseModel[SearchResponse])
+async def global_search(
+    q: str = Query(..., min_length=1, max_length=100, description="搜索关键词"),
+    types: Optional[str] = Query(None, description="实体类型，逗号分隔：project,client,member,file"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """全局搜索（项目、客户、团队成员、文件）
+
+    协议编号前缀（如 NF2501）精确匹配的项目排在最前，
+    其余结果按全文索引相关度排序。
+    """
+    entity_types = None
+    if types:
+        entity_types = [item.strip() for item in types.split(",") if item.strip()]
+        invalid = [item for item in entity_types if item not in ENTITY_TYPES]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"不支持的实体类型: {', '.join(invalid)}"
+            )
+    
+    results = await search_documents(db, q.strip(), entity_types, limit)
+    
+    return ResponseModel[SearchResponse](
+        data=SearchResponse(
+            query=q,
+            total=len(results),
+            results=[SearchResultItem(**item) for item in results]
+        )
+    )
+
+
+@router.post("/rebuild", response_model=ResponseModel[SearchRebuildResponse])
+async def rebuild_search(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """全量重建搜索索引（仅管理员）"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以重建搜索索引"
+        )
+    
+    counts = await rebuild_search_index(db)
+    await db.commit()
+    
+    return ResponseModel[SearchRebuildResponse](
+        data=SearchRebuildResponse(counts=counts),
+        message="搜索索引重建完成"
+    )
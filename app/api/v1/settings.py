@@ -10,10 +10,14 @@ from app.api.deps import get_current_user, get_async_session
 from app.schemas.settings import (
     SystemConfigResponse, SystemConfigUpdate,
     ExchangeRateResponse, ExchangeRateUpdate,
-    BusinessConfigResponse, BusinessConfigUpdate
+    BusinessConfigResponse, BusinessConfigUpdate,
+    RevaluationRequest, RevaluationJobResponse
 )
 from app.models.user import User
 from app.models.project import Currency
+from app.services.revaluation import (
+    changed_currencies, create_revaluation_job, get_revaluation_job, run_revaluation_job
+)
 
 router = APIRouter()
 
@@ -63,6 +67,11 @@ _config_cache = {
 }
 
 
+def get_protocol_number_prefix() -> str:
+    """当前业务配置中的协议编号前缀"""
+    return _config_cache["business_config"].get("protocol_number_prefix") or "NFLAB"
+
+
 @router.get("/system", response_model=SystemConfigResponse)
 async def get_system_config(
     current_user: User = Depends(get_current_user)
@@ -92,6 +101,41 @@ async def update_system_config(
     )
 
 
+def schedule_revaluation(
+    background_tasks: BackgroundTasks,
+    old_rates: Dict[Currency, float],
+    current_user: User
+) -> Optional[str]:
+    """汇率变化后在后台重估相关货币的项目预算，返回任务ID"""
+    currencies = changed_currencies(old_rates, _config_cache["exchange_rates"])
+    if not currencies:
+        return None
+    job = create_revaluation_job(_config_cache["exchange_rates"], currencies, created_by=current_user.id)
+    background_tasks.add_task(run_revaluation_job, job["job_id"])
+    return job["job_id"]
+
+
+def build_revaluation_response(job: dict) -> RevaluationJobResponse:
+    total = job["total"]
+    if job["status"] == "completed":
+        progress = 100.0
+    else:
+        progress = round(job["processed"] / total * 100, 1) if total else 0.0
+    return RevaluationJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        currencies=job["currencies"],
+        statuses=job["statuses"],
+        total=total,
+        processed=job["processed"],
+        updated=job["updated"],
+        progress=progress,
+        created_at=job["created_at"],
+        completed_at=job["completed_at"],
+        error=job["error"]
+    )
+
+
 @router.get("/exchange-rates", response_model=ExchangeRateResponse)
 async def get_exchange_rates(
     current_user: User = Depends(get_current_user)
@@ -108,9 +152,12 @@ async def get_exchange_rates(
 @router.put("/exchange-rates", response_model=ExchangeRateResponse)
 async def update_exchange_rates(
     rate_data: ExchangeRateUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
-    """更新汇率"""
+    """更新汇率（汇率变化时在后台重估进行中项目的人民币预算）"""
+    
+    old_rates = dict(_config_cache["exchange_rates"])
     
     # 更新汇率
     if rate_data.rates:
@@ -126,7 +173,8 @@ async def update_exchange_rates(
         rates=_config_cache["exchange_rates"],
         base_currency="USD",
         last_updated=_config_cache["last_updated"],
-        auto_sync=_config_cache["business_config"]["auto_exchange_rate_sync"]
+        auto_sync=_config_cache["business_config"]["auto_exchange_rate_sync"],
+        revaluation_job_id=schedule_revaluation(background_tasks, old_rates, current_user)
     )
 
 
@@ -166,13 +214,15 @@ async def sync_exchange_rates(
     
     if live_rates:
         # 更新汇率
+        old_rates = dict(_config_cache["exchange_rates"])
         _config_cache["exchange_rates"].update(live_rates)
         _config_cache["last_updated"] = datetime.now()
         
         return {
             "message": "汇率同步成功",
             "updated_currencies": list(live_rates.keys()),
-            "sync_time": _config_cache["last_updated"]
+            "sync_time": _config_cache["last_updated"],
+            "revaluation_job_id": schedule_revaluation(background_tasks, old_rates, current_user)
         }
     else:
         return {
@@ -181,6 +231,37 @@ async def sync_exchange_rates(
         }
 
 
+@router.post("/exchange-rates/revalue", response_model=RevaluationJobResponse)
+async def revalue_projects(
+    request: RevaluationRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """按当前汇率重估项目的人民币预算（后台分批执行）"""
+    
+    currencies = request.currencies or [currency for currency in Currency if currency != Currency.CNY]
+    job = create_revaluation_job(
+        _config_cache["exchange_rates"], currencies, request.statuses, created_by=current_user.id
+    )
+    background_tasks.add_task(run_revaluation_job, job["job_id"])
+    
+    return build_revaluation_response(job)
+
+
+@router.get("/exchange-rates/revalue/{job_id}", response_model=RevaluationJobResponse)
+async def get_revaluation_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """查询项目预算重估进度"""
+    
+    job = get_revaluation_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="重估任务不存在")
+    
+    return build_revaluation_response(job)
+
+
 @router.get("/business", response_model=BusinessConfigResponse)
 async def get_business_config(
     current_user: User = Depends(get_current_user)
@@ -227,10 +308,12 @@ async def export_all_settings(
 @router.post("/import")
 async def import_settings(
     settings_data: Dict[str, Any],
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     """导入配置"""
     
+    old_rates = dict(_config_cache["exchange_rates"])
     try:
         # 验证配置数据
         if "system_config" in settings_data:
@@ -244,7 +327,11 @@ async def import_settings(
         
         _config_cache["last_updated"] = datetime.now()
         
-        return {"message": "配置导入成功", "import_time": _config_cache["last_updated"]}
+        return {
+            "message": "配置导入成功",
+            "import_time": _config_cache["last_updated"],
+            "revaluation_job_id": schedule_revaluation(background_tasks, old_rates, current_user)
+        }
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"配置导入失败: {str(e)}")
@@ -253,12 +340,16 @@ async def import_settings(
 @router.post("/reset")
 async def reset_settings(
     setting_type: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     """重置配置到默认值"""
     
+    revaluation_job_id = None
     if setting_type == "exchange_rates":
+        old_rates = dict(_config_cache["exchange_rates"])
         _config_cache["exchange_rates"] = DEFAULT_EXCHANGE_RATES.copy()
+        revaluation_job_id = schedule_revaluation(background_tasks, old_rates, current_user)
         message = "汇率配置已重置为默认值"
     
     elif setting_type == "system":
@@ -296,4 +387,8 @@ async def reset_settings(
     
     _config_cache["last_updated"] = datetime.now()
     
-    return {"message": message, "reset_time": _config_cache["last_updated"]} 
\ No newline at end of file
+    return {
+        "message": message,
+        "reset_time": _config_cache["last_updated"],
+        "revaluation_job_id": revaluation_job_id
+    } 
\ No newline at end of file
@@ -1,28 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, update, delete, func, and_, or_, desc
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import calendar
 
 from app.core.database import get_async_session
 from app.core.auth import get_current_user
+from app.core.cache import bump_data_version
+from app.core.sql import dialect_insert, encode_cursor, decode_cursor, keyset_before
 from app.models.user import User
-from app.models.team import TeamMember, Department, MemberStatus
+from app.models.team import TeamMember, Department, MemberStatus, MemberSkill, ProjectAssignment, PayrollRecord
 from app.models.project import Project
 from app.schemas.team import (
     TeamMemberCreate, TeamMemberUpdate, TeamMemberResponse,
     TeamMemberList, WorkloadResponse, PaymentCreate, PaymentResponse,
     PaymentStatus as PaymentStatusEnum, PaymentStatus, PaymentStatusUpdate,
-    PaymentHistoryResponse
+    PaymentHistoryResponse, ProjectAssignmentCreate, ProjectAssignmentResponse,
+    AssignmentMatrix, AssignmentMatrixResponse, StaffingCandidate,
+    SalaryCalculation, SalaryCalculationResponse, WorkloadForecast, WorkloadForecastResponse
 )
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import PaginatedResponse, CursorPage
+from app.services.assignments import (
+    apply_assignment_matrix, assignment_overlaps, current_projects_by_member, replace_member_assignments,
+    utilization_rate, workload_query
+)
+from app.services.staffing import search_staffing, sync_member_skills
+from app.services.workload import DEFAULT_OVERLOAD_THRESHOLD, MAX_FORECAST_DAYS, forecast_team_workload
+from app.services.payroll import upsert_month_payroll
+from app.services.search import MEMBER, MEMBER_SEARCH_FIELDS, member_document, remove_search_documents, upsert_search_documents
 
 router = APIRouter()
 
-# 薪资支付记录存储（实际应用中应该用数据库表）
-_payment_records = {}
-_payment_id_counter = 1
+async def build_member_responses(db: AsyncSession, members: List[TeamMember]) -> List[TeamMemberResponse]:
+    """构建成员响应，当前项目由项目分配表一次查询得到"""
+    projects = await current_projects_by_member(db, [member.id for member in members])
+    responses = []
+    for member in members:
+        response = TeamMemberResponse.from_orm(member)
+        response.current_projects = projects[member.id]
+        responses.append(response)
+    return responses
 
 
 @router.get("/members", response_model=PaginatedResponse[TeamMemberResponse])
@@ -70,7 +88,7 @@ async def get_team_members(
     members = result.scalars().all()
     
     return PaginatedResponse(
-        items=[TeamMemberResponse.from_orm(member) for member in members],
+        items=await build_member_responses(db, members),
         total=total,
         page=skip // limit + 1,
         size=limit,
@@ -95,6 +113,10 @@ async def create_team_member(
     # 创建新成员
     member = TeamMember(**member_data.dict())
     db.add(member)
+    await db.flush()
+    await sync_member_skills(db, member.id, member.skills)
+    await upsert_search_documents(db, [member_document(member)])
+    await bump_data_version(db, "team")
     await db.commit()
     await db.refresh(member)
     
@@ -116,7 +138,7 @@ async def get_team_member(
     if not member:
         raise HTTPException(status_code=404, detail="团队成员不存在")
     
-    return TeamMemberResponse.from_orm(member)
+    return (await build_member_responses(db, [member]))[0]
 
 
 @router.put("/members/{member_id}", response_model=TeamMemberResponse)
@@ -140,10 +162,15 @@ async def update_team_member(
     for field, value in update_data.items():
         setattr(member, field, value)
     
+    if "skills" in update_data:
+        await sync_member_skills(db, member_id, member.skills)
+    if MEMBER_SEARCH_FIELDS & update_data.keys():
+        await upsert_search_documents(db, [member_document(member)])
+    await bump_data_version(db, "team")
     await db.commit()
     await db.refresh(member)
     
-    return TeamMemberResponse.from_orm(member)
+    return (await build_member_responses(db, [member]))[0]
 
 
 @router.delete("/members/{member_id}")
@@ -161,12 +188,52 @@ async def delete_team_member(
     if not member:
         raise HTTPException(status_code=404, detail="团队成员不存在")
     
+    await db.execute(delete(ProjectAssignment).where(ProjectAssignment.member_id == member_id))
+    await db.execute(delete(MemberSkill).where(MemberSkill.member_id == member_id))
+    # 薪资记录保留成员姓名和部门快照
+    await db.execute(update(PayrollRecord).where(PayrollRecord.member_id == member_id).values(member_id=None))
     await db.delete(member)
+    await remove_search_documents(db, MEMBER, [member_id])
+    await bump_data_version(db, "team", "assignments")
     await db.commit()
     
     return {"message": "团队成员已删除"}
 
 
+@router.get("/staffing", response_model=List[StaffingCandidate])
+async def search_staffing_candidates(
+    skills: List[str] = Query([], description="技能（可多个，不区分大小写）"),
+    match_all: bool = Query(True, description="是否需要具备全部技能"),
+    department: Optional[Department] = Query(None, description="部门筛选"),
+    status: Optional[MemberStatus] = Query(MemberStatus.ACTIVE, description="状态筛选"),
+    start_date: Optional[date] = Query(None, description="负荷统计开始日期（默认今天）"),
+    end_date: Optional[date] = Query(None, description="负荷统计结束日期"),
+    max_load: Optional[float] = Query(None, ge=0, description="最高投入比例合计（%）"),
+    limit: int = Query(20, ge=1, le=100, description="返回数量"),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """人员配置搜索：按技能、部门、状态和当前负荷筛选成员，空闲程度高的排在前面"""
+    
+    candidates = await search_staffing(
+        db, skills, match_all, department, status, start_date, end_date, max_load, limit
+    )
+    return [
+        StaffingCandidate(
+            member_id=candidate["member"].id,
+            member_name=candidate["member"].name,
+            department=candidate["member"].department,
+            status=candidate["member"].status,
+            skills=candidate["member"].skills or [],
+            matched_skills=candidate["matched_skills"],
+            project_count=candidate["project_count"],
+            current_load=candidate["current_load"],
+            available_capacity=max(100 - candidate["current_load"], 0)
+        )
+        for candidate in candidates
+    ]
+
+
 @router.get("/workload", response_model=List[WorkloadResponse])
 async def get_team_workload(
     start_date: Optional[date] = Query(None, description="开始日期"),
@@ -175,37 +242,76 @@ async def get_team_workload(
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    """获取团队工作量统计"""
-    
-    # 获取团队成员
-    query = select(TeamMember)
+    """获取团队工作量统计
+
+    统计区间默认从今天起一周。项目数、预计工时和利用率使用同一套有效分配规则
+    （进行中的项目，未填写开始日期时取项目创建日，逾期项目仍然计入），
+    预计工时和利用率取自按同样规则计算的每日负荷。
+    """
+    
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=6)
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_FORECAST_DAYS:
+        raise HTTPException(status_code=400, detail=f"统计区间需在1到{MAX_FORECAST_DAYS}天之间")
+    
+    member_condition = TeamMember.status == MemberStatus.ACTIVE
     if department:
-        query = query.where(TeamMember.department == department)
-    query = query.where(TeamMember.status == MemberStatus.ACTIVE)
-    
-    result = await db.execute(query)
-    members = result.scalars().all()
+        member_condition = and_(member_condition, TeamMember.department == department)
+    
+    workload = workload_query(member_condition, start_date, end_date).subquery()
+    query = (
+        select(TeamMember.id, TeamMember.name, TeamMember.department,
+               workload.c.project_count, workload.c.allocation_total)
+        .join(workload, workload.c.member_id == TeamMember.id)
+        .order_by(TeamMember.id)
+    )
+    rows = (await db.execute(query)).all()
+    projects = await current_projects_by_member(db, [row.id for row in rows], start_date, end_date)
+    forecasts = {
+        forecast["member_id"]: forecast
+        for forecast in await forecast_team_workload(db, start_date, days, until_deadline=False)
+    }
     
-    workload_data = []
-    for member in members:
-        # 获取项目工作量
-        current_projects = member.current_projects or []
-        
-        # 计算工作量
-        total_workload = len(current_projects)
-        estimated_hours = total_workload * 40  # 假设每个项目40小时
-        
-        workload_data.append(WorkloadResponse(
-            member_id=member.id,
-            member_name=member.name,
-            department=member.department,
-            current_projects=current_projects,
-            total_workload=total_workload,
-            estimated_hours=estimated_hours,
-            utilization_rate=min(total_workload * 0.8, 1.0)  # 假设利用率
-        ))
+    return [
+        WorkloadResponse(
+            member_id=row.id,
+            member_name=row.name,
+            department=row.department,
+            current_projects=projects[row.id],
+            total_workload=row.project_count,
+            estimated_hours=forecasts[row.id]["estimated_hours"],
+            utilization_rate=utilization_rate(forecasts[row.id]["average_load"])
+        )
+        for row in rows
+    ]
+
+
+@router.get("/workload/forecast", response_model=WorkloadForecastResponse)
+async def get_workload_forecast(
+    start_date: Optional[date] = Query(None, description="预测开始日期（默认今天）"),
+    days: int = Query(90, ge=1, le=MAX_FORECAST_DAYS, description="预测天数"),
+    threshold: float = Query(DEFAULT_OVERLOAD_THRESHOLD, gt=0, description="超负荷阈值（%）"),
+    department: Optional[Department] = Query(None, description="部门筛选"),
+    overloaded_only: bool = Query(False, description="只返回有超负荷日期的成员"),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """团队负荷预测：按分配区间和项目截止日期计算每个成员的每日负荷并标记超负荷日期"""
     
-    return workload_data
+    start_date = start_date or date.today()
+    forecasts = await forecast_team_workload(db, start_date, days, threshold)
+    if department:
+        forecasts = [forecast for forecast in forecasts if forecast["department"] == department]
+    if overloaded_only:
+        forecasts = [forecast for forecast in forecasts if forecast["overload_days"]]
+    
+    return WorkloadForecastResponse(
+        start_date=start_date,
+        days=days,
+        threshold=threshold,
+        members=[WorkloadForecast(**forecast) for forecast in forecasts]
+    )
 
 
 @router.put("/members/{member_id}/workload")
@@ -215,7 +321,7 @@ async def assign_member_workload(
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    """分配项目工作量"""
+    """分配项目工作量（替换成员的项目分配）"""
     
     query = select(TeamMember).where(TeamMember.id == member_id)
     result = await db.execute(query)
@@ -225,254 +331,375 @@ async def assign_member_workload(
         raise HTTPException(status_code=404, detail="团队成员不存在")
     
     # 验证项目是否存在
-    project_query = select(Project).where(Project.id.in_(project_ids))
+    project_ids = list(dict.fromkeys(project_ids))
+    project_query = select(func.count(Project.id)).where(Project.id.in_(project_ids))
     project_result = await db.execute(project_query)
-    projects = project_result.scalars().all()
     
-    if len(projects) != len(project_ids):
+    if project_result.scalar() != len(project_ids):
         raise HTTPException(status_code=400, detail="部分项目不存在")
     
-    # 更新成员的当前项目
-    member.current_projects = [{"id": p.id, "name": p.name} for p in projects]
+    await replace_member_assignments(db, member_id, project_ids)
+    await bump_data_version(db, "assignments")
     await db.commit()
     
     return {"message": "工作量分配成功", "assigned_projects": len(project_ids)}
 
 
-@router.post("/payments/calculate")
-async def calculate_monthly_salary(
-    year: int = Query(..., description="年份"),
-    month: int = Query(..., description="月份", ge=1, le=12),
+def assignment_select():
+    return (
+        select(ProjectAssignment, TeamMember.name, Project.name)
+        .join(TeamMember, TeamMember.id == ProjectAssignment.member_id)
+        .join(Project, Project.id == ProjectAssignment.project_id)
+    )
+
+
+def assignment_response(assignment: ProjectAssignment, member_name: str, project_name: str) -> ProjectAssignmentResponse:
+    return ProjectAssignmentResponse(
+        id=assignment.id,
+        member_id=assignment.member_id,
+        member_name=member_name,
+        project_id=assignment.project_id,
+        project_name=project_name,
+        role=assignment.role,
+        allocation=assignment.allocation,
+        start_date=assignment.start_date,
+        end_date=assignment.end_date
+    )
+
+
+@router.get("/assignments", response_model=List[ProjectAssignmentResponse])
+async def get_project_assignments(
+    project_id: Optional[int] = Query(None, description="项目ID"),
+    member_id: Optional[int] = Query(None, description="成员ID"),
+    active_on: Optional[date] = Query(None, description="只返回该日期有效的分配"),
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    """计算月度薪资"""
+    """获取项目分配（按项目查成员、按成员查项目）"""
+    
+    query = assignment_select()
+    if project_id:
+        query = query.where(ProjectAssignment.project_id == project_id)
+    if member_id:
+        query = query.where(ProjectAssignment.member_id == member_id)
+    if active_on:
+        query = query.where(assignment_overlaps(active_on))
+    
+    result = await db.execute(query.order_by(ProjectAssignment.project_id, ProjectAssignment.member_id))
+    return [assignment_response(*row) for row in result.all()]
+
+
+@router.post("/assignments", response_model=ProjectAssignmentResponse)
+async def save_project_assignment(
+    assignment_data: ProjectAssignmentCreate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """创建或更新项目分配（同一成员和项目只保留一条）"""
     
-    # 获取所有活跃成员
-    query = select(TeamMember).where(TeamMember.status == MemberStatus.ACTIVE)
-    result = await db.execute(query)
-    members = result.scalars().all()
+    member_result = await db.execute(select(TeamMember.id).where(TeamMember.id == assignment_data.member_id))
+    if member_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="团队成员不存在")
+    project_result = await db.execute(select(Project.id).where(Project.id == assignment_data.project_id))
+    if project_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    
+    values = assignment_data.dict()
+    stmt = dialect_insert(db, ProjectAssignment).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProjectAssignment.member_id, ProjectAssignment.project_id],
+        set_={**{key: stmt.excluded[key] for key in ("role", "allocation", "start_date", "end_date")},
+              "updated_at": func.now()}
+    ).returning(ProjectAssignment.id)
+    assignment_id = (await db.execute(stmt)).scalar_one()
+    await bump_data_version(db, "assignments")
+    await db.commit()
     
-    salary_calculations = []
-    global _payment_id_counter
+    result = await db.execute(assignment_select().where(ProjectAssignment.id == assignment_id))
+    return assignment_response(*result.one())
+
+
+@router.put("/assignments/matrix", response_model=AssignmentMatrixResponse)
+async def save_assignment_matrix(
+    matrix: AssignmentMatrix,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """按成员 × 项目矩阵批量保存投入比例（0表示取消分配，全部变更在同一事务内完成）"""
+    
+    member_result = await db.execute(select(TeamMember.id).where(TeamMember.id.in_(matrix.member_ids)))
+    missing_members = set(matrix.member_ids) - set(member_result.scalars().all())
+    if missing_members:
+        raise HTTPException(status_code=400, detail=f"团队成员不存在: {sorted(missing_members)}")
+    project_result = await db.execute(select(Project.id).where(Project.id.in_(matrix.project_ids)))
+    missing_projects = set(matrix.project_ids) - set(project_result.scalars().all())
+    if missing_projects:
+        raise HTTPException(status_code=400, detail=f"项目不存在: {sorted(missing_projects)}")
+    
+    counts = await apply_assignment_matrix(
+        db, matrix.member_ids, matrix.project_ids, matrix.allocations, matrix.start_date, matrix.end_date
+    )
+    if counts["created"] or counts["updated"] or counts["removed"]:
+        await bump_data_version(db, "assignments")
+    await db.commit()
     
-    for member in members:
-        # 计算基础薪资
-        base_salary = member.unit_price
-        
-        # 根据工作量计算奖金
-        current_projects = member.current_projects or []
-        project_bonus = len(current_projects) * 500  # 每个项目500元奖金
-        
-        total_salary = base_salary + project_bonus
-        
-        # 创建薪资支付记录
-        payment_record = {
-            "payment_id": _payment_id_counter,
-            "member_id": member.id,
-            "member_name": member.name,
-            "department": member.department,
-            "year": year,
-            "month": month,
-            "base_salary": base_salary,
-            "project_bonus": project_bonus,
-            "total_salary": total_salary,
-            "payment_status": PaymentStatus.PENDING,
-            "calculated_at": datetime.now(),
-            "paid_at": None,
-            "notes": ""
-        }
-        
-        _payment_records[_payment_id_counter] = payment_record
-        _payment_id_counter += 1
-        
-        salary_calculations.append({
-            "payment_id": payment_record["payment_id"],
-            "member_id": member.id,
-            "member_name": member.name,
-            "base_salary": base_salary,
-            "project_bonus": project_bonus,
-            "total_salary": total_salary,
-            "calculation_date": datetime.now().date()
-        })
+    return AssignmentMatrixResponse(**counts)
+
+
+@router.delete("/assignments/{assignment_id}")
+async def delete_project_assignment(
+    assignment_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """删除项目分配"""
     
-    return {
-        "year": year,
-        "month": month,
-        "calculations": salary_calculations,
-        "total_amount": sum(calc["total_salary"] for calc in salary_calculations),
-        "created_payments": len(salary_calculations)
-    }
+    result = await db.execute(
+        delete(ProjectAssignment).where(ProjectAssignment.id == assignment_id).returning(ProjectAssignment.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="项目分配不存在")
+    await bump_data_version(db, "assignments")
+    await db.commit()
+    
+    return {"message": "项目分配已删除"}
+
+
+def payment_response(record: PayrollRecord) -> PaymentResponse:
+    return PaymentResponse(
+        payment_id=record.id,
+        member_id=record.member_id,
+        member_name=record.member_name,
+        department=record.department,
+        year=record.year,
+        month=record.month,
+        price_type=record.price_type,
+        project_count=record.project_count,
+        work_hours=record.work_hours,
+        base_salary=record.base_salary,
+        project_bonus=record.project_bonus,
+        piece_amount=record.piece_amount,
+        total_salary=record.total_salary,
+        payment_status=record.payment_status,
+        calculated_at=record.calculated_at,
+        paid_at=record.paid_at,
+        notes=record.notes or ""
+    )
+
+
+@router.post("/payments/calculate", response_model=SalaryCalculationResponse)
+async def calculate_monthly_salary(
+    year: int = Query(..., description="年份", ge=2000, le=2100),
+    month: int = Query(..., description="月份", ge=1, le=12),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """计算月度薪资
+
+    按项目分配和计价方式一次性计算所有在职成员，结果写入薪资记录表。
+    可重复调用：只有输入发生变化且尚未支付的记录会被重算。
+    """
+    
+    counts = await upsert_month_payroll(db, year, month)
+    await db.commit()
+    
+    result = await db.execute(
+        select(PayrollRecord)
+        .where(PayrollRecord.year == year, PayrollRecord.month == month, PayrollRecord.member_id.is_not(None))
+        .order_by(PayrollRecord.member_id)
+    )
+    records = result.scalars().all()
+    
+    return SalaryCalculationResponse(
+        year=year,
+        month=month,
+        calculations=[
+            SalaryCalculation(
+                payment_id=record.id,
+                member_id=record.member_id,
+                member_name=record.member_name,
+                base_salary=record.base_salary,
+                project_bonus=record.project_bonus,
+                piece_amount=record.piece_amount,
+                total_salary=record.total_salary,
+                calculation_date=record.calculated_at.date()
+            )
+            for record in records
+        ],
+        total_amount=sum(record.total_salary for record in records),
+        created_payments=counts["created"],
+        updated_payments=counts["updated"],
+        unchanged_payments=counts["unchanged"],
+        locked_payments=counts["locked"]
+    )
 
 
 @router.put("/payments/{payment_id}/status", response_model=PaymentResponse)
 async def update_payment_status(
     payment_id: int,
     status_data: PaymentStatusUpdate,
+    db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """更新薪资支付状态"""
     
-    if payment_id not in _payment_records:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="薪资支付记录不存在"
-        )
-    
-    payment_record = _payment_records[payment_id]
-    
-    # 更新状态
-    payment_record["payment_status"] = status_data.payment_status
-    payment_record["notes"] = status_data.notes or payment_record["notes"]
+    values = {"payment_status": status_data.payment_status}
+    if status_data.notes:
+        values["notes"] = status_data.notes
     
     # 如果状态改为已支付，记录支付时间
     if status_data.payment_status == PaymentStatus.PAID:
-        payment_record["paid_at"] = datetime.now()
+        values["paid_at"] = datetime.now()
     elif status_data.payment_status == PaymentStatus.PENDING:
-        payment_record["paid_at"] = None
-    
-    return PaymentResponse(
-        payment_id=payment_record["payment_id"],
-        member_id=payment_record["member_id"],
-        member_name=payment_record["member_name"],
-        department=payment_record["department"],
-        year=payment_record["year"],
-        month=payment_record["month"],
-        base_salary=payment_record["base_salary"],
-        project_bonus=payment_record["project_bonus"],
-        total_salary=payment_record["total_salary"],
-        payment_status=payment_record["payment_status"],
-        calculated_at=payment_record["calculated_at"],
-        paid_at=payment_record["paid_at"],
-        notes=payment_record["notes"]
+        values["paid_at"] = None
+    
+    result = await db.execute(
+        update(PayrollRecord)
+        .where(PayrollRecord.id == payment_id)
+        .values(**values)
+        .returning(PayrollRecord)
+        .execution_options(synchronize_session=False)
     )
+    payment_record = result.scalar_one_or_none()
+    if payment_record is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="薪资支付记录不存在"
+        )
+    await db.commit()
+    
+    return payment_response(payment_record)
+
+
+def payroll_conditions(
+    member_id: Optional[int] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    payment_status: Optional[PaymentStatus] = None
+) -> list:
+    conditions = []
+    if member_id:
+        conditions.append(PayrollRecord.member_id == member_id)
+    if year:
+        conditions.append(PayrollRecord.year == year)
+    if month:
+        conditions.append(PayrollRecord.month == month)
+    if payment_status:
+        conditions.append(PayrollRecord.payment_status == payment_status)
+    return conditions
 
 
-@router.get("/payments/history", response_model=List[PaymentHistoryResponse])
+@router.get("/payments/history", response_model=CursorPage[PaymentHistoryResponse])
 async def get_payment_history(
     member_id: Optional[int] = Query(None, description="成员ID"),
     year: Optional[int] = Query(None, description="年份"),
     month: Optional[int] = Query(None, description="月份"),
     payment_status: Optional[PaymentStatus] = Query(None, description="支付状态"),
     limit: int = Query(50, ge=1, le=200, description="返回记录数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 nextCursor"),
+    db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    """获取薪资支付历史记录"""
-    
-    # 筛选记录
-    filtered_records = []
-    
-    for payment_record in _payment_records.values():
-        # 应用筛选条件
-        if member_id and payment_record["member_id"] != member_id:
-            continue
-        if year and payment_record["year"] != year:
-            continue
-        if month and payment_record["month"] != month:
-            continue
-        if payment_status and payment_record["payment_status"] != payment_status:
-            continue
-        
-        filtered_records.append(payment_record)
-    
-    # 按时间倒序排序
-    filtered_records.sort(key=lambda x: x["calculated_at"], reverse=True)
-    
-    # 限制返回数量
-    filtered_records = filtered_records[:limit]
+    """获取薪资支付历史记录（按计算时间倒序，游标分页）"""
+    
+    conditions = payroll_conditions(member_id, year, month, payment_status)
+    if cursor:
+        try:
+            calculated_at, last_id = decode_cursor(cursor)
+            calculated_at = datetime.fromisoformat(calculated_at)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="无效的分页游标")
+        conditions.append(keyset_before((PayrollRecord.calculated_at, PayrollRecord.id), (calculated_at, last_id)))
+    
+    # 多取一条判断是否还有下一页
+    query = (
+        select(PayrollRecord)
+        .where(*conditions)
+        .order_by(desc(PayrollRecord.calculated_at), desc(PayrollRecord.id))
+        .limit(limit + 1)
+    )
+    result = await db.execute(query)
+    records = result.scalars().all()
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(records[-1].calculated_at, records[-1].id)
     
     # 转换为响应格式
     history_records = []
-    for record in filtered_records:
+    for record in records:
         # 计算工作天数（简化计算）
         working_days = 22  # 假设每月22个工作日
-        daily_rate = record["total_salary"] / working_days if working_days > 0 else 0
+        daily_rate = record.total_salary / working_days if working_days > 0 else 0
         
         history_records.append(PaymentHistoryResponse(
-            payment_id=record["payment_id"],
-            member_id=record["member_id"],
-            member_name=record["member_name"],
-            department=record["department"],
-            period=f"{record['year']}-{record['month']:02d}",
-            total_salary=record["total_salary"],
-            payment_status=record["payment_status"],
-            paid_at=record["paid_at"],
+            payment_id=record.id,
+            member_id=record.member_id,
+            member_name=record.member_name,
+            department=record.department,
+            period=f"{record.year}-{record.month:02d}",
+            total_salary=record.total_salary,
+            payment_status=record.payment_status,
+            paid_at=record.paid_at,
             working_days=working_days,
             daily_rate=daily_rate,
-            notes=record["notes"]
+            notes=record.notes
         ))
     
-    return history_records
+    return CursorPage[PaymentHistoryResponse](list=history_records, nextCursor=next_cursor, pageSize=limit)
 
 
 @router.get("/payments/summary")
 async def get_payment_summary(
     year: Optional[int] = Query(None, description="年份"),
     month: Optional[int] = Query(None, description="月份"),
+    db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
-    """获取薪资支付汇总统计"""
-    
-    # 筛选记录
-    filtered_records = []
-    for payment_record in _payment_records.values():
-        if year and payment_record["year"] != year:
-            continue
-        if month and payment_record["month"] != month:
-            continue
-        filtered_records.append(payment_record)
-    
-    if not filtered_records:
-        return {
-            "period": f"{year}-{month:02d}" if year and month else "全部",
-            "total_payments": 0,
-            "total_amount": 0,
-            "paid_amount": 0,
-            "pending_amount": 0,
-            "payment_statistics": {
-                "paid": 0,
-                "pending": 0,
-                "cancelled": 0
-            },
-            "department_breakdown": {}
-        }
-    
-    # 统计数据
-    total_payments = len(filtered_records)
-    total_amount = sum(record["total_salary"] for record in filtered_records)
-    paid_amount = sum(record["total_salary"] for record in filtered_records 
-                     if record["payment_status"] == PaymentStatus.PAID)
-    pending_amount = sum(record["total_salary"] for record in filtered_records 
-                        if record["payment_status"] == PaymentStatus.PENDING)
-    
-    # 状态统计
-    payment_statistics = {
-        "paid": len([r for r in filtered_records if r["payment_status"] == PaymentStatus.PAID]),
-        "pending": len([r for r in filtered_records if r["payment_status"] == PaymentStatus.PENDING]),
-        "cancelled": len([r for r in filtered_records if r["payment_status"] == PaymentStatus.CANCELLED])
-    }
+    """获取薪资支付汇总统计
+
+    一条按部门和支付状态分组的查询，部门小计与总计由分组结果汇总得出。
+    """
+    
+    query = (
+        select(
+            PayrollRecord.department,
+            PayrollRecord.payment_status,
+            func.count(PayrollRecord.id),
+            func.coalesce(func.sum(PayrollRecord.total_salary), 0)
+        )
+        .where(*payroll_conditions(year=year, month=month))
+        .group_by(PayrollRecord.department, PayrollRecord.payment_status)
+    )
+    result = await db.execute(query)
+    groups = result.all()
     
-    # 部门统计
+    payment_statistics = {status_value.value: 0 for status_value in PaymentStatus}
+    amounts = {status_value.value: 0.0 for status_value in PaymentStatus}
     department_breakdown = {}
-    for record in filtered_records:
-        dept = record["department"]
-        if dept not in department_breakdown:
-            department_breakdown[dept] = {
-                "count": 0,
-                "total_amount": 0,
-                "paid_amount": 0
-            }
-        department_breakdown[dept]["count"] += 1
-        department_breakdown[dept]["total_amount"] += record["total_salary"]
-        if record["payment_status"] == PaymentStatus.PAID:
-            department_breakdown[dept]["paid_amount"] += record["total_salary"]
+    for department, payment_status, count, amount in groups:
+        payment_statistics[payment_status.value] += count
+        amounts[payment_status.value] += amount
+        breakdown = department_breakdown.setdefault(department.value, {
+            "count": 0,
+            "total_amount": 0,
+            "paid_amount": 0
+        })
+        breakdown["count"] += count
+        breakdown["total_amount"] += amount
+        if payment_status == PaymentStatus.PAID:
+            breakdown["paid_amount"] += amount
+    
+    total_amount = sum(amounts.values())
+    paid_amount = amounts[PaymentStatus.PAID.value]
     
     return {
         "period": f"{year}-{month:02d}" if year and month else "全部",
-        "total_payments": total_payments,
+        "total_payments": sum(payment_statistics.values()),
         "total_amount": total_amount,
         "paid_amount": paid_amount,
-        "pending_amount": pending_amount,
+        "pending_amount": amounts[PaymentStatus.PENDING.value],
         "payment_rate": (paid_amount / total_amount * 100) if total_amount > 0 else 0,
         "payment_statistics": payment_statistics,
         "department_breakdown": department_breakdown
@@ -485,46 +712,17 @@ async def get_payment_records(
     year: Optional[int] = Query(None, description="年份"),
     month: Optional[int] = Query(None, description="月份"),
     payment_status: Optional[PaymentStatus] = Query(None, description="支付状态"),
+    db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """获取薪资支付记录"""
     
-    # 筛选记录
-    filtered_records = []
-    
-    for payment_record in _payment_records.values():
-        # 应用筛选条件
-        if member_id and payment_record["member_id"] != member_id:
-            continue
-        if year and payment_record["year"] != year:
-            continue
-        if month and payment_record["month"] != month:
-            continue
-        if payment_status and payment_record["payment_status"] != payment_status:
-            continue
-        
-        filtered_records.append(payment_record)
-    
     # 按时间倒序排序
-    filtered_records.sort(key=lambda x: x["calculated_at"], reverse=True)
-    
-    # 转换为响应格式
-    payment_responses = []
-    for record in filtered_records:
-        payment_responses.append(PaymentResponse(
-            payment_id=record["payment_id"],
-            member_id=record["member_id"],
-            member_name=record["member_name"],
-            department=record["department"],
-            year=record["year"],
-            month=record["month"],
-            base_salary=record["base_salary"],
-            project_bonus=record["project_bonus"],
-            total_salary=record["total_salary"],
-            payment_status=record["payment_status"],
-            calculated_at=record["calculated_at"],
-            paid_at=record["paid_at"],
-            notes=record["notes"]
-        ))
+    query = (
+        select(PayrollRecord)
+        .where(*payroll_conditions(member_id, year, month, payment_status))
+        .order_by(desc(PayrollRecord.calculated_at), desc(PayrollRecord.id))
+    )
+    result = await db.execute(query)
     
-    return payment_responses 
\ No newline at end of file
+    return [payment_response(record) for record in result.scalars().all()] 
\ No newline at end of file
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import dialect_insert
+from app.models.system import DataVersion
+
+
+async def get_data_version(db: AsyncSession, scope: str) -> int:
+    """获取业务范围的当前数据版本（主键索引单行查询）"""
+    result = await db.execute(
+        select(DataVersion.version).where(DataVersion.scope == scope)
+    )
+    return result.scalar() or 0
+
+
+async def get_data_versions(db: AsyncSession, *scopes: str) -> Tuple[int, ...]:
+    """一次查询获取多个业务范围的数据版本"""
+    result = await db.execute(
+        select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))
+    )
+    versions = dict(result.fetchall())
+    return tuple(versions.get(scope, 0) for scope in scopes)
+
+
+async def bump_data_version(db: AsyncSession, *scopes: str) -> None:
+    """在当前事务内递增数据版本
+
+    与业务写入一起提交，回滚时版本也随之回滚；
+    多个 worker 通过同一张表判断缓存是否失效。
+    """
+    for scope in scopes:
+        stmt = dialect_insert(db, DataVersion).values(scope=scope, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DataVersion.scope],
+            set_={"version": DataVersion.version + 1}
+        )
+        await db.execute(stmt)
+
+
+class VersionedCache:
+    """按数据版本失效的进程内缓存
+
+    缓存项记录写入时的数据版本，读取时版本不一致即视为未命中。
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: Any) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None or item[0] != version:
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def set(self, key: Hashable, version: Any, value: Any) -> Any:
+        self._items[key] = (version, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._items.clear()
@@ -37,10 +37,16 @@ class Settings(BaseSettings):
     # Redis配置
     REDIS_URL: str = "redis://localhost:6379"
     
+    # 项目事件后端：local（单进程）或 redis（多 worker 共享）
+    EVENT_BACKEND: str = "local"
+    
     # 文件上传配置
     UPLOAD_MAX_SIZE: int = 50 * 1024 * 1024  # 50MB
     UPLOAD_DIR: str = "uploads"
     
+    # 合同PDF渲染进程数
+    CONTRACT_RENDER_WORKERS: int = 2
+    
     # 汇率API配置
     EXCHANGE_RATE_API_KEY: Optional[str] = None
     
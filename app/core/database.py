@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from app.core.config import settings
@@ -18,7 +20,9 @@ engine = create_async_engine(
     database_url,
     echo=settings.DEBUG,
     future=True,
-    pool_pre_ping=True if "postgresql" in database_url else False
+    pool_pre_ping=True if "postgresql" in database_url else False,
+    # SQLite 只允许一个写事务，并发写入时等待写锁而不是立即报 database is locked
+    connect_args={"timeout": 30} if database_url.startswith("sqlite") else {}
 )
 
 # 创建异步会话工厂
@@ -31,6 +35,20 @@ AsyncSessionLocal = async_sessionmaker(
 # 创建数据库基类
 Base = declarative_base()
 
+# SQLite 的忙等待不保证先到先得，高并发写入时个别事务会一直抢不到写锁直到超时；
+# 热点写事务在进程内按到达顺序排队后再进入数据库
+_sqlite_write_lock = asyncio.Lock() if database_url.startswith("sqlite") else None
+
+
+@asynccontextmanager
+async def serialized_write():
+    """SQLite 下按到达顺序串行执行写事务（其他数据库由行锁排队，直接执行）"""
+    if _sqlite_write_lock is None:
+        yield
+        return
+    async with _sqlite_write_lock:
+        yield
+
 
 # 数据库依赖
 async def get_db():
@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 事件频道（Redis 后端的发布订阅频道名）
+PROJECT_EVENTS_CHANNEL = "nflab:project-events"
+
+# 每个订阅者最多缓存的未发送事件数，超出时丢弃最旧的事件
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Redis 订阅断开后的重连等待时间（秒），连续失败时逐次加倍直到上限
+RECONNECT_BACKOFF_SECONDS = 1
+RECONNECT_BACKOFF_MAX_SECONDS = 30
+
+
+class LocalEventBackend:
+    """进程内事件后端：事件直接分发给本进程的订阅者（单 worker 部署）"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str], None]] = None
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: str) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+
+class RedisEventBackend:
+    """Redis 发布订阅后端：多个 worker 之间共享事件
+
+    每个 worker 只维持一个订阅连接，收到的事件再分发给本进程的订阅者。
+    """
+
+    def __init__(self, url: str, channel: str = PROJECT_EVENTS_CHANNEL):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str], None]) -> None:
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(self.url, decode_responses=True)
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _listen(self, pubsub, deliver: Callable[[str], None]) -> None:
+        """持续接收订阅消息；连接断开或订阅结束后按退避时间重新订阅，直到 stop()"""
+        backoff = RECONNECT_BACKOFF_SECONDS
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._redis.pubsub()
+                    await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    backoff = RECONNECT_BACKOFF_SECONDS
+                    if message.get("type") == "message":
+                        deliver(message["data"])
+                logger.warning("Redis 事件订阅已结束，%s 秒后重新订阅", backoff)
+            except Exception:
+                logger.exception("Redis 事件订阅中断，%s 秒后重新订阅", backoff)
+            finally:
+                if pubsub is not None:
+                    with contextlib.suppress(Exception):
+                        await pubsub.aclose()
+                    pubsub = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX_SECONDS)
+
+    async def publish(self, message: str) -> None:
+        await self._redis.publish(self.channel, message)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def create_event_backend():
+    """按配置创建事件后端"""
+    if settings.EVENT_BACKEND == "redis":
+        return RedisEventBackend(settings.REDIS_URL)
+    return LocalEventBackend()
+
+
+class Subscription:
+    """单个订阅者：按项目ID或客户ID过滤事件"""
+
+    def __init__(self, project_ids: Optional[Iterable[int]] = None, client_ids: Optional[Iterable[int]] = None):
+        self.project_ids: Set[int] = set(project_ids or [])
+        self.client_ids: Set[int] = set(client_ids or [])
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if not self.project_ids and not self.client_ids:
+            return True
+        return event.get("project_id") in self.project_ids or event.get("client_id") in self.client_ids
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # 慢速订阅者只保留最新的事件
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """项目事件代理
+
+    业务接口在事务提交后发布事件，后端负责跨进程传递，
+    代理把收到的事件分发给本进程中匹配的订阅者。
+    """
+
+    def __init__(self, backend_factory: Callable[[], Any] = create_event_backend):
+        self._backend_factory = backend_factory
+        self._backend = None
+        self._start_lock = asyncio.Lock()
+        self._subscribers: Set[Subscription] = set()
+
+    async def _ensure_started(self) -> None:
+        if self._backend is not None:
+            return
+        async with self._start_lock:
+            if self._backend is None:
+                backend = self._backend_factory()
+                await backend.start(self._dispatch)
+                self._backend = backend
+
+    def _dispatch(self, message: str) -> None:
+        """分发一条事件；无法解析的消息只记录日志，不影响后续事件"""
+        try:
+            event = json.loads(message)
+        except (TypeError, ValueError):
+            logger.warning("忽略无法解析的项目事件: %.200r", message)
+            return
+        if not isinstance(event, dict):
+            logger.warning("忽略格式不正确的项目事件: %.200r", message)
+            return
+        for subscription in list(self._subscribers):
+            if subscription.matches(event):
+                subscription.offer(event)
+
+    async def publish(self, event_type: str, project_id: int, client_id: Optional[int] = None, data: Any = None) -> None:
+        """发布项目事件（失败只记录日志，不影响业务接口）"""
+        event = {
+            "type": event_type,
+            "project_id": project_id,
+            "client_id": client_id,
+            "data": data,
+            "timestamp": datetime.now().isoformat(),
+        }
+        try:
+            await self._ensure_started()
+            await self._backend.publish(json.dumps(event, ensure_ascii=False, default=str))
+        except Exception:
+            logger.exception("发布项目事件失败: %s", event_type)
+
+    async def subscribe(self, project_ids: Optional[Iterable[int]] = None, client_ids: Optional[Iterable[int]] = None) -> Subscription:
+        await self._ensure_started()
+        subscription = Subscription(project_ids, client_ids)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    async def shutdown(self) -> None:
+        if self._backend is not None:
+            await self._backend.stop()
+            self._backend = None
+
+
+project_events = EventBroker()
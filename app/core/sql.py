@@ -0,0 +1,115 @@
+import base64
+import json
+from sqlalchemy import String, case, cast, literal, literal_column, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
+
+
+def dialect_name(db: AsyncSession) -> str:
+    """获取当前会话使用的数据库方言名称"""
+    return db.bind.dialect.name
+
+
+def dialect_insert(db: AsyncSession, table):
+    """构建支持 ON CONFLICT 的 INSERT 语句（SQLite / PostgreSQL）"""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+class month_bucket(FunctionElement):
+    """按月分桶表达式，输出 YYYY-MM 字符串"""
+    type = String()
+    name = "month_bucket"
+    inherit_cache = True
+
+
+@compiles(month_bucket)
+def _compile_month_bucket_sqlite(element, compiler, **kw):
+    # 格式串内联输出，保证 SELECT 与 GROUP BY 中的表达式完全一致
+    column = list(element.clauses)[0]
+    return compiler.process(func.strftime(literal_column("'%Y-%m'"), column), **kw)
+
+
+@compiles(month_bucket, "postgresql")
+def _compile_month_bucket_postgresql(element, compiler, **kw):
+    column = list(element.clauses)[0]
+    return compiler.process(func.to_char(column, literal_column("'YYYY-MM'")), **kw)
+
+
+def json_array_elements(db: AsyncSession, column):
+    """将JSON数组列展开为表值函数
+
+    返回 (elements, is_array)：elements 只有一列 value，
+    is_array 用于过滤掉非数组的历史数据。
+    SQLite 使用 json_each，PostgreSQL 使用 jsonb_array_elements_text。
+    """
+    if dialect_name(db) == "postgresql":
+        document = cast(column, JSONB)
+        is_array = func.jsonb_typeof(document) == "array"
+        # 非数组值替换为空数组，避免展开标量时报错
+        safe_document = case((is_array, document), else_=cast(literal("[]"), JSONB))
+        elements = func.jsonb_array_elements_text(safe_document).table_valued("value")
+    else:
+        elements = func.json_each(column).table_valued("value")
+        is_array = func.json_type(column) == "array"
+    return elements, is_array
+
+
+def json_increment(db: AsyncSession, column, deltas: dict):
+    """生成对JSON对象中数值字段做原子增量的表达式
+
+    用于 UPDATE ... SET column = <expr>，由数据库在行锁内完成读改写，
+    并发事务不会互相覆盖计数。缺失的字段按 0 处理。
+    """
+    if dialect_name(db) == "postgresql":
+        document = func.coalesce(cast(column, JSONB), cast(literal("{}"), JSONB))
+        changes = []
+        for key, delta in deltas.items():
+            changes.extend([
+                literal(key),
+                func.coalesce(column[key].as_float(), 0) + delta
+            ])
+        merged = document.op("||")(func.jsonb_build_object(*changes))
+        return cast(merged, column.type)
+    
+    arguments = [func.coalesce(column, literal("{}", String))]
+    for key, delta in deltas.items():
+        arguments.extend([
+            f"$.{key}",
+            func.coalesce(func.json_extract(column, f"$.{key}"), 0) + delta
+        ])
+    return func.json_set(*arguments)
+
+
+def encode_cursor(*values) -> str:
+    """把上一页最后一行的排序键编码为游标"""
+    payload = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("无效的游标") from e
+    if not isinstance(values, list):
+        raise ValueError("无效的游标")
+    return values
+
+
+def keyset_before(columns, values):
+    """降序键集分页条件：(c1, c2, ...) < (v1, v2, ...)
+
+    展开为 OR/AND 形式，SQLite 和 PostgreSQL 都能利用 (c1, c2, ...) 上的索引。
+    """
+    conditions = []
+    for index, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        conditions.append(and_(*equal_prefix, column < value))
+    return or_(*conditions)
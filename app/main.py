@@ -13,6 +13,9 @@ from app.api.v1.files import router as files_router
 from app.api.v1.notifications import router as notifications_router
 from app.api.v1.permissions import router as permissions_router
 from app.api.v1.reports import router as reports_router
+from app.api.v1.search import router as search_router
+from app.services.contracts import shutdown_render_executor
+from app.core.events import project_events
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -36,6 +39,10 @@ app.add_middleware(
 # 添加信任主机中间件
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
+# 关闭时释放合同渲染进程池
+app.add_event_handler("shutdown", shutdown_render_executor)
+app.add_event_handler("shutdown", project_events.shutdown)
+
 # 注册路由
 app.include_router(auth_router, prefix="/api/auth", tags=["认证管理"])
 app.include_router(projects_router, prefix="/api/projects", tags=["项目管理"])
@@ -48,6 +55,7 @@ app.include_router(files_router, prefix="/api/files", tags=["文件管理"])
 app.include_router(notifications_router, prefix="/api/notifications", tags=["通知系统"])
 app.include_router(permissions_router, prefix="/api/permissions", tags=["权限管理"])
 app.include_router(reports_router, prefix="/api/reports", tags=["报表导出"])
+app.include_router(search_router, prefix="/api/search", tags=["全局搜索"])
 
 # 根路径
 @app.get("/")
@@ -1,13 +1,23 @@
 from app.models.base import BaseModel
 from app.models.user import User, UserRole, UserStatus
-from app.models.project import Project, ProjectStatus, PaymentStatus, Currency
+from app.models.project import Project, ProjectStatus, PaymentStatus, Currency, ProjectService, ServiceTemplate
 from app.models.client import Client, ClientStatus, Region
-from app.models.team import TeamMember, Department, PriceType, MemberStatus
+from app.models.team import (
+    TeamMember, Department, PriceType, MemberStatus, MemberSkill, ProjectAssignment, PayrollStatus, PayrollRecord
+)
+from app.models.system import DataVersion, ProtocolSequence
+from app.models.search import SearchDocument
+from app.models.file import FileBlob, FileRecord, UploadSession, UploadPart, UploadStatus
 
 __all__ = [
     "BaseModel",
     "User", "UserRole", "UserStatus",
     "Project", "ProjectStatus", "PaymentStatus", "Currency",
+    "ProjectService", "ServiceTemplate",
     "Client", "ClientStatus", "Region",
-    "TeamMember", "Department", "PriceType", "MemberStatus"
+    "TeamMember", "Department", "PriceType", "MemberStatus", "MemberSkill", "ProjectAssignment",
+    "PayrollStatus", "PayrollRecord",
+    "DataVersion", "ProtocolSequence",
+    "SearchDocument",
+    "FileBlob", "FileRecord", "UploadSession", "UploadPart", "UploadStatus"
 ] 
\ No newline at end of file
@@ -0,0 +1,91 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Enum, ForeignKey, Index, UniqueConstraint
+from app.models.base import BaseModel
+import enum
+
+
+class FileBlob(BaseModel):
+    """按内容寻址的文件内容（SHA-256），相同内容只保存一份
+
+    ref_count 为引用该内容的文件记录数，最后一个引用删除时才删除磁盘文件。
+    """
+    __tablename__ = "file_blobs"
+    
+    checksum = Column(String(64), unique=True, index=True, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    storage_path = Column(String(500), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<FileBlob(checksum='{self.checksum}', ref_count={self.ref_count})>"
+
+
+class FileRecord(BaseModel):
+    """文件元数据模型（文件内容保存在 file_blobs 指向的 uploads/ 文件中）"""
+    __tablename__ = "files"
+    __table_args__ = (
+        # 文件列表按上传时间倒序分页
+        Index("ix_files_uploaded_at_id", "uploaded_at", "id"),
+    )
+    
+    file_id = Column(String(36), unique=True, index=True, nullable=False)
+    original_filename = Column(String(255), nullable=False)
+    stored_filename = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_type = Column(String(20), index=True, nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    checksum = Column(String(64), nullable=True)      # SHA-256
+    blob_id = Column(Integer, ForeignKey("file_blobs.id"), index=True, nullable=True)  # 为空表示单独保存在 file_path 的旧文件
+    project_id = Column(Integer, index=True, nullable=True)
+    description = Column(String(500), nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    uploaded_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<FileRecord(file_id='{self.file_id}', filename='{self.original_filename}')>"
+
+
+class UploadStatus(str, enum.Enum):
+    """断点续传状态枚举"""
+    UPLOADING = "uploading"    # 上传中
+    COMPLETED = "completed"    # 已完成
+
+
+class UploadSession(BaseModel):
+    """断点续传会话模型
+
+    文件按 chunk_size 切分，第 n 块的偏移量为 n × chunk_size，
+    已收到的分块记录在 upload_parts 中，分块内容保存在磁盘上，重启后可继续上传。
+    """
+    __tablename__ = "upload_sessions"
+    
+    upload_id = Column(String(36), unique=True, index=True, nullable=False)
+    filename = Column(String(255), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    checksum = Column(String(64), nullable=True)      # 客户端提供的 SHA-256，完成时校验
+    project_id = Column(Integer, nullable=True)
+    description = Column(String(500), nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(Enum(UploadStatus), nullable=False, default=UploadStatus.UPLOADING)
+    file_id = Column(String(36), nullable=True)       # 完成后生成的文件ID
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<UploadSession(upload_id='{self.upload_id}', filename='{self.filename}')>"
+
+
+class UploadPart(BaseModel):
+    """断点续传已完成的分块"""
+    __tablename__ = "upload_parts"
+    __table_args__ = (
+        UniqueConstraint("session_id", "part_number", name="uq_upload_parts_session_part"),
+    )
+    
+    session_id = Column(Integer, ForeignKey("upload_sessions.id", ondelete="CASCADE"), nullable=False)
+    part_number = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    
+    def __repr__(self):
+        return f"<UploadPart(session_id={self.session_id}, part_number={self.part_number})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, Float, DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, Float, DateTime, Enum, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 import enum
@@ -37,6 +37,14 @@ class Currency(str, enum.Enum):
 class Project(BaseModel):
     """项目模型"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # 项目列表的筛选与排序：按客户/状态筛选，按创建时间倒序
+        Index("ix_projects_client_id_created_at", "client_id", "created_at"),
+        Index("ix_projects_status_created_at", "status", "created_at"),
+        Index("ix_projects_created_at", "created_at"),
+        # 甘特图按可见时间窗口筛选
+        Index("ix_projects_deadline_created_at", "deadline", "created_at"),
+    )
     
     protocol_number = Column(String(50), unique=True, index=True, nullable=False)
     name = Column(String(200), nullable=False)
@@ -57,4 +65,41 @@ class Project(BaseModel):
     client = relationship("Client", back_populates="projects")
     
     def __repr__(self):
-        return f"<Project(protocol_number='{self.protocol_number}', name='{self.name}')>" 
\ No newline at end of file
+        return f"<Project(protocol_number='{self.protocol_number}', name='{self.name}')>" 
+
+
+class ProjectService(BaseModel):
+    """项目服务明细模型（与 Project.services 同步写入，用于按服务统计）"""
+    __tablename__ = "project_services"
+    __table_args__ = (
+        # 按服务类型统计收入、均价和数量
+        Index("ix_project_services_camera_project_id", "camera", "project_id"),
+    )
+    
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0)   # 在服务列表中的顺序
+    camera = Column(String(100), nullable=False)            # 视角/服务类型
+    qty = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Float, nullable=False, default=0)
+    price = Column(Float, nullable=False, default=0)        # 项目货币金额
+    
+    def __repr__(self):
+        return f"<ProjectService(project_id={self.project_id}, camera='{self.camera}')>"
+
+
+class ServiceTemplate(BaseModel):
+    """服务项目模板模型"""
+    __tablename__ = "service_templates"
+    __table_args__ = (
+        UniqueConstraint("category", "camera", name="uq_service_templates_category_camera"),
+    )
+    
+    category = Column(String(100), nullable=False, index=True)  # 项目类型
+    camera = Column(String(100), nullable=False, index=True)    # 视角/服务名称
+    unit_price = Column(Float, nullable=False, default=0)
+    description = Column(Text, nullable=True)
+    sort_order = Column(Integer, nullable=False, default=0)
+    usage_count = Column(Integer, nullable=False, default=0)    # 使用该服务的项目数
+    
+    def __repr__(self):
+        return f"<ServiceTemplate(category='{self.category}', camera='{self.camera}')>"
\ No newline at end of file
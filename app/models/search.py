@@ -0,0 +1,55 @@
+from sqlalchemy import Column, String, Text, UniqueConstraint, DDL, event
+from app.models.base import BaseModel
+
+
+class SearchDocument(BaseModel):
+    """全局搜索文档模型（项目、客户、团队成员、文件各一行）
+
+    全文索引随表一起创建：SQLite 使用 FTS5 trigram 外部内容表 search_index，
+    由触发器同步；PostgreSQL 使用生成的 tsvector 列和 GIN 索引。
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_key", name="uq_search_documents_entity"),
+    )
+
+    entity_type = Column(String(20), nullable=False, index=True)  # project / client / member / file
+    entity_key = Column(String(64), nullable=False)               # 实体ID（文件为 file_id）
+    title = Column(String(300), nullable=False)
+    subtitle = Column(String(300), nullable=True)
+    content = Column(Text, nullable=True)                         # 参与全文检索的文本
+
+    def __repr__(self):
+        return f"<SearchDocument(entity_type='{self.entity_type}', entity_key='{self.entity_key}')>"
+
+
+# SQLite: FTS5 trigram 索引，支持中文和任意子串匹配（至少3个字符）
+SQLITE_SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "title, content, content='search_documents', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_index(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_index(search_index, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_index(search_index, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO search_index(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+
+# PostgreSQL: 生成的 tsvector 列 + GIN 索引
+POSTGRESQL_SEARCH_INDEX_DDL = [
+    "ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, ''))) STORED",
+    "CREATE INDEX ix_search_documents_search_vector ON search_documents USING gin (search_vector)",
+]
+
+for _statement in SQLITE_SEARCH_INDEX_DDL:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRESQL_SEARCH_INDEX_DDL:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(
+    SearchDocument.__table__, "after_drop",
+    DDL("DROP TABLE IF EXISTS search_index").execute_if(dialect="sqlite")
+)
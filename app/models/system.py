@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class DataVersion(BaseModel):
+    """数据版本模型（按业务范围递增，用于缓存失效）"""
+    __tablename__ = "data_versions"
+    
+    scope = Column(String(50), unique=True, index=True, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DataVersion(scope='{self.scope}', version={self.version})>"
+
+
+class ProtocolSequence(BaseModel):
+    """协议编号序列模型（每个前缀每月一行计数器）"""
+    __tablename__ = "protocol_sequences"
+    __table_args__ = (
+        UniqueConstraint("prefix", "period", name="uq_protocol_sequences_prefix_period"),
+    )
+    
+    prefix = Column(String(20), nullable=False)
+    period = Column(String(4), nullable=False)  # 年月，格式 YYMM
+    last_value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ProtocolSequence(prefix='{self.prefix}', period='{self.period}', last_value={self.last_value})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Date, JSON, Enum
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, JSON, Enum, ForeignKey, Index, UniqueConstraint
 from app.models.base import BaseModel
 import enum
 
@@ -26,6 +26,13 @@ class MemberStatus(str, enum.Enum):
     SUSPENDED = "suspended"    # 暂停
 
 
+class PayrollStatus(str, enum.Enum):
+    """薪资支付状态枚举"""
+    PENDING = "pending"      # 待支付
+    PAID = "paid"           # 已支付
+    CANCELLED = "cancelled"  # 已取消
+
+
 class TeamMember(BaseModel):
     """团队成员模型"""
     __tablename__ = "team_members"
@@ -53,8 +60,87 @@ class TeamMember(BaseModel):
     join_date = Column(Date, nullable=True)
     status = Column(Enum(MemberStatus), nullable=False, default=MemberStatus.ACTIVE)
     
-    # 当前项目
-    current_projects = Column(JSON, nullable=True)  # 当前项目列表
+    def __repr__(self):
+        return f"<TeamMember(name='{self.name}', department='{self.department}')>"
+
+
+class MemberSkill(BaseModel):
+    """成员技能索引（由 TeamMember.skills 同步，技能名归一化为小写）"""
+    __tablename__ = "member_skills"
+    __table_args__ = (
+        UniqueConstraint("member_id", "skill", name="uq_member_skills_member_skill"),
+        # 按技能查成员
+        Index("ix_member_skills_skill_member_id", "skill", "member_id"),
+    )
+    
+    member_id = Column(Integer, ForeignKey("team_members.id", ondelete="CASCADE"), nullable=False)
+    skill = Column(String(100), nullable=False)
+    
+    def __repr__(self):
+        return f"<MemberSkill(member_id={self.member_id}, skill='{self.skill}')>"
+
+
+class ProjectAssignment(BaseModel):
+    """项目分配模型（成员参与项目的角色、投入比例和起止日期）"""
+    __tablename__ = "project_assignments"
+    __table_args__ = (
+        # 按成员查项目（唯一约束的索引）与按项目查成员
+        UniqueConstraint("member_id", "project_id", name="uq_project_assignments_member_project"),
+        Index("ix_project_assignments_project_id_member_id", "project_id", "member_id"),
+    )
+    
+    member_id = Column(Integer, ForeignKey("team_members.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    role = Column(String(50), nullable=True)                 # 项目角色
+    allocation = Column(Integer, nullable=False, default=100)  # 投入比例（%）
+    start_date = Column(Date, nullable=True)                 # 为空表示不限
+    end_date = Column(Date, nullable=True)
+    
+    def __repr__(self):
+        return f"<ProjectAssignment(member_id={self.member_id}, project_id={self.project_id})>"
+
+
+class PayrollRecord(BaseModel):
+    """月度薪资记录模型（每个成员每月一条）
+
+    成员姓名和部门在计算时快照保存，成员删除后记录保留。
+    input_hash 是计算输入（计价方式、单价、分配和服务数量）的摘要，
+    重新计算时只更新输入发生变化且尚未支付的记录。
+    """
+    __tablename__ = "payroll_records"
+    __table_args__ = (
+        UniqueConstraint("member_id", "year", "month", name="uq_payroll_records_member_period"),
+        # 按成员、期间和支付状态筛选
+        Index("ix_payroll_records_member_period_status", "member_id", "year", "month", "payment_status"),
+        # 按期间汇总（不指定成员）
+        Index("ix_payroll_records_period_status", "year", "month", "payment_status"),
+        # 历史记录按计算时间倒序的游标分页
+        Index("ix_payroll_records_calculated_at_id", "calculated_at", "id"),
+    )
+    
+    member_id = Column(Integer, ForeignKey("team_members.id", ondelete="SET NULL"), nullable=True)
+    member_name = Column(String(100), nullable=False)
+    department = Column(Enum(Department), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    
+    # 计算输入
+    price_type = Column(Enum(PriceType), nullable=False)
+    project_count = Column(Integer, nullable=False, default=0)
+    work_hours = Column(Float, nullable=False, default=0)
+    input_hash = Column(String(64), nullable=False)
+    
+    # 计算结果
+    base_salary = Column(Float, nullable=False, default=0)
+    project_bonus = Column(Float, nullable=False, default=0)
+    piece_amount = Column(Float, nullable=False, default=0)   # 鸟瞰/人视/动画计件金额
+    total_salary = Column(Float, nullable=False, default=0)
+    
+    # 支付信息
+    payment_status = Column(Enum(PayrollStatus), nullable=False, default=PayrollStatus.PENDING)
+    calculated_at = Column(DateTime, nullable=False)
+    paid_at = Column(DateTime, nullable=True)
+    notes = Column(String(500), nullable=True)
     
     def __repr__(self):
-        return f"<TeamMember(name='{self.name}', department='{self.department}')>" 
\ No newline at end of file
+        return f"<PayrollRecord(member_id={self.member_id}, period='{self.year}-{self.month:02d}')>"
\ No newline at end of file
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from app.schemas.common import BaseSchema
+from app.schemas.common import BaseSchema, PaginatedResponse
 from app.models.client import ClientStatus, Region
+from app.models.project import ProjectStatus, Currency
 
 
 class BusinessAddress(BaseModel):
@@ -132,4 +133,90 @@ class ClientListQuery(BaseModel):
     page_size: int = 20
     region: Optional[Region] = None
     status: Optional[ClientStatus] = None
-    search: Optional[str] = None 
\ No newline at end of file
+    search: Optional[str] = None 
+
+# 单次批量操作最多影响的客户数（按ID指定或按筛选条件/全部客户选中）
+BULK_MAX_CLIENTS = 1000
+
+
+class ClientBulkFilter(BaseModel):
+    """批量操作的客户筛选条件（至少指定一项）"""
+    region: Optional[Region] = None
+    status: Optional[ClientStatus] = None
+    search: Optional[str] = None
+    
+    @validator('search', always=True)
+    def validate_criteria(cls, v, values):
+        if v is not None and not v.strip():
+            v = None
+        if v is None and values.get('region') is None and values.get('status') is None:
+            raise ValueError('筛选条件不能为空，操作全部客户请使用 all')
+        return v
+
+
+class ClientBulkSelection(BaseModel):
+    """批量操作的目标客户（ID列表、筛选条件或全部客户三选一）"""
+    ids: Optional[List[int]] = None
+    filter: Optional[ClientBulkFilter] = None
+    all: bool = False
+    
+    @validator('all', always=True)
+    def validate_selection(cls, v, values):
+        ids, selected_filter = values.get('ids'), values.get('filter')
+        if sum((ids is not None, selected_filter is not None, v)) != 1:
+            raise ValueError('ids、filter 与 all 必须且只能指定一个')
+        if ids is not None and len(ids) > BULK_MAX_CLIENTS:
+            raise ValueError(f'单次批量操作不能超过{BULK_MAX_CLIENTS}个客户')
+        return v
+
+
+class ClientBulkUpdate(ClientBulkSelection):
+    """批量更新客户请求"""
+    status: Optional[ClientStatus] = None
+    region: Optional[Region] = None
+    timezone: Optional[str] = None
+    language: Optional[List[str]] = None
+    business_type: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+
+
+class ClientBulkTagUpdate(ClientBulkSelection):
+    """批量增删客户标签请求"""
+    add: List[str] = []
+    remove: List[str] = []
+
+
+class ClientBulkItemResult(BaseModel):
+    """单个客户的批量操作结果"""
+    id: int
+    success: bool
+    message: str
+
+
+class ClientBulkResponse(BaseModel):
+    """批量操作响应"""
+    total: int
+    success_count: int
+    error_count: int
+    results: List[ClientBulkItemResult]
+
+
+class ClientProjectItem(BaseSchema):
+    """客户详情中的项目摘要"""
+    id: int
+    protocol_number: str
+    name: str
+    status: ProjectStatus
+    budget: float
+    currency: Currency
+    budget_cny: float
+    progress: int
+    deadline: Optional[datetime]
+    created_at: datetime
+
+
+class ClientDetailResponse(BaseModel):
+    """客户详情聚合响应（客户信息 + 项目分页 + 实时统计）"""
+    client: ClientResponse
+    projects: Optional[PaginatedResponse[ClientProjectItem]] = None
+    aggregates: Optional[ProjectHistory] = None
\ No newline at end of file
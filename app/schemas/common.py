@@ -21,6 +21,13 @@ class PaginatedResponse(BaseModel, Generic[DataType]):
     pageSize: int
 
 
+class CursorPage(BaseModel, Generic[DataType]):
+    """游标分页响应模型（nextCursor 为空表示没有更多数据）"""
+    list: List[DataType]
+    nextCursor: Optional[str] = None
+    pageSize: int
+
+
 class BaseSchema(BaseModel):
     """基础Schema"""
     class Config:
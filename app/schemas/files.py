@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, date
+import re
 from app.models.project import Currency
+from app.models.file import UploadStatus
 
 
 class FileInfoResponse(BaseModel):
@@ -12,10 +14,14 @@ class FileInfoResponse(BaseModel):
     file_type: str = Field(..., description="文件类型")
     mime_type: str = Field(..., description="MIME类型")
     file_size: int = Field(..., description="文件大小（字节）")
+    checksum: Optional[str] = Field(None, description="SHA-256 校验和")
     project_id: Optional[int] = Field(None, description="关联项目ID")
     description: Optional[str] = Field(None, description="文件描述")
     uploaded_by: int = Field(..., description="上传者ID")
     uploaded_at: datetime = Field(..., description="上传时间")
+    
+    class Config:
+        from_attributes = True
 
 
 class FileUploadResponse(BaseModel):
@@ -24,10 +30,42 @@ class FileUploadResponse(BaseModel):
     filename: str = Field(..., description="文件名")
     file_type: str = Field(..., description="文件类型")
     file_size: int = Field(..., description="文件大小（字节）")
+    checksum: Optional[str] = Field(None, description="SHA-256 校验和")
     upload_url: str = Field(..., description="文件访问URL")
     message: str = Field(..., description="上传结果消息")
 
 
+class ResumableUploadCreate(BaseModel):
+    """创建断点续传会话"""
+    filename: str = Field(..., description="文件名", max_length=255)
+    file_size: int = Field(..., description="文件大小（字节）", gt=0)
+    checksum: Optional[str] = Field(None, description="文件 SHA-256（十六进制），完成时校验")
+    chunk_size: Optional[int] = Field(None, description="分块大小（字节），默认8MB")
+    project_id: Optional[int] = Field(None, description="关联项目ID")
+    description: Optional[str] = Field(None, description="文件描述", max_length=500)
+    
+    @validator('checksum')
+    def validate_checksum(cls, v):
+        if v is not None and not re.fullmatch(r'[0-9a-fA-F]{64}', v):
+            raise ValueError('校验和必须是64位十六进制 SHA-256')
+        return v.lower() if v else v
+
+
+class ResumableUploadResponse(BaseModel):
+    """断点续传会话响应模型"""
+    upload_id: str = Field(..., description="上传会话ID")
+    filename: str = Field(..., description="文件名")
+    file_size: int = Field(..., description="文件大小（字节）")
+    chunk_size: int = Field(..., description="分块大小（字节），第n块的偏移量为 n × chunk_size")
+    total_parts: int = Field(..., description="分块总数")
+    received_parts: List[int] = Field([], description="已收到的分块序号")
+    received_bytes: int = Field(0, description="已收到的字节数")
+    status: UploadStatus = Field(..., description="上传状态")
+    file_id: Optional[str] = Field(None, description="完成后的文件ID")
+    expires_at: datetime = Field(..., description="会话过期时间")
+    upload_url: str = Field(..., description="分块上传URL")
+
+
 class ContractGenerateRequest(BaseModel):
     """合同生成请求模型"""
     project_id: int = Field(..., description="项目ID")
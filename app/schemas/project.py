@@ -43,6 +43,36 @@ class ProjectStatusUpdate(BaseModel):
     status: ProjectStatus
 
 
+class ProjectBulkStatusUpdate(BaseModel):
+    """批量变更项目状态请求"""
+    ids: List[int]
+    status: ProjectStatus
+    from_status: Optional[ProjectStatus] = None  # 只移动处于该状态的项目
+    
+    @validator('ids')
+    def validate_ids(cls, v):
+        if not v:
+            raise ValueError('ids 不能为空')
+        if len(v) > 1000:
+            raise ValueError('单次批量操作不能超过1000个项目')
+        return v
+
+
+class ProjectBulkItemResult(BaseModel):
+    """单个项目的批量操作结果"""
+    id: int
+    success: bool
+    message: str
+
+
+class ProjectBulkResponse(BaseModel):
+    """批量操作响应"""
+    total: int
+    success_count: int
+    error_count: int
+    results: List[ProjectBulkItemResult]
+
+
 class ProjectProgressUpdate(BaseModel):
     """更新项目进度"""
     progress: int
@@ -99,6 +129,7 @@ class GanttProject(BaseModel):
     """甘特图项目"""
     id: str
     name: str
+    status: Optional[ProjectStatus] = None
     start: str
     end: str
     progress: int
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+class SearchResultItem(BaseModel):
+    """全局搜索结果项"""
+    entity_type: str = Field(..., description="实体类型：project / client / member / file")
+    entity_id: str = Field(..., description="实体ID（文件为 file_id）")
+    title: str = Field(..., description="标题")
+    subtitle: Optional[str] = Field(None, description="副标题")
+    url: str = Field(..., description="详情接口")
+    score: Optional[float] = Field(None, description="相关度（越大越相关）")
+    exact: bool = Field(False, description="是否为协议编号前缀精确匹配")
+
+
+class SearchResponse(BaseModel):
+    """全局搜索响应"""
+    query: str = Field(..., description="搜索关键词")
+    total: int = Field(..., description="结果数量")
+    results: List[SearchResultItem] = Field(default_factory=list, description="搜索结果")
+
+
+class SearchRebuildResponse(BaseModel):
+    """搜索索引重建结果"""
+    counts: Dict[str, int] = Field(..., description="各类型的文档数")
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from app.models.project import Currency
+from app.models.project import Currency, ProjectStatus
 
 
 class SystemConfigBase(BaseModel):
@@ -57,6 +57,28 @@ class ExchangeRateResponse(BaseModel):
     base_currency: str = Field("USD", description="基准货币")  
     last_updated: datetime = Field(..., description="最后更新时间")
     auto_sync: bool = Field(True, description="自动同步")
+    revaluation_job_id: Optional[str] = Field(None, description="项目预算重估任务ID（汇率变化时）")
+
+
+class RevaluationRequest(BaseModel):
+    """项目人民币预算重估请求"""
+    currencies: Optional[List[Currency]] = Field(None, description="重估的货币（默认全部外币）")
+    statuses: Optional[List[ProjectStatus]] = Field(None, description="重估的项目状态（默认进行中的项目）")
+
+
+class RevaluationJobResponse(BaseModel):
+    """项目人民币预算重估任务响应"""
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态")
+    currencies: List[Currency] = Field(..., description="重估的货币")
+    statuses: List[ProjectStatus] = Field(..., description="重估的项目状态")
+    total: int = Field(0, description="待重估项目数")
+    processed: int = Field(0, description="已处理项目数")
+    updated: int = Field(0, description="已更新项目数")
+    progress: float = Field(0, description="进度(0-100)")
+    created_at: datetime = Field(..., description="创建时间")
+    completed_at: Optional[datetime] = Field(None, description="完成时间")
+    error: Optional[str] = Field(None, description="错误信息")
 
 
 class BusinessConfigBase(BaseModel):
@@ -68,7 +90,7 @@ class BusinessConfigBase(BaseModel):
     default_project_status: str = Field("reporting", description="默认项目状态")
     require_client_approval: bool = Field(True, description="需要客户审批")
     auto_generate_protocol_number: bool = Field(True, description="自动生成协议编号")
-    protocol_number_prefix: str = Field("NFLAB", description="协议编号前缀")
+    protocol_number_prefix: str = Field("NFLAB", description="协议编号前缀", min_length=1, max_length=20)
     tax_rate: float = Field(0.13, description="税率", ge=0, le=1)
     default_payment_terms: int = Field(30, description="默认付款条款(天)", ge=1)
 
@@ -82,7 +104,7 @@ class BusinessConfigUpdate(BaseModel):
     default_project_status: Optional[str] = Field(None, description="默认项目状态")
     require_client_approval: Optional[bool] = Field(None, description="需要客户审批")
     auto_generate_protocol_number: Optional[bool] = Field(None, description="自动生成协议编号")
-    protocol_number_prefix: Optional[str] = Field(None, description="协议编号前缀")
+    protocol_number_prefix: Optional[str] = Field(None, description="协议编号前缀", min_length=1, max_length=20)
     tax_rate: Optional[float] = Field(None, description="税率", ge=0, le=1)
     default_payment_terms: Optional[int] = Field(None, description="默认付款条款(天)", ge=1)
     
@@ -1,15 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
-from enum import Enum
-from app.models.team import Department, PriceType, MemberStatus
-
-
-class PaymentStatus(str, Enum):
-    """支付状态枚举"""
-    PENDING = "pending"      # 待支付
-    PAID = "paid"           # 已支付
-    CANCELLED = "cancelled"  # 已取消
+from app.models.team import Department, PriceType, MemberStatus, PayrollStatus as PaymentStatus
 
 
 class TeamMemberBase(BaseModel):
@@ -89,6 +81,122 @@ class WorkloadResponse(BaseModel):
     utilization_rate: float = Field(0, description="利用率", ge=0, le=1)
 
 
+class OverloadPeriod(BaseModel):
+    """连续超负荷区间"""
+    start_date: date = Field(..., description="开始日期")
+    end_date: date = Field(..., description="结束日期")
+    peak_load: float = Field(..., description="区间内最高负荷（%）")
+
+
+class WorkloadForecast(BaseModel):
+    """成员负荷预测"""
+    member_id: int = Field(..., description="成员ID")
+    member_name: str = Field(..., description="成员姓名")
+    department: Department = Field(..., description="部门")
+    daily_load: List[float] = Field(..., description="每日投入比例合计（%），从 start_date 起按天排列")
+    peak_load: float = Field(..., description="最高负荷（%）")
+    average_load: float = Field(..., description="平均负荷（%）")
+    estimated_hours: float = Field(..., description="预计工时（按工作日折算）")
+    overload_days: int = Field(..., description="超负荷天数")
+    overload_periods: List[OverloadPeriod] = Field([], description="超负荷区间")
+
+
+class WorkloadForecastResponse(BaseModel):
+    """团队负荷预测响应"""
+    start_date: date = Field(..., description="预测开始日期")
+    days: int = Field(..., description="预测天数")
+    threshold: float = Field(..., description="超负荷阈值（%）")
+    members: List[WorkloadForecast] = Field(..., description="成员负荷")
+
+
+class StaffingCandidate(BaseModel):
+    """人员配置候选成员"""
+    member_id: int = Field(..., description="成员ID")
+    member_name: str = Field(..., description="成员姓名")
+    department: Department = Field(..., description="部门")
+    status: MemberStatus = Field(..., description="状态")
+    skills: List[str] = Field([], description="技能列表")
+    matched_skills: List[str] = Field([], description="匹配的技能")
+    project_count: int = Field(0, description="区间内参与项目数")
+    current_load: float = Field(0, description="区间内投入比例合计（%）")
+    available_capacity: float = Field(0, description="剩余可投入比例（%）")
+
+
+class ProjectAssignmentCreate(BaseModel):
+    """创建或更新项目分配"""
+    member_id: int = Field(..., description="成员ID")
+    project_id: int = Field(..., description="项目ID")
+    role: Optional[str] = Field(None, description="项目角色", max_length=50)
+    allocation: int = Field(100, description="投入比例（%）", ge=1, le=100)
+    start_date: Optional[date] = Field(None, description="开始日期")
+    end_date: Optional[date] = Field(None, description="结束日期")
+    
+    @validator('end_date')
+    def validate_end_date(cls, v, values):
+        if v and values.get('start_date') and v < values['start_date']:
+            raise ValueError('结束日期不能早于开始日期')
+        return v
+
+
+class ProjectAssignmentResponse(BaseModel):
+    """项目分配响应模型"""
+    id: int = Field(..., description="分配ID")
+    member_id: int = Field(..., description="成员ID")
+    member_name: str = Field(..., description="成员姓名")
+    project_id: int = Field(..., description="项目ID")
+    project_name: str = Field(..., description="项目名称")
+    role: Optional[str] = Field(None, description="项目角色")
+    allocation: int = Field(..., description="投入比例（%）")
+    start_date: Optional[date] = Field(None, description="开始日期")
+    end_date: Optional[date] = Field(None, description="结束日期")
+
+
+class AssignmentMatrix(BaseModel):
+    """成员 × 项目投入比例矩阵
+
+    allocations[i][j] 为 member_ids[i] 在 project_ids[j] 上的投入比例（%），
+    0 表示取消该分配；矩阵之外的分配保持不变。
+    """
+    member_ids: List[int] = Field(..., description="成员ID（矩阵行）")
+    project_ids: List[int] = Field(..., description="项目ID（矩阵列）")
+    allocations: List[List[int]] = Field(..., description="投入比例矩阵（%），0表示取消分配")
+    start_date: Optional[date] = Field(None, description="开始日期（写入所有非0单元格）")
+    end_date: Optional[date] = Field(None, description="结束日期（写入所有非0单元格）")
+    
+    @validator('member_ids', 'project_ids')
+    def validate_ids(cls, v):
+        if not v:
+            raise ValueError('ID列表不能为空')
+        if len(set(v)) != len(v):
+            raise ValueError('ID列表不能重复')
+        return v
+    
+    @validator('allocations')
+    def validate_allocations(cls, v, values):
+        member_ids, project_ids = values.get('member_ids'), values.get('project_ids')
+        if member_ids is None or project_ids is None:
+            return v
+        if len(v) != len(member_ids) or any(len(row) != len(project_ids) for row in v):
+            raise ValueError('矩阵大小必须与成员数 × 项目数一致')
+        if any(value < 0 or value > 100 for row in v for value in row):
+            raise ValueError('投入比例必须在0到100之间')
+        return v
+    
+    @validator('end_date')
+    def validate_end_date(cls, v, values):
+        if v and values.get('start_date') and v < values['start_date']:
+            raise ValueError('结束日期不能早于开始日期')
+        return v
+
+
+class AssignmentMatrixResponse(BaseModel):
+    """分配矩阵保存结果"""
+    created: int = Field(0, description="新增分配数")
+    updated: int = Field(0, description="更新分配数")
+    removed: int = Field(0, description="取消分配数")
+    unchanged: int = Field(0, description="未变化的单元格数")
+
+
 class PaymentCreate(BaseModel):
     """创建支付记录"""
     member_id: int = Field(..., description="成员ID")
@@ -101,13 +209,17 @@ class PaymentCreate(BaseModel):
 class PaymentResponse(BaseModel):
     """薪资支付记录响应模型"""
     payment_id: int = Field(..., description="支付记录ID")
-    member_id: int = Field(..., description="成员ID")
+    member_id: Optional[int] = Field(None, description="成员ID（成员已删除时为空）")
     member_name: str = Field(..., description="成员姓名")
     department: Department = Field(..., description="部门")
     year: int = Field(..., description="年份")
     month: int = Field(..., description="月份")
+    price_type: PriceType = Field(..., description="计价类型")
+    project_count: int = Field(0, description="参与项目数")
+    work_hours: float = Field(0, description="折算工时")
     base_salary: float = Field(..., description="基础薪资")
     project_bonus: float = Field(..., description="项目奖金")
+    piece_amount: float = Field(0, description="计件金额（鸟瞰/人视/动画）")
     total_salary: float = Field(..., description="总薪资")
     payment_status: PaymentStatus = Field(..., description="支付状态")
     calculated_at: datetime = Field(..., description="计算时间")
@@ -128,10 +240,12 @@ class WorkloadAssignment(BaseModel):
 
 class SalaryCalculation(BaseModel):
     """薪资计算模型"""
+    payment_id: int = Field(..., description="支付记录ID")
     member_id: int = Field(..., description="成员ID")
     member_name: str = Field(..., description="成员姓名")
     base_salary: float = Field(..., description="基础薪资")
     project_bonus: float = Field(0, description="项目奖金")
+    piece_amount: float = Field(0, description="计件金额（鸟瞰/人视/动画）")
     total_salary: float = Field(..., description="总薪资")
     calculation_date: date = Field(..., description="计算日期")
 
@@ -142,6 +256,10 @@ class SalaryCalculationResponse(BaseModel):
     month: int = Field(..., description="月份")
     calculations: List[SalaryCalculation] = Field(..., description="薪资计算详情")
     total_amount: float = Field(..., description="总金额")
+    created_payments: int = Field(0, description="新增记录数")
+    updated_payments: int = Field(0, description="输入变化而重算的记录数")
+    unchanged_payments: int = Field(0, description="输入未变化的记录数")
+    locked_payments: int = Field(0, description="已支付或已取消而未重算的记录数")
 
 
 class PaymentStatusUpdate(BaseModel):
@@ -153,7 +271,7 @@ class PaymentStatusUpdate(BaseModel):
 class PaymentHistoryResponse(BaseModel):
     """薪资支付历史记录响应模型"""
     payment_id: int = Field(..., description="支付记录ID")
-    member_id: int = Field(..., description="成员ID")
+    member_id: Optional[int] = Field(None, description="成员ID（成员已删除时为空）")
     member_name: str = Field(..., description="成员姓名")
     department: Department = Field(..., description="部门")
     period: str = Field(..., description="支付周期(YYYY-MM)")
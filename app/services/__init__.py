@@ -0,0 +1 @@
+# 跨路由共享的业务逻辑
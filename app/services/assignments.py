@@ -0,0 +1,195 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import and_, delete, func, insert, join, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import dialect_insert
+from app.models.project import Project
+from app.models.team import ProjectAssignment, TeamMember
+from app.services.client_history import ONGOING_STATUSES
+
+# 批量写入分配时每条语句处理的单元格数
+ASSIGNMENT_CHUNK_SIZE = 500
+
+
+def assignment_span(until_deadline: bool = False):
+    """分配的有效区间（开始、结束）表达式，查询需联接 Project
+
+    未填写开始日期时从项目创建日开始。未填写结束日期时，进行中项目的分配一直有效
+    （逾期项目仍占用负荷）；until_deadline=True 时按计划在项目截止日期结束，用于负荷预测。
+    """
+    span_end = ProjectAssignment.end_date
+    if until_deadline:
+        span_end = func.coalesce(span_end, func.date(Project.deadline))
+    return func.coalesce(ProjectAssignment.start_date, func.date(Project.created_at)), span_end
+
+
+def assignment_overlaps(start: Optional[date] = None, end: Optional[date] = None, until_deadline: bool = False):
+    """分配在 [start, end] 内有效的条件（默认取今天，查询需联接 Project）
+
+    只有进行中的项目计入，已完成或已取消项目的分配不再占用负荷。
+    """
+    start = start or date.today()
+    end = end or start
+    span_start, span_end = assignment_span(until_deadline)
+    return and_(
+        Project.status.in_(ONGOING_STATUSES),
+        or_(span_start.is_(None), span_start <= end),
+        or_(span_end.is_(None), span_end >= start),
+    )
+
+
+def workload_query(member_condition=None, start: Optional[date] = None, end: Optional[date] = None):
+    """按成员分组统计有效分配的项目数和投入比例合计
+
+    LEFT JOIN 保留没有分配的成员，结果列：
+    member_id, project_count, allocation_total。
+    """
+    active_assignments = join(ProjectAssignment, Project, Project.id == ProjectAssignment.project_id)
+    query = (
+        select(
+            TeamMember.id.label("member_id"),
+            func.count(ProjectAssignment.id).label("project_count"),
+            func.coalesce(func.sum(ProjectAssignment.allocation), 0).label("allocation_total"),
+        )
+        .select_from(TeamMember)
+        .outerjoin(
+            active_assignments,
+            and_(ProjectAssignment.member_id == TeamMember.id, assignment_overlaps(start, end))
+        )
+        .group_by(TeamMember.id)
+    )
+    if member_condition is not None:
+        query = query.where(member_condition)
+    return query
+
+
+def utilization_rate(allocation_total: float) -> float:
+    return min(allocation_total / 100, 1.0)
+
+
+async def current_projects_by_member(
+    db: AsyncSession,
+    member_ids: Iterable[int],
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> Dict[int, List[Dict[str, Any]]]:
+    """一次查询取出多个成员当前参与的项目"""
+    member_ids = list(member_ids)
+    projects: Dict[int, List[Dict[str, Any]]] = {member_id: [] for member_id in member_ids}
+    if not member_ids:
+        return projects
+    result = await db.execute(
+        select(
+            ProjectAssignment.member_id, Project.id, Project.name,
+            ProjectAssignment.role, ProjectAssignment.allocation
+        )
+        .join(Project, Project.id == ProjectAssignment.project_id)
+        .where(ProjectAssignment.member_id.in_(member_ids), assignment_overlaps(start, end))
+        .order_by(ProjectAssignment.member_id, Project.id)
+    )
+    for member_id, project_id, name, role, allocation in result:
+        projects[member_id].append({
+            "id": project_id,
+            "name": name,
+            "role": role,
+            "allocation": allocation,
+        })
+    return projects
+
+
+async def replace_member_assignments(db: AsyncSession, member_id: int, project_ids: Iterable[int]) -> None:
+    """将成员的分配替换为给定项目（在当前事务内，不提交）
+
+    保留仍在列表中的分配（角色、比例、日期不变），删除其余分配，
+    新增的项目按100%投入、不限日期分配。
+    """
+    project_ids = set(project_ids)
+    await db.execute(
+        delete(ProjectAssignment).where(
+            ProjectAssignment.member_id == member_id,
+            ProjectAssignment.project_id.not_in(project_ids)
+        )
+    )
+    result = await db.execute(
+        select(ProjectAssignment.project_id).where(ProjectAssignment.member_id == member_id)
+    )
+    new_ids = project_ids - set(result.scalars().all())
+    if new_ids:
+        await db.execute(
+            insert(ProjectAssignment),
+            [{"member_id": member_id, "project_id": project_id, "allocation": 100} for project_id in sorted(new_ids)]
+        )
+
+
+async def apply_assignment_matrix(
+    db: AsyncSession,
+    member_ids: Sequence[int],
+    project_ids: Sequence[int],
+    allocations: Sequence[Sequence[int]],
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> Dict[str, int]:
+    """按成员 × 项目矩阵批量写入分配（在当前事务内，不提交）
+
+    一次查询取出矩阵范围内已有的分配，比例为0的单元格合并为一条 DELETE，
+    其余有变化的单元格合并为一条 UPSERT。给出日期时同时写入所有非0单元格的日期，
+    否则已有分配的日期和角色保持不变。
+    """
+    result = await db.execute(
+        select(
+            ProjectAssignment.member_id, ProjectAssignment.project_id,
+            ProjectAssignment.allocation, ProjectAssignment.start_date, ProjectAssignment.end_date
+        )
+        .where(ProjectAssignment.member_id.in_(member_ids), ProjectAssignment.project_id.in_(project_ids))
+    )
+    existing = {
+        (member_id, project_id): (allocation, start_date, end_date)
+        for member_id, project_id, allocation, start_date, end_date in result
+    }
+    dated = start is not None or end is not None
+
+    counts = {"created": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    removed, changed = [], []
+    for member_id, row in zip(member_ids, allocations):
+        for project_id, allocation in zip(project_ids, row):
+            current = existing.get((member_id, project_id))
+            if not allocation:
+                if current is None:
+                    counts["unchanged"] += 1
+                else:
+                    counts["removed"] += 1
+                    removed.append((member_id, project_id))
+                continue
+            if current is None:
+                counts["created"] += 1
+            elif current[0] == allocation and (not dated or current[1:] == (start, end)):
+                counts["unchanged"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+            changed.append({
+                "member_id": member_id,
+                "project_id": project_id,
+                "allocation": allocation,
+                "start_date": start,
+                "end_date": end,
+            })
+
+    for index in range(0, len(removed), ASSIGNMENT_CHUNK_SIZE):
+        await db.execute(
+            delete(ProjectAssignment).where(
+                tuple_(ProjectAssignment.member_id, ProjectAssignment.project_id)
+                .in_(removed[index:index + ASSIGNMENT_CHUNK_SIZE])
+            )
+        )
+
+    updated_columns = ("allocation", "start_date", "end_date") if dated else ("allocation",)
+    for index in range(0, len(changed), ASSIGNMENT_CHUNK_SIZE):
+        stmt = dialect_insert(db, ProjectAssignment).values(changed[index:index + ASSIGNMENT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProjectAssignment.member_id, ProjectAssignment.project_id],
+            set_={**{column: stmt.excluded[column] for column in updated_columns}, "updated_at": func.now()}
+        )
+        await db.execute(stmt)
+    return counts
@@ -0,0 +1,141 @@
+from typing import Dict, Optional
+from sqlalchemy import select, update, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import json_increment
+from app.models.client import Client
+from app.models.project import Project, ProjectStatus
+
+# 进行中的项目状态
+ONGOING_STATUSES = (
+    ProjectStatus.REPORTING,
+    ProjectStatus.MODELING,
+    ProjectStatus.RENDERING,
+    ProjectStatus.DELIVERING,
+)
+
+
+def empty_project_history() -> Dict[str, float]:
+    """新客户的项目历史初始值"""
+    return {"total": 0, "completed": 0, "ongoing": 0, "value": 0}
+
+
+def project_contribution(status: Optional[ProjectStatus], budget_cny: float) -> Dict[str, float]:
+    """单个项目对客户项目历史各计数的贡献"""
+    return {
+        "total": 1,
+        "completed": 1 if status == ProjectStatus.COMPLETED else 0,
+        "ongoing": 1 if status in ONGOING_STATUSES else 0,
+        "value": budget_cny or 0,
+    }
+
+
+def history_delta(before: Optional[Dict[str, float]], after: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """计算项目变更前后对客户项目历史的差值"""
+    before = before or {}
+    after = after or {}
+    keys = set(before) | set(after)
+    return {key: after.get(key, 0) - before.get(key, 0) for key in keys}
+
+
+async def apply_history_delta(db: AsyncSession, client_id: int, delta: Dict[str, float]) -> None:
+    """在当前事务内对客户项目历史做增量更新（不提交）"""
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+    
+    stmt = (
+        update(Client)
+        .where(Client.id == client_id)
+        .values(project_history=json_increment(db, Client.project_history, delta))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def apply_project_change_history(
+    db: AsyncSession,
+    condition,
+    status: Optional[ProjectStatus] = None,
+    budget_cny=None
+) -> None:
+    """按项目当前值与新值的差更新客户项目历史（不提交）
+
+    必须在更新项目的 UPDATE 之前执行：差值由关联子查询读取项目的当前状态和预算，
+    无需先把项目查询出来，也适用于批量更新。
+    condition 为被更新项目的筛选条件，budget_cny 可以是引用项目列的表达式。
+    """
+    def changed_sum(expr):
+        subquery = (
+            select(func.sum(expr))
+            .where(Project.client_id == Client.id, condition)
+            .scalar_subquery()
+        )
+        return func.coalesce(subquery, 0)
+    
+    deltas = {}
+    if status is not None:
+        deltas["completed"] = changed_sum(
+            (1 if status == ProjectStatus.COMPLETED else 0)
+            - case((Project.status == ProjectStatus.COMPLETED, 1), else_=0)
+        )
+        deltas["ongoing"] = changed_sum(
+            (1 if status in ONGOING_STATUSES else 0)
+            - case((Project.status.in_(ONGOING_STATUSES), 1), else_=0)
+        )
+    if budget_cny is not None:
+        deltas["value"] = changed_sum(budget_cny - Project.budget_cny)
+    if not deltas:
+        return
+    
+    stmt = (
+        update(Client)
+        .where(Client.id.in_(select(Project.client_id).where(condition)))
+        .values(project_history=json_increment(db, Client.project_history, deltas))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+def history_aggregates():
+    """按客户分组的项目历史聚合列"""
+    return (
+        func.count(Project.id).label("total"),
+        func.coalesce(func.sum(case((Project.status == ProjectStatus.COMPLETED, 1), else_=0)), 0).label("completed"),
+        func.coalesce(func.sum(case((Project.status.in_(ONGOING_STATUSES), 1), else_=0)), 0).label("ongoing"),
+        func.coalesce(func.sum(Project.budget_cny), 0).label("value"),
+    )
+
+
+async def recompute_project_history(db: AsyncSession, client_id: Optional[int] = None) -> int:
+    """按项目表重新计算客户项目历史（不提交）
+
+    使用一条 LEFT JOIN + GROUP BY 查询得到所有客户的计数，
+    再按主键批量写回。未指定 client_id 时修正全部客户，返回更新的客户数。
+    """
+    query = (
+        select(Client.id, *history_aggregates())
+        .select_from(Client)
+        .outerjoin(Project, Project.client_id == Client.id)
+        .group_by(Client.id)
+    )
+    if client_id is not None:
+        query = query.where(Client.id == client_id)
+    
+    result = await db.execute(query)
+    rows = [
+        {
+            "id": row.id,
+            "project_history": {
+                "total": row.total,
+                "completed": int(row.completed),
+                "ongoing": int(row.ongoing),
+                "value": float(row.value),
+            },
+        }
+        for row in result.fetchall()
+    ]
+    
+    if rows:
+        await db.execute(update(Client), rows)
+    return len(rows)
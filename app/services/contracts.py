@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 合同正文使用的中文字体（reportlab 内置 CID 字体，无需字体文件）
+CJK_FONT_NAME = "STSong-Light"
+
+# 合同条款
+CONTRACT_TERMS = [
+    "甲方应按时提供项目所需的技术资料和设计要求",
+    "乙方保证按照合同约定的时间和质量完成项目交付",
+    "项目修改超过3次将产生额外费用",
+    "最终交付物包括高清渲染图和源文件",
+    "版权归属甲方，乙方保留作品展示权利",
+]
+
+# 渲染进程池（首次使用时创建）与进行中的渲染任务
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, "asyncio.Future[Path]"] = {}
+
+
+def build_contract_payload(project, client) -> Dict[str, Any]:
+    """提取合同渲染所需的项目、客户和服务数据（可序列化的纯数据）"""
+    return {
+        "contract_number": f"NFLAB-{project.protocol_number}",
+        "project": {
+            "name": project.name,
+            "protocol_number": project.protocol_number,
+            "type": project.project_type,
+            "deadline": project.deadline.strftime('%Y年%m月%d日') if project.deadline else None,
+            "description": project.description,
+            "budget": project.budget,
+            "currency": getattr(project.currency, "value", project.currency),
+            "exchange_rate": project.exchange_rate,
+            "budget_cny": project.budget_cny,
+        },
+        "client": {
+            "company_name": client.company_name if client else "未知客户",
+            "company_name_cn": client.company_name_cn if client else None,
+            "contact_person": client.contact_person if client else None,
+            "email": client.email if client else None,
+            "phone": client.phone if client else None,
+        },
+        "services": project.services or [],
+        "terms": CONTRACT_TERMS,
+    }
+
+
+def contract_digest(payload: Dict[str, Any]) -> str:
+    """合同内容哈希，内容不变时复用已生成的PDF"""
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _init_render_worker() -> None:
+    """渲染进程初始化：每个进程只注册一次中文字体"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    pdfmetrics.registerFont(UnicodeCIDFont(CJK_FONT_NAME))
+
+
+def render_contract_pdf(payload: Dict[str, Any], output_path: str) -> str:
+    """使用 reportlab 渲染合同PDF（在渲染进程中执行）
+
+    先写入临时文件再原子替换，避免并发下载读到未写完的文件。
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    title_style = ParagraphStyle("title", fontName=CJK_FONT_NAME, fontSize=18, leading=24, alignment=1)
+    heading_style = ParagraphStyle("heading", fontName=CJK_FONT_NAME, fontSize=12, leading=18, spaceBefore=8)
+    body_style = ParagraphStyle("body", fontName=CJK_FONT_NAME, fontSize=10, leading=16)
+
+    def text(value) -> str:
+        return escape(str(value)) if value not in (None, "") else "待定"
+
+    project = payload["project"]
+    client = payload["client"]
+
+    story = [
+        Paragraph("NFLAB 建筑渲染服务合同", title_style),
+        Spacer(1, 6 * mm),
+        Paragraph(f"合同编号: {text(payload['contract_number'])}", body_style),
+        Paragraph(f"项目名称: {text(project['name'])}", body_style),
+        Paragraph(f"项目类型: {text(project['type'])}", body_style),
+        Paragraph(f"客户公司: {text(client['company_name'])}", body_style),
+        Paragraph(f"联系人: {text(client['contact_person'])}", body_style),
+        Paragraph(f"联系方式: {text(client['email'])} / {text(client['phone'])}", body_style),
+        Paragraph(
+            f"项目预算: {text(project['currency'])} {project['budget']:,.2f}"
+            f"（约合人民币 ¥{project['budget_cny']:,.2f}）",
+            body_style
+        ),
+        Paragraph(f"截止日期: {text(project['deadline'])}", body_style),
+        Paragraph("服务内容", heading_style),
+    ]
+
+    services = payload["services"]
+    if services:
+        rows = [["服务项目", "数量", "单价", "金额"]]
+        for service in services:
+            if isinstance(service, dict):
+                rows.append([
+                    text(service.get("camera")),
+                    text(service.get("qty", 1)),
+                    f"{float(service.get('unit_price') or 0):,.2f}",
+                    f"{float(service.get('price') or 0):,.2f}",
+                ])
+            else:
+                rows.append([text(service), "-", "-", "-"])
+        table = Table(rows, colWidths=[80 * mm, 20 * mm, 35 * mm, 35 * mm])
+        table.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), CJK_FONT_NAME),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+        ]))
+        story.append(table)
+    else:
+        story.append(Paragraph("待定", body_style))
+
+    story.append(Paragraph("合同条款", heading_style))
+    for index, term in enumerate(payload["terms"], start=1):
+        story.append(Paragraph(f"{index}. {escape(term)}", body_style))
+
+    story.extend([
+        Spacer(1, 12 * mm),
+        Paragraph("签约日期: ______年____月____日", body_style),
+        Spacer(1, 6 * mm),
+        Paragraph("甲方签字: ________________　　乙方签字: ________________", body_style),
+    ])
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    SimpleDocTemplate(
+        tmp_path, pagesize=A4,
+        title=payload["contract_number"], author="NFLAB",
+        leftMargin=20 * mm, rightMargin=20 * mm, topMargin=20 * mm, bottomMargin=20 * mm
+    ).build(story)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def get_render_executor() -> ProcessPoolExecutor:
+    """获取合同渲染进程池（spawn 方式启动，避免复制事件循环状态）"""
+    global _executor
+    if _executor is None:
+        from app.core.config import settings
+
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.CONTRACT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+        )
+    return _executor
+
+
+def shutdown_render_executor() -> None:
+    """关闭合同渲染进程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def get_contract_pdf(payload: Dict[str, Any], contracts_dir: Path) -> Path:
+    """获取合同PDF：命中内容哈希缓存直接返回，否则在进程池中渲染
+
+    同一内容的并发请求共享一次渲染。
+    """
+    digest = contract_digest(payload)
+    output_path = contracts_dir / f"{digest}.pdf"
+    if output_path.exists():
+        return output_path
+
+    pending = _pending.get(digest)
+    if pending is None:
+        loop = asyncio.get_running_loop()
+        pending = asyncio.ensure_future(loop.run_in_executor(
+            get_render_executor(), render_contract_pdf, payload, str(output_path)
+        ))
+        _pending[digest] = pending
+        pending.add_done_callback(lambda _: _pending.pop(digest, None))
+
+    await asyncio.shield(pending)
+    return output_path
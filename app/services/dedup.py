@@ -0,0 +1,206 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 公司名称中不区分公司的法律后缀和通用词
+LEGAL_SUFFIX_TOKENS = {
+    "pty", "ltd", "limited", "inc", "incorporated", "llc", "llp", "plc",
+    "gmbh", "co", "corp", "corporation", "company", "group", "holdings",
+    "sa", "ag", "bv", "srl", "the", "and",
+}
+CN_LEGAL_SUFFIXES = ("股份有限公司", "有限责任公司", "有限公司", "集团", "公司")
+
+# 公共邮箱域名不能作为分块键（不同客户可能共用）
+PUBLIC_EMAIL_DOMAINS = {
+    "gmail.com", "outlook.com", "hotmail.com", "live.com", "yahoo.com",
+    "icloud.com", "qq.com", "163.com", "126.com", "foxmail.com", "sina.com",
+}
+
+# 共享邮箱域名或电话时的最低相似度
+SHARED_CONTACT_SCORE = 0.9
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_BLOCK_SIZE = 200
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """标准化公司名称：统一大小写/全半角，去掉标点和法律后缀"""
+    if not isinstance(name, str) or not name:
+        return ""
+    text = unicodedata.normalize("NFKC", name).lower().strip()
+    for suffix in CN_LEGAL_SUFFIXES:
+        if text.endswith(suffix) and len(text) > len(suffix):
+            text = text[: -len(suffix)]
+    tokens = [token for token in re.split(r"[\W_]+", text) if token]
+    tokens = [token for token in tokens if token not in LEGAL_SUFFIX_TOKENS] or tokens
+    return " ".join(tokens)
+
+
+def email_domain(email: Optional[str]) -> str:
+    """提取非公共邮箱的域名"""
+    if not isinstance(email, str) or "@" not in email:
+        return ""
+    domain = email.rsplit("@", 1)[1].strip().lower()
+    return "" if domain in PUBLIC_EMAIL_DOMAINS else domain
+
+
+def phone_digits(phone: Optional[str]) -> str:
+    """提取电话号码末8位数字（忽略国家码和格式差异）"""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    return digits[-8:] if len(digits) >= 7 else ""
+
+
+def name_variants(record: dict) -> Set[str]:
+    """客户的全部标准化名称（英文名与中文名）"""
+    names = {
+        normalize_name(record.get("company_name")),
+        normalize_name(record.get("company_name_cn")),
+    }
+    names.discard("")
+    return names
+
+
+def blocking_keys(record: dict) -> Set[str]:
+    """生成分块键，只有共享至少一个键的客户才会两两比较"""
+    keys = set()
+    for name in name_variants(record):
+        keys.add(f"name:{name}")
+        first_token = name.split(" ")[0]
+        if len(first_token) >= 3:
+            keys.add(f"token:{first_token}")
+        elif len(name) >= 2 and not name.isascii():
+            # 中文名称没有空格分词，使用前两个字作为前缀键
+            keys.add(f"token:{name[:2]}")
+    domain = email_domain(record.get("email"))
+    if domain:
+        keys.add(f"domain:{domain}")
+    phone = phone_digits(record.get("phone"))
+    if phone:
+        keys.add(f"phone:{phone}")
+    return keys
+
+
+def similarity(a: dict, b: dict) -> Tuple[float, List[str]]:
+    """计算两个客户的相似度与命中原因"""
+    reasons = []
+    name_score = 0.0
+    for name_a in name_variants(a):
+        for name_b in name_variants(b):
+            name_score = max(name_score, SequenceMatcher(None, name_a, name_b).ratio())
+    score = name_score
+    if name_score > 0:
+        reasons.append(f"名称相似度 {name_score:.2f}")
+
+    domain = email_domain(a.get("email"))
+    if domain and domain == email_domain(b.get("email")):
+        score = max(score, SHARED_CONTACT_SCORE)
+        reasons.append(f"相同邮箱域名 {domain}")
+
+    phone = phone_digits(a.get("phone"))
+    if phone and phone == phone_digits(b.get("phone")):
+        score = max(score, SHARED_CONTACT_SCORE)
+        reasons.append("相同电话号码")
+
+    return round(score, 4), reasons
+
+
+class DuplicateIndex:
+    """基于分块键的客户查重索引
+
+    新记录只与共享分块键的记录比较，避免全表两两比较；
+    超过 max_block_size 的分块（如过于常见的名称前缀）会被跳过。
+    """
+
+    def __init__(self, max_block_size: int = DEFAULT_MAX_BLOCK_SIZE):
+        self.max_block_size = max_block_size
+        self._blocks: Dict[str, List[dict]] = defaultdict(list)
+
+    def add(self, record: dict) -> None:
+        for key in blocking_keys(record):
+            self._blocks[key].append(record)
+
+    def candidates(self, record: dict) -> Iterable[dict]:
+        seen = set()
+        for key in blocking_keys(record):
+            block = self._blocks.get(key, [])
+            if len(block) > self.max_block_size:
+                continue
+            for other in block:
+                if id(other) not in seen and other is not record:
+                    seen.add(id(other))
+                    yield other
+
+    def match(self, record: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+        """返回与记录相似度不低于阈值的已有记录"""
+        matches = []
+        for other in self.candidates(record):
+            score, reasons = similarity(record, other)
+            if score >= threshold:
+                matches.append({"record": other, "score": score, "reasons": reasons})
+        matches.sort(key=lambda item: item["score"], reverse=True)
+        return matches
+
+
+def find_duplicate_clusters(
+    records: List[dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    max_block_size: int = DEFAULT_MAX_BLOCK_SIZE
+) -> List[dict]:
+    """在全部客户中查找疑似重复的客户簇
+
+    分块内两两比较，命中阈值的客户对通过并查集合并为簇；
+    每个簇建议保留ID最小（最早创建）的客户。
+    """
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks[key].append(index)
+
+    parent = list(range(len(records)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    compared = set()
+    pair_scores: Dict[Tuple[int, int], Tuple[float, List[str]]] = {}
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > max_block_size:
+            continue
+        for i, j in combinations(members, 2):
+            pair = (i, j) if i < j else (j, i)
+            if pair in compared:
+                continue
+            compared.add(pair)
+            score, reasons = similarity(records[i], records[j])
+            if score >= threshold:
+                pair_scores[pair] = (score, reasons)
+                parent[find(i)] = find(j)
+
+    clusters: Dict[int, dict] = {}
+    for (i, j), (score, reasons) in pair_scores.items():
+        cluster = clusters.setdefault(find(i), {"members": set(), "pairs": []})
+        cluster["members"].update((i, j))
+        cluster["pairs"].append({
+            "client_ids": [records[i]["id"], records[j]["id"]],
+            "score": score,
+            "reasons": reasons,
+        })
+
+    result = []
+    for cluster in clusters.values():
+        members = sorted((records[i] for i in cluster["members"]), key=lambda r: r["id"])
+        result.append({
+            "primary_id": members[0]["id"],
+            "client_ids": [member["id"] for member in members],
+            "clients": members,
+            "max_score": max(pair["score"] for pair in cluster["pairs"]),
+            "pairs": sorted(cluster["pairs"], key=lambda pair: pair["score"], reverse=True),
+        })
+    result.sort(key=lambda cluster: (-cluster["max_score"], cluster["primary_id"]))
+    return result
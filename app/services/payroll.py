@@ -0,0 +1,218 @@
+import calendar
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import dialect_insert
+from app.models.project import Project, ProjectService, ProjectStatus
+from app.models.team import (
+    MemberStatus, PayrollRecord, PayrollStatus, PriceType, ProjectAssignment, TeamMember
+)
+from app.services.assignments import workload_query
+from app.services.client_history import ONGOING_STATUSES
+
+# 每个参与项目的奖金（元）
+PROJECT_BONUS = 500
+
+# 投入比例为100%时的月标准工时（22个工作日 × 8小时）
+MONTHLY_STANDARD_HOURS = 22 * 8
+
+# 可计交付的项目状态（已取消的项目不计奖金和计件）
+DELIVERABLE_STATUSES = (*ONGOING_STATUSES, ProjectStatus.COMPLETED)
+
+# 每条 UPSERT 写入的记录数
+PAYROLL_UPSERT_CHUNK_SIZE = 500
+
+# 计件视角类型与成员价格字段
+BIRD_VIEW = "bird_view"
+HUMAN_VIEW = "human_view"
+ANIMATION = "animation"
+PIECE_PRICE_FIELDS = {
+    BIRD_VIEW: "bird_view_price",
+    HUMAN_VIEW: "human_view_price",
+    ANIMATION: "animation_price",
+}
+
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def view_kind(camera):
+    """按服务名称归类计件视角：鸟瞰、动画，其余按人视计"""
+    camera = func.lower(camera)
+    return case(
+        (or_(camera.like("%bird%"), camera.like("%aerial%"), camera.like("%鸟瞰%")), BIRD_VIEW),
+        (or_(camera.like("%animation%"), camera.like("%动画%")), ANIMATION),
+        else_=HUMAN_VIEW
+    )
+
+
+def delivered_between(start: date, end: date):
+    """分配在 [start, end] 内交付的条件（查询需联接 Project）
+
+    交付日为分配的结束日期（未填写时取项目截止日期，逾期项目不顺延），
+    没有结束日期也没有截止日期的分配尚未交付。
+    """
+    delivery = func.coalesce(ProjectAssignment.end_date, func.date(Project.deadline))
+    return and_(Project.status.in_(DELIVERABLE_STATUSES), delivery >= start, delivery <= end)
+
+
+def input_hash(inputs: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def compute_payroll(member: TeamMember, project_count: int, allocation_total: float,
+                    delivered_count: int, quantities: Dict[str, float]) -> Dict[str, Any]:
+    """按计价方式计算单个成员的月度薪资
+
+    固定：单价为月薪；小时：按投入比例折算标准工时；项目：单价 × 当月交付项目数。
+    另按当月交付项目数计奖金，按交付项目服务中的鸟瞰/人视/动画数量（乘投入比例）计件，
+    每个项目只在交付的月份计一次。
+    """
+    work_hours = round(allocation_total / 100 * MONTHLY_STANDARD_HOURS, 2)
+    if member.price_type == PriceType.HOURLY:
+        base_salary = member.unit_price * work_hours
+    elif member.price_type == PriceType.PROJECT:
+        base_salary = member.unit_price * delivered_count
+    else:
+        base_salary = member.unit_price
+    project_bonus = delivered_count * PROJECT_BONUS
+    piece_amount = sum(
+        quantities.get(kind, 0) * (getattr(member, field) or 0)
+        for kind, field in PIECE_PRICE_FIELDS.items()
+    )
+    base_salary, piece_amount = round(base_salary, 2), round(piece_amount, 2)
+
+    inputs = {
+        "name": member.name,
+        "department": member.department,
+        "price_type": member.price_type,
+        "unit_price": member.unit_price,
+        "prices": {field: getattr(member, field) for field in PIECE_PRICE_FIELDS.values()},
+        "project_count": project_count,
+        "allocation_total": allocation_total,
+        "delivered_count": delivered_count,
+        "quantities": {kind: round(quantities.get(kind, 0), 4) for kind in PIECE_PRICE_FIELDS},
+    }
+    return {
+        "member_id": member.id,
+        "member_name": member.name,
+        "department": member.department,
+        "price_type": member.price_type,
+        "project_count": project_count,
+        "work_hours": work_hours,
+        "base_salary": base_salary,
+        "project_bonus": project_bonus,
+        "piece_amount": piece_amount,
+        "total_salary": round(base_salary + project_bonus + piece_amount, 2),
+        "input_hash": input_hash(inputs),
+    }
+
+
+async def compute_month_payroll(db: AsyncSession, year: int, month: int) -> List[Dict[str, Any]]:
+    """一次性计算所有在职成员的月度薪资（三条分组查询，不逐个成员查询）
+
+    工时和参与项目数取当月有效的分配（与工作量统计相同），
+    奖金和计件只计当月交付的分配，项目跨多个月时不会每月重复计算。
+    """
+    month_start, month_end = month_range(year, month)
+    active = TeamMember.status == MemberStatus.ACTIVE
+
+    workload = workload_query(active, month_start, month_end).subquery()
+    result = await db.execute(
+        select(TeamMember, workload.c.project_count, workload.c.allocation_total)
+        .join(workload, workload.c.member_id == TeamMember.id)
+        .order_by(TeamMember.id)
+    )
+    members = result.all()
+
+    delivered = delivered_between(month_start, month_end)
+    result = await db.execute(
+        select(ProjectAssignment.member_id, func.count(ProjectAssignment.id))
+        .join(Project, Project.id == ProjectAssignment.project_id)
+        .join(TeamMember, TeamMember.id == ProjectAssignment.member_id)
+        .where(active, delivered)
+        .group_by(ProjectAssignment.member_id)
+    )
+    delivered_counts = dict(result.all())
+
+    kind = view_kind(ProjectService.camera)
+    result = await db.execute(
+        select(
+            ProjectAssignment.member_id, kind,
+            func.sum(ProjectService.qty * ProjectAssignment.allocation / 100.0)
+        )
+        .join(Project, Project.id == ProjectAssignment.project_id)
+        .join(ProjectService, ProjectService.project_id == ProjectAssignment.project_id)
+        .join(TeamMember, TeamMember.id == ProjectAssignment.member_id)
+        .where(active, delivered)
+        .group_by(ProjectAssignment.member_id, kind)
+    )
+    quantities: Dict[int, Dict[str, float]] = {}
+    for member_id, view, qty in result:
+        quantities.setdefault(member_id, {})[view] = float(qty or 0)
+
+    return [
+        compute_payroll(
+            member, project_count, float(allocation_total),
+            delivered_counts.get(member.id, 0), quantities.get(member.id, {})
+        )
+        for member, project_count, allocation_total in members
+    ]
+
+
+async def upsert_month_payroll(db: AsyncSession, year: int, month: int) -> Dict[str, int]:
+    """计算并写入月度薪资记录（在当前事务内，不提交）
+
+    按 (member_id, year, month) UPSERT：新成员插入，输入变化且待支付的记录更新，
+    输入未变化或已支付/已取消的记录保持不变，重复调用不会产生重复记录。
+    """
+    rows = await compute_month_payroll(db, year, month)
+    result = await db.execute(
+        select(PayrollRecord.member_id, PayrollRecord.input_hash, PayrollRecord.payment_status)
+        .where(PayrollRecord.year == year, PayrollRecord.month == month)
+    )
+    existing = {member_id: (digest, status) for member_id, digest, status in result}
+
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "locked": 0}
+    pending_rows = []
+    for row in rows:
+        if row["member_id"] not in existing:
+            counts["created"] += 1
+        else:
+            digest, status = existing[row["member_id"]]
+            if digest == row["input_hash"]:
+                counts["unchanged"] += 1
+                continue
+            if status != PayrollStatus.PENDING:
+                counts["locked"] += 1
+                continue
+            counts["updated"] += 1
+        pending_rows.append(row)
+
+    now = datetime.now()
+    for start in range(0, len(pending_rows), PAYROLL_UPSERT_CHUNK_SIZE):
+        chunk = [
+            {**row, "year": year, "month": month, "payment_status": PayrollStatus.PENDING, "calculated_at": now}
+            for row in pending_rows[start:start + PAYROLL_UPSERT_CHUNK_SIZE]
+        ]
+        stmt = dialect_insert(db, PayrollRecord).values(chunk)
+        updated_columns = (
+            "member_name", "department", "price_type", "project_count", "work_hours", "input_hash",
+            "base_salary", "project_bonus", "piece_amount", "total_salary", "calculated_at",
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PayrollRecord.member_id, PayrollRecord.year, PayrollRecord.month],
+            set_={**{column: stmt.excluded[column] for column in updated_columns}, "updated_at": func.now()},
+            # 并发计算时同样不覆盖已支付的记录
+            where=and_(
+                PayrollRecord.payment_status == PayrollStatus.PENDING,
+                PayrollRecord.input_hash != stmt.excluded.input_hash
+            )
+        )
+        await db.execute(stmt)
+    return counts
@@ -0,0 +1,36 @@
+import logging
+from typing import Any, Dict
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+
+from app.core.events import project_events
+from app.models.project import Project
+from app.schemas.project import ProjectResponse
+
+logger = logging.getLogger(__name__)
+
+
+def project_event_payload(project: Project) -> Dict[str, Any]:
+    """项目事件数据：优先使用完整响应，旧数据无法通过校验时退回到原始字段"""
+    try:
+        return ProjectResponse.model_validate(project).model_dump(mode="json")
+    except ValidationError:
+        # 历史项目的 services 可能是字符串列表等旧格式，事件中按原样输出
+        return jsonable_encoder({
+            field: getattr(project, field, None)
+            for field in ProjectResponse.model_fields
+        })
+
+
+async def publish_project_event(event_type: str, project: Project) -> None:
+    """事务提交后发布项目事件
+
+    调用时事务已经提交，任何序列化或发布失败都只记录日志，不影响接口返回。
+    """
+    try:
+        data = project_event_payload(project)
+    except Exception:
+        logger.exception("构造项目事件数据失败: %s (project_id=%s)", event_type, project.id)
+        return
+    await project_events.publish(event_type, project.id, project.client_id, data)
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import ProjectService
+
+
+def _number(value: Any, default: float = 0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def service_rows(project_id: int, services: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+    """将 Project.services 转换为 project_services 行
+
+    兼容旧数据中直接保存字符串的服务项（数量记为1，金额记为0）。
+    """
+    rows = []
+    for position, service in enumerate(services or []):
+        if isinstance(service, dict):
+            camera = service.get("camera")
+            qty = int(_number(service.get("qty"), 1))
+            unit_price = _number(service.get("unit_price"))
+            price = _number(service.get("price"), unit_price * qty)
+        else:
+            camera, qty, unit_price, price = service, 1, 0.0, 0.0
+        if not isinstance(camera, str) or not camera:
+            continue
+        rows.append({
+            "project_id": project_id,
+            "position": position,
+            "camera": camera[:100],
+            "qty": qty,
+            "unit_price": unit_price,
+            "price": price,
+        })
+    return rows
+
+
+async def replace_project_services(
+    db: AsyncSession,
+    project_id: int,
+    services: Optional[Iterable[Any]]
+) -> None:
+    """用项目当前的服务列表替换服务明细（在当前事务内，不提交）"""
+    await db.execute(delete(ProjectService).where(ProjectService.project_id == project_id))
+    rows = service_rows(project_id, services)
+    if rows:
+        await db.execute(insert(ProjectService), rows)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import dialect_insert
+from app.models.project import Project
+from app.models.system import ProtocolSequence
+
+# 序号最少位数，超过后自然增长（不会循环或冲突）
+PROTOCOL_SEQUENCE_DIGITS = 4
+
+
+def protocol_period(now: Optional[datetime] = None) -> str:
+    """协议编号的年月段，格式 YYMM"""
+    return (now or datetime.now()).strftime("%y%m")
+
+
+def format_protocol_number(prefix: str, period: str, value: int) -> str:
+    """格式: 前缀 + 年月 + 序号"""
+    return f"{prefix}{period}{value:0{PROTOCOL_SEQUENCE_DIGITS}d}"
+
+
+async def _existing_max_sequence(db: AsyncSession, prefix: str, period: str) -> int:
+    """已有协议号在该前缀和月份下的最大序号（兼容旧的随机协议号）"""
+    head = f"{prefix}{period}"
+    result = await db.execute(
+        select(Project.protocol_number).where(
+            Project.protocol_number.startswith(head, autoescape=True)
+        )
+    )
+    suffixes = (number[len(head):] for number in result.scalars())
+    return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+
+async def allocate_protocol_number(
+    db: AsyncSession,
+    prefix: str,
+    now: Optional[datetime] = None
+) -> str:
+    """在当前事务内分配下一个协议编号
+    
+    计数器行由一条 UPDATE ... RETURNING 原子递增，并发创建按行锁排队，
+    不会生成重复编号；事务回滚时计数一并回滚，编号不留空洞。
+    每月首次分配时创建计数器行，起点为已有协议号的最大序号。
+    """
+    period = protocol_period(now)
+    result = await db.execute(
+        update(ProtocolSequence)
+        .where(ProtocolSequence.prefix == prefix, ProtocolSequence.period == period)
+        .values(last_value=ProtocolSequence.last_value + 1)
+        .returning(ProtocolSequence.last_value)
+        .execution_options(synchronize_session=False)
+    )
+    value = result.scalar()
+    
+    if value is None:
+        start = await _existing_max_sequence(db, prefix, period)
+        # 并发的首次分配在唯一约束上冲突时退化为递增
+        stmt = dialect_insert(db, ProtocolSequence).values(
+            prefix=prefix, period=period, last_value=start + 1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProtocolSequence.prefix, ProtocolSequence.period],
+            set_={"last_value": ProtocolSequence.last_value + 1}
+        ).returning(ProtocolSequence.last_value)
+        value = (await db.execute(stmt)).scalar_one()
+    
+    return format_protocol_number(prefix, period, value)
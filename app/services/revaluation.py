@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+from sqlalchemy import select, update, func, and_
+
+from app.core.cache import bump_data_version
+from app.core.database import AsyncSessionLocal
+from app.models.project import Project, ProjectStatus, Currency
+from app.services.client_history import ONGOING_STATUSES, apply_project_change_history
+
+# 默认只重估进行中的项目，已完成/已取消项目保留成交时的人民币金额
+DEFAULT_REVALUATION_STATUSES = ONGOING_STATUSES
+
+# 每批更新的项目数，每批单独提交，避免长事务锁住大量行
+REVALUATION_CHUNK_SIZE = 500
+
+# 重估任务存储
+_revaluation_jobs: Dict[str, dict] = {}
+
+# 同一进程内的重估任务按提交顺序执行，后提交的汇率最终生效
+_revaluation_lock = asyncio.Lock()
+
+
+def cny_exchange_rate(rates: Mapping[Currency, float], currency: Currency) -> float:
+    """由美元基准汇率换算出某货币兑人民币的汇率"""
+    return round(rates[Currency.CNY] / rates[currency], 6)
+
+
+def changed_currencies(old_rates: Mapping[Currency, float], new_rates: Mapping[Currency, float]) -> List[Currency]:
+    """兑人民币汇率发生变化的货币"""
+    return [
+        currency for currency in Currency
+        if currency != Currency.CNY
+        and currency in new_rates and currency in old_rates
+        and cny_exchange_rate(old_rates, currency) != cny_exchange_rate(new_rates, currency)
+    ]
+
+
+def create_revaluation_job(
+    rates: Mapping[Currency, float],
+    currencies: Iterable[Currency],
+    statuses: Optional[Iterable[ProjectStatus]] = None,
+    created_by: Optional[int] = None
+) -> dict:
+    """登记重估任务，返回任务信息（由 run_revaluation_job 在后台执行）"""
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "status": "pending",
+        "currencies": [Currency(currency) for currency in currencies if currency != Currency.CNY],
+        "statuses": list(statuses or DEFAULT_REVALUATION_STATUSES),
+        "rates": {currency: cny_exchange_rate(rates, currency) for currency in Currency if currency in rates},
+        "total": 0,
+        "processed": 0,
+        "updated": 0,
+        "created_by": created_by,
+        "created_at": datetime.now(),
+        "completed_at": None,
+        "error": None,
+    }
+    _revaluation_jobs[job_id] = job
+    return job
+
+
+def get_revaluation_job(job_id: str) -> Optional[dict]:
+    return _revaluation_jobs.get(job_id)
+
+
+async def run_revaluation_job(job_id: str, chunk_size: int = REVALUATION_CHUNK_SIZE) -> None:
+    """按新汇率重算项目的 exchange_rate 与 budget_cny
+
+    按货币和主键分批：每批一条客户历史 UPDATE 和一条项目 UPDATE，
+    随后递增 projects 数据版本并提交，进度写回任务信息。
+    """
+    job = _revaluation_jobs[job_id]
+    async with _revaluation_lock:
+        job["status"] = "processing"
+        try:
+            async with AsyncSessionLocal() as db:
+                targets = {currency: job["rates"][currency] for currency in job["currencies"]}
+
+                def pending(currency: Currency, rate: float):
+                    return and_(
+                        Project.currency == currency,
+                        Project.status.in_(job["statuses"]),
+                        Project.exchange_rate != rate,
+                    )
+
+                for currency, rate in targets.items():
+                    result = await db.execute(select(func.count(Project.id)).where(pending(currency, rate)))
+                    job["total"] += result.scalar()
+                await db.commit()
+
+                for currency, rate in targets.items():
+                    last_id = 0
+                    while True:
+                        result = await db.execute(
+                            select(Project.id)
+                            .where(pending(currency, rate), Project.id > last_id)
+                            .order_by(Project.id)
+                            .limit(chunk_size)
+                        )
+                        ids = result.scalars().all()
+                        if not ids:
+                            break
+
+                        condition = and_(Project.id.in_(ids), pending(currency, rate))
+                        new_budget_cny = Project.budget * rate
+                        await apply_project_change_history(db, condition, budget_cny=new_budget_cny)
+                        result = await db.execute(
+                            update(Project)
+                            .where(condition)
+                            .values(exchange_rate=rate, budget_cny=new_budget_cny)
+                            .returning(Project.id)
+                            .execution_options(synchronize_session=False)
+                        )
+                        updated = len(result.fetchall())
+                        await bump_data_version(db, "projects")
+                        await db.commit()
+
+                        job["processed"] += len(ids)
+                        job["updated"] += updated
+                        last_id = ids[-1]
+
+            job["status"] = "completed"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["completed_at"] = datetime.now()
@@ -0,0 +1,272 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Integer, and_, column, delete, func, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import dialect_insert, dialect_name
+from app.models.client import Client
+from app.models.file import FileRecord
+from app.models.project import Project
+from app.models.search import SearchDocument
+from app.models.team import TeamMember
+
+# 实体类型
+PROJECT = "project"
+CLIENT = "client"
+MEMBER = "member"
+FILE = "file"
+ENTITY_TYPES = (PROJECT, CLIENT, MEMBER, FILE)
+
+# 各实体的详情接口
+ENTITY_URLS = {
+    PROJECT: "/api/projects/{key}",
+    CLIENT: "/api/clients/{key}",
+    MEMBER: "/api/team/members/{key}",
+    FILE: "/api/files/{key}",
+}
+
+# 参与索引的字段，更新这些字段时需要重建对应文档
+PROJECT_SEARCH_FIELDS = {"name", "protocol_number", "project_type", "description", "client_id"}
+CLIENT_SEARCH_FIELDS = {"company_name", "company_name_cn", "contact_person", "contact_person_cn", "email"}
+MEMBER_SEARCH_FIELDS = {"name", "department", "skills"}
+
+# trigram 索引能匹配的最短关键词
+TRIGRAM_MIN_LENGTH = 3
+
+# 协议编号前缀（字母、数字和连字符）
+PROTOCOL_PREFIX_PATTERN = re.compile(r"[A-Z0-9][A-Z0-9\-]+")
+
+_sqlite_index = table("search_index", column("rowid", Integer))
+
+
+def _join_text(*parts: Any) -> str:
+    return " ".join(str(part) for part in parts if part not in (None, ""))
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def project_document(project: Project, client: Optional[Client] = None) -> Dict[str, Any]:
+    client_name = client.company_name if client else None
+    return {
+        "entity_type": PROJECT,
+        "entity_key": str(project.id),
+        "title": project.name[:300],
+        "subtitle": _join_text(project.protocol_number, client_name)[:300],
+        "content": _join_text(
+            project.name, project.protocol_number, project.project_type, project.description,
+            client_name, client.company_name_cn if client else None
+        ),
+    }
+
+
+def client_document(client: Client) -> Dict[str, Any]:
+    return {
+        "entity_type": CLIENT,
+        "entity_key": str(client.id),
+        "title": client.company_name[:300],
+        "subtitle": _join_text(client.company_name_cn, client.contact_person)[:300],
+        "content": _join_text(
+            client.company_name, client.company_name_cn,
+            client.contact_person, client.contact_person_cn, client.email
+        ),
+    }
+
+
+def member_document(member: TeamMember) -> Dict[str, Any]:
+    skills = member.skills if isinstance(member.skills, list) else []
+    return {
+        "entity_type": MEMBER,
+        "entity_key": str(member.id),
+        "title": member.name[:300],
+        "subtitle": _join_text(_enum_value(member.department), *skills)[:300],
+        "content": _join_text(member.name, _enum_value(member.department), *skills),
+    }
+
+
+def file_document(file: FileRecord) -> Dict[str, Any]:
+    return {
+        "entity_type": FILE,
+        "entity_key": file.file_id,
+        "title": file.original_filename[:300],
+        "subtitle": file.file_type,
+        "content": _join_text(file.original_filename, file.description),
+    }
+
+
+async def upsert_search_documents(db: AsyncSession, documents: Sequence[Dict[str, Any]]) -> None:
+    """写入或更新搜索文档（在当前事务内，不提交）"""
+    if not documents:
+        return
+    stmt = dialect_insert(db, SearchDocument)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SearchDocument.entity_type, SearchDocument.entity_key],
+        set_={
+            "title": stmt.excluded.title,
+            "subtitle": stmt.excluded.subtitle,
+            "content": stmt.excluded.content,
+            "updated_at": func.now(),
+        }
+    )
+    await db.execute(stmt, list(documents))
+
+
+async def remove_search_documents(db: AsyncSession, entity_type: str, keys: Iterable[Any]) -> None:
+    """删除实体的搜索文档（在当前事务内，不提交）"""
+    keys = [str(key) for key in keys]
+    if keys:
+        await db.execute(
+            delete(SearchDocument).where(
+                SearchDocument.entity_type == entity_type,
+                SearchDocument.entity_key.in_(keys)
+            )
+        )
+
+
+async def reindex_projects(db: AsyncSession, condition) -> None:
+    """按条件重建项目的搜索文档（项目文档包含客户名称）"""
+    result = await db.execute(
+        select(Project, Client).outerjoin(Client, Client.id == Project.client_id).where(condition)
+    )
+    await upsert_search_documents(db, [project_document(project, client) for project, client in result])
+
+
+async def reindex_clients(db: AsyncSession, condition) -> None:
+    """按条件重建客户的搜索文档"""
+    result = await db.execute(select(Client).where(condition))
+    await upsert_search_documents(db, [client_document(client) for client in result.scalars()])
+
+
+async def rebuild_search_index(db: AsyncSession) -> Dict[str, int]:
+    """全量重建搜索索引（不提交），返回各类型的文档数"""
+    await db.execute(delete(SearchDocument))
+    counts = {}
+
+    result = await db.execute(select(Project, Client).outerjoin(Client, Client.id == Project.client_id))
+    documents = [project_document(project, client) for project, client in result]
+    counts[PROJECT] = len(documents)
+    await upsert_search_documents(db, documents)
+
+    result = await db.execute(select(Client))
+    documents = [client_document(client) for client in result.scalars()]
+    counts[CLIENT] = len(documents)
+    await upsert_search_documents(db, documents)
+
+    result = await db.execute(select(TeamMember))
+    documents = [member_document(member) for member in result.scalars()]
+    counts[MEMBER] = len(documents)
+    await upsert_search_documents(db, documents)
+
+    result = await db.execute(select(FileRecord))
+    documents = [file_document(file) for file in result.scalars()]
+    counts[FILE] = len(documents)
+    await upsert_search_documents(db, documents)
+    return counts
+
+
+def search_terms(q: str) -> List[str]:
+    return [term for term in q.split() if term]
+
+
+def protocol_prefix_range(q: str) -> Optional[Tuple[str, str]]:
+    """协议编号前缀的范围条件 [prefix, upper)，可直接使用唯一索引"""
+    prefix = q.strip().upper()
+    if not PROTOCOL_PREFIX_PATTERN.fullmatch(prefix):
+        return None
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _match_query(db: AsyncSession, q: str):
+    """构建全文匹配条件与相关度表达式（相关度越大越相关）"""
+    terms = search_terms(q)
+    if dialect_name(db) == "postgresql":
+        vector = literal_column("search_documents.search_vector")
+        tsquery = " & ".join(
+            "'" + term.replace("\\", "\\\\").replace("'", "''") + "':*" for term in terms
+        )
+        query = func.to_tsquery("simple", tsquery)
+        return vector.op("@@")(query), func.ts_rank(vector, query)
+
+    long_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+    short_terms = [term for term in terms if len(term) < TRIGRAM_MIN_LENGTH]
+    conditions = [
+        or_(SearchDocument.title.contains(term, autoescape=True),
+            SearchDocument.content.contains(term, autoescape=True))
+        for term in short_terms
+    ]
+    if long_terms:
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in long_terms)
+        conditions.append(literal_column("search_index").op("MATCH")(match))
+        return and_(*conditions), -func.bm25(literal_column("search_index"))
+    return and_(*conditions), literal_column("0")
+
+
+def _search_source(db: AsyncSession, q: str):
+    source = SearchDocument.__table__
+    if dialect_name(db) != "postgresql" and any(len(term) >= TRIGRAM_MIN_LENGTH for term in search_terms(q)):
+        source = source.join(_sqlite_index, _sqlite_index.c.rowid == SearchDocument.id)
+    return source
+
+
+async def search_documents(
+    db: AsyncSession,
+    q: str,
+    entity_types: Optional[Iterable[str]] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """全局搜索：协议编号前缀精确匹配优先，其余按全文相关度排序"""
+    entity_types = list(entity_types or ENTITY_TYPES)
+    results: List[Dict[str, Any]] = []
+    seen = set()
+
+    prefix_range = protocol_prefix_range(q)
+    if prefix_range and PROJECT in entity_types:
+        lower, upper = prefix_range
+        rows = await db.execute(
+            select(Project.id, Project.name, Project.protocol_number)
+            .where(Project.protocol_number >= lower, Project.protocol_number < upper)
+            .order_by(Project.protocol_number)
+            .limit(limit)
+        )
+        for row in rows:
+            seen.add((PROJECT, str(row.id)))
+            results.append({
+                "entity_type": PROJECT,
+                "entity_id": str(row.id),
+                "title": row.name,
+                "subtitle": row.protocol_number,
+                "url": ENTITY_URLS[PROJECT].format(key=row.id),
+                "score": None,
+                "exact": True,
+            })
+
+    if not search_terms(q) or len(results) >= limit:
+        return results[:limit]
+
+    condition, score = _match_query(db, q)
+    query = (
+        select(
+            SearchDocument.entity_type, SearchDocument.entity_key,
+            SearchDocument.title, SearchDocument.subtitle, score.label("score")
+        )
+        .select_from(_search_source(db, q))
+        .where(SearchDocument.entity_type.in_(entity_types), condition)
+        .order_by(literal_column("score").desc(), SearchDocument.id)
+        .limit(limit)
+    )
+    for row in await db.execute(query):
+        key = (row.entity_type, row.entity_key)
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append({
+            "entity_type": row.entity_type,
+            "entity_id": row.entity_key,
+            "title": row.title,
+            "subtitle": row.subtitle,
+            "url": ENTITY_URLS[row.entity_type].format(key=row.entity_key),
+            "score": float(row.score) if row.score is not None else None,
+            "exact": False,
+        })
+    return results[:limit]
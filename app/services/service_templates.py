@@ -0,0 +1,83 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import VersionedCache, bump_data_version, get_data_version
+from app.models.project import ServiceTemplate
+
+# 服务模板的数据版本范围（模板或使用次数变化时递增）
+SERVICE_TEMPLATES_SCOPE = "service_templates"
+
+_catalog_cache = VersionedCache(maxsize=64)
+
+
+def service_cameras(services: Optional[Iterable[Any]]) -> Set[str]:
+    """项目服务列表中的服务名称集合
+
+    兼容旧数据中直接保存字符串的服务项。
+    """
+    cameras = set()
+    for service in services or []:
+        camera = service.get("camera") if isinstance(service, dict) else service
+        if isinstance(camera, str) and camera:
+            cameras.add(camera)
+    return cameras
+
+
+async def apply_usage_delta(
+    db: AsyncSession,
+    before: Optional[Iterable[Any]],
+    after: Optional[Iterable[Any]]
+) -> None:
+    """按项目服务的变化增量更新模板使用次数（在当前事务内，不提交）
+
+    使用次数为引用该服务的项目数，同一项目多次出现只计一次。
+    """
+    old, new = service_cameras(before), service_cameras(after)
+    changed = False
+    for cameras, delta in ((new - old, 1), (old - new, -1)):
+        if not cameras:
+            continue
+        result = await db.execute(
+            update(ServiceTemplate)
+            .where(ServiceTemplate.camera.in_(cameras))
+            .values(usage_count=ServiceTemplate.usage_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        changed = changed or result.rowcount > 0
+    if changed:
+        await bump_data_version(db, SERVICE_TEMPLATES_SCOPE)
+
+
+async def get_service_catalog(
+    db: AsyncSession,
+    project_type: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """按项目类型分组的服务模板
+
+    编译后的结果按数据版本缓存，版本未变化时只需一次版本查询。
+    未知的项目类型返回全部模板。
+    """
+    version = await get_data_version(db, SERVICE_TEMPLATES_SCOPE)
+    catalog = _catalog_cache.get(None, version)
+    if catalog is None:
+        result = await db.execute(
+            select(ServiceTemplate).order_by(
+                ServiceTemplate.category, ServiceTemplate.sort_order, ServiceTemplate.id
+            )
+        )
+        grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for template in result.scalars():
+            grouped[template.category].append({
+                "camera": template.camera,
+                "unit_price": template.unit_price,
+                "description": template.description,
+                "usage_count": template.usage_count,
+                "category": template.category,
+            })
+        catalog = _catalog_cache.set(None, version, dict(grouped))
+
+    if project_type and project_type in catalog:
+        return {project_type: catalog[project_type]}
+    return catalog
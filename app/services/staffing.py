@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.team import Department, MemberSkill, MemberStatus, TeamMember
+from app.services.assignments import workload_query
+
+SKILL_MAX_LENGTH = 100
+
+
+def normalize_skill(skill: Any) -> Optional[str]:
+    """技能名归一化：合并空白并转为小写，非字符串返回 None"""
+    if not isinstance(skill, str):
+        return None
+    return " ".join(skill.split()).lower()[:SKILL_MAX_LENGTH] or None
+
+
+def normalize_skills(skills: Any) -> List[str]:
+    if not isinstance(skills, list):
+        return []
+    return list(dict.fromkeys(skill for skill in map(normalize_skill, skills) if skill))
+
+
+async def sync_member_skills(db: AsyncSession, member_id: int, skills: Any) -> None:
+    """将成员的技能索引替换为给定技能列表（在当前事务内，不提交）"""
+    await db.execute(delete(MemberSkill).where(MemberSkill.member_id == member_id))
+    rows = [{"member_id": member_id, "skill": skill} for skill in normalize_skills(skills)]
+    if rows:
+        await db.execute(insert(MemberSkill), rows)
+
+
+async def search_staffing(
+    db: AsyncSession,
+    skills: Iterable[str] = (),
+    match_all: bool = True,
+    department: Optional[Department] = None,
+    status: Optional[MemberStatus] = MemberStatus.ACTIVE,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_load: Optional[float] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """按技能、部门、状态和负荷查找成员，负荷最低的排在前面
+
+    技能通过 member_skills 的 (skill, member_id) 索引分组匹配，
+    负荷为 [start, end]（默认今天）内有效分配的投入比例合计，筛选和排序在一条查询内完成。
+    """
+    conditions = []
+    if department:
+        conditions.append(TeamMember.department == department)
+    if status:
+        conditions.append(TeamMember.status == status)
+    workload = workload_query(and_(*conditions) if conditions else None, start, end).subquery()
+    load = workload.c.allocation_total
+
+    query = (
+        select(TeamMember, workload.c.project_count, load)
+        .join(workload, workload.c.member_id == TeamMember.id)
+    )
+    order_by = [load]
+    wanted = normalize_skills(list(skills))
+    if wanted:
+        matched = (
+            select(MemberSkill.member_id, func.count().label("matched"))
+            .where(MemberSkill.skill.in_(wanted))
+            .group_by(MemberSkill.member_id)
+        )
+        if match_all:
+            matched = matched.having(func.count() == len(wanted))
+        matched = matched.subquery()
+        query = query.join(matched, matched.c.member_id == TeamMember.id)
+        order_by.append(matched.c.matched.desc())
+    if max_load is not None:
+        query = query.where(load <= max_load)
+
+    result = await db.execute(query.order_by(*order_by, TeamMember.id).limit(limit))
+    candidates = []
+    for member, project_count, allocation_total in result:
+        member_skills = member.skills if isinstance(member.skills, list) else []
+        candidates.append({
+            "member": member,
+            "project_count": project_count,
+            "current_load": float(allocation_total),
+            "matched_skills": [skill for skill in member_skills if normalize_skill(skill) in wanted],
+        })
+    return candidates
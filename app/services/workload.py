@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import VersionedCache, get_data_versions
+from app.models.project import Project
+from app.models.team import MemberStatus, ProjectAssignment, TeamMember
+from app.services.assignments import assignment_overlaps, assignment_span
+
+# 预测结果依赖的数据范围：分配、项目（状态和截止日期）、成员
+FORECAST_SCOPES = ("assignments", "projects", "team")
+
+# 投入比例合计超过该值视为超负荷（%）
+DEFAULT_OVERLOAD_THRESHOLD = 100
+
+# 每个工作日的标准工时
+WORKDAY_HOURS = 8
+
+MAX_FORECAST_DAYS = 366
+
+_forecast_cache = VersionedCache(maxsize=32)
+
+
+def sweep_daily_loads(spans: List[Dict[str, Any]], start: date, days: int) -> Dict[int, List[float]]:
+    """扫描线计算每个成员每天的投入比例合计
+
+    每个分配区间产生开始(+allocation)和结束次日(-allocation)两个事件，
+    全部事件按 (成员, 日期) 排序后顺序扫描，复杂度 O(n log n + 成员数 × 天数)。
+    """
+    events = []
+    for span in spans:
+        first = max((span["start"] - start).days, 0)
+        last = min((span["end"] - start).days, days - 1)
+        if first > last:
+            continue
+        events.append((span["member_id"], first, span["allocation"]))
+        events.append((span["member_id"], last + 1, -span["allocation"]))
+    events.sort()
+
+    loads: Dict[int, List[float]] = {}
+    current_member, current_day, current_load = None, 0, 0.0
+    for member_id, day, delta in events:
+        if member_id != current_member:
+            current_member, current_day, current_load = member_id, 0, 0.0
+            loads[member_id] = [0.0] * days
+        if day > current_day and current_load:
+            daily = loads[member_id]
+            for index in range(current_day, min(day, days)):
+                daily[index] = current_load
+        current_day = day
+        current_load += delta
+    return loads
+
+
+def overload_periods(daily: List[float], start: date, threshold: float) -> List[Dict[str, Any]]:
+    """合并连续的超负荷日期"""
+    periods = []
+    for index, load in enumerate(daily):
+        if load <= threshold:
+            continue
+        day = start + timedelta(days=index)
+        if periods and periods[-1]["end_date"] == day - timedelta(days=1):
+            periods[-1]["end_date"] = day
+            periods[-1]["peak_load"] = max(periods[-1]["peak_load"], load)
+        else:
+            periods.append({"start_date": day, "end_date": day, "peak_load": load})
+    return periods
+
+
+def workday_hours(daily: List[float], start: date, first: int = 0, last: Optional[int] = None) -> float:
+    """按工作日（周一至周五）折算区间内的预计工时"""
+    last = len(daily) - 1 if last is None else last
+    return round(sum(
+        daily[index] / 100 * WORKDAY_HOURS
+        for index in range(first, last + 1)
+        if (start + timedelta(days=index)).weekday() < 5
+    ), 2)
+
+
+async def forecast_team_workload(
+    db: AsyncSession,
+    start: date,
+    days: int,
+    threshold: float = DEFAULT_OVERLOAD_THRESHOLD,
+    until_deadline: bool = True
+) -> List[Dict[str, Any]]:
+    """一次性预测所有在职成员在 [start, start + days) 内的每日负荷
+
+    分配区间和有效条件与工作量统计相同（assignment_span / assignment_overlaps）。
+    预测默认按计划在项目截止日期结束分配；until_deadline=False 时逾期项目的分配
+    持续有效，与当前工作量统计一致。没有结束日期的分配持续到预测范围结束。
+    结果按分配、项目和成员的数据版本缓存。
+    """
+    end = start + timedelta(days=days - 1)
+    versions = await get_data_versions(db, *FORECAST_SCOPES)
+    cache_key = (start, days, threshold, until_deadline)
+    cached = _forecast_cache.get(cache_key, versions)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(TeamMember.id, TeamMember.name, TeamMember.department)
+        .where(TeamMember.status == MemberStatus.ACTIVE)
+        .order_by(TeamMember.id)
+    )
+    members = result.all()
+
+    span_start, span_end = assignment_span(until_deadline)
+    result = await db.execute(
+        select(ProjectAssignment.member_id, ProjectAssignment.allocation, span_start, span_end)
+        .join(Project, Project.id == ProjectAssignment.project_id)
+        .join(TeamMember, TeamMember.id == ProjectAssignment.member_id)
+        .where(TeamMember.status == MemberStatus.ACTIVE, assignment_overlaps(start, end, until_deadline))
+    )
+    spans = [
+        {
+            "member_id": member_id,
+            "allocation": allocation,
+            "start": span_from or start,
+            "end": span_to or end,
+        }
+        for member_id, allocation, span_from, span_to in result
+    ]
+    loads = sweep_daily_loads(spans, start, days)
+
+    forecasts = []
+    for member_id, name, department in members:
+        daily = loads.get(member_id, [0.0] * days)
+        periods = overload_periods(daily, start, threshold)
+        forecasts.append({
+            "member_id": member_id,
+            "member_name": name,
+            "department": department,
+            "daily_load": daily,
+            "peak_load": max(daily, default=0.0),
+            "average_load": round(sum(daily) / days, 2),
+            "estimated_hours": workday_hours(daily, start),
+            "overload_days": sum(1 for load in daily if load > threshold),
+            "overload_periods": periods,
+        })
+    return _forecast_cache.set(cache_key, versions, forecasts)
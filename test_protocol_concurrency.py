@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+NFLAB项目管理系统 - 协议编号并发分配测试
+并发创建大量项目，检查协议编号全部唯一且没有创建失败
+"""
+
+import asyncio
+import aiohttp
+import sys
+import time
+from collections import Counter
+
+# API基础配置
+BASE_URL = "http://localhost:8000"
+HEADERS = {"Content-Type": "application/json"}
+
+# 创建项目总数与并发数
+TOTAL_PROJECTS = 10000
+CONCURRENCY = 200
+
+
+async def login(session: aiohttp.ClientSession) -> dict:
+    """登录并返回带令牌的请求头"""
+    async with session.post(
+        f"{BASE_URL}/api/auth/login",
+        json={"username": "admin", "password": "admin123"}
+    ) as response:
+        response.raise_for_status()
+        result = await response.json()
+        return {**HEADERS, "Authorization": f"Bearer {result['data']['token']}"}
+
+
+async def create_test_client(session: aiohttp.ClientSession, headers: dict) -> int:
+    """创建测试客户"""
+    suffix = int(time.time())
+    async with session.post(
+        f"{BASE_URL}/api/clients/",
+        json={
+            "company_name": f"Protocol Concurrency {suffix}",
+            "contact_person": "Tester",
+            "email": f"protocol-{suffix}@nflab-test.com",
+            "region": "Asia-Pacific"
+        },
+        headers=headers
+    ) as response:
+        response.raise_for_status()
+        result = await response.json()
+        return result["data"]["id"]
+
+
+async def run_concurrency_test():
+    """并发创建项目并统计协议编号"""
+    print(f"🚀 并发创建 {TOTAL_PROJECTS} 个项目（并发数 {CONCURRENCY}）")
+
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        headers = await login(session)
+        client_id = await create_test_client(session, headers)
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def create_project(index: int):
+            async with semaphore:
+                async with session.post(
+                    f"{BASE_URL}/api/projects/",
+                    json={
+                        "name": f"并发测试项目 {index}",
+                        "client_id": client_id,
+                        "budget": 1000,
+                        "currency": "USD",
+                        "exchange_rate": 7.2
+                    },
+                    headers=headers
+                ) as response:
+                    if response.status != 200:
+                        return None, f"状态码: {response.status}, 错误: {await response.text()}"
+                    result = await response.json()
+                    return result["data"]["protocol_number"], None
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(create_project(i) for i in range(TOTAL_PROJECTS)),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+
+    # 单个请求的连接异常计为失败，不中断整个测试
+    results = [
+        (None, f"请求异常: {outcome!r}") if isinstance(outcome, BaseException) else outcome
+        for outcome in outcomes
+    ]
+    numbers = [number for number, _ in results if number]
+    errors = [error for _, error in results if error]
+    duplicates = [number for number, count in Counter(numbers).items() if count > 1]
+
+    print("=" * 60)
+    print(f"耗时: {elapsed:.1f}s（{len(results) / elapsed:.0f} 个/秒）")
+    print(f"成功: {len(numbers)}  失败: {len(errors)}  重复编号: {len(duplicates)}")
+    if numbers:
+        print(f"编号范围: {min(numbers)} ~ {max(numbers)}")
+    for error in errors[:5]:
+        print(f"  - {error}")
+    for number in duplicates[:5]:
+        print(f"  - 重复: {number}")
+
+    success = not errors and not duplicates and len(numbers) == TOTAL_PROJECTS
+    print("✅ 协议编号并发分配测试通过" if success else "❌ 协议编号并发分配测试失败")
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run_concurrency_test()) else 1)